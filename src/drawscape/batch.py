@@ -0,0 +1,214 @@
+import os
+import csv
+import json
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .profiling import log, set_quiet
+
+# Flag values accepted in manifests
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'off'}
+
+
+def load_manifest(manifest, action=None):
+    """
+    Load batch jobs from a JSONL or CSV manifest, or from a glob of input files.
+
+    Each JSONL line / CSV row has an 'action' column plus any of the CLI
+    arguments, named like their attribute ('image', 'json', 'output',
+    'size', 'min_length', ...).
+    For a glob every matched file becomes one job of the given action.
+
+    Args:
+        manifest (str): Path to a .jsonl/.csv manifest, or a glob pattern.
+        action (str): Action applied to globbed files, or the default action
+            for manifest rows that don't name one.
+
+    Returns:
+        list: A list of job dictionaries.
+    """
+    from .main import ACTIONS, UNSERVED_ACTIONS
+
+    if manifest.endswith('.jsonl'):
+        with open(manifest, 'r') as f:
+            jobs = [json.loads(line) for line in f if line.strip()]
+    elif manifest.endswith('.csv'):
+        with open(manifest, 'r', newline='') as f:
+            # Empty CSV cells mean "not set"
+            jobs = [{k: v for k, v in row.items() if v} for row in csv.DictReader(f)]
+    else:
+        if not action:
+            raise ValueError("--batch-action argument is required when the manifest is a glob")
+        required, _ = ACTIONS[action]
+        jobs = [{'action': action, required: path} for path in sorted(glob.glob(manifest))]
+        if not jobs:
+            raise ValueError(f"No files match {manifest}")
+
+    for i, job in enumerate(jobs):
+        job.setdefault('action', action)
+        if job['action'] not in ACTIONS or job['action'] in UNSERVED_ACTIONS:
+            raise ValueError(f"Job {i}: unknown action {job['action']!r}")
+        job['id'] = i
+
+    return jobs
+
+
+def render_output_path(template, job):
+    """
+    Expand an output template for a job.
+
+    Available fields: {job} (job index), {action}, {dir}, {name}, {stem} and
+    {ext} of the job's primary input file.
+    """
+    from .main import ACTIONS
+
+    required, _ = ACTIONS[job['action']]
+    source = job.get(required) or ''
+    name = os.path.basename(source)
+    stem, ext = os.path.splitext(name)
+
+    return template.format(
+        job=job['id'],
+        action=job['action'],
+        dir=os.path.dirname(source) or '.',
+        name=name,
+        stem=stem,
+        ext=ext,
+    )
+
+
+def job_arguments(job):
+    """
+    Build the argument namespace for a job. Fields missing from the job fall
+    back to the CLI defaults, and string values (as read from CSV) are
+    converted with the CLI argument's type. Empty strings count as missing,
+    flags take true/false, yes/no, on/off or 1/0.
+
+    Raises:
+        ValueError: If a value can't be converted or isn't one of the
+            argument's choices.
+    """
+    import argparse
+    from .main import build_parser
+
+    parser = build_parser()
+    args = parser.parse_args([job['action']])
+    for action in parser._actions:
+        if action.dest not in job or action.dest == 'action':
+            continue
+        value = job[action.dest]
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            if isinstance(action, argparse._StoreTrueAction):
+                if value.lower() not in TRUE_VALUES | FALSE_VALUES:
+                    raise ValueError(f"Invalid {action.dest} {value!r}, expected true or false")
+                value = value.lower() in TRUE_VALUES
+            elif action.type:
+                try:
+                    value = action.type(value)
+                except ValueError:
+                    raise ValueError(f"Invalid {action.dest} {value!r}")
+        if action.choices is not None and value not in action.choices:
+            raise ValueError(f"Invalid {action.dest} {value!r}, expected one of {', '.join(map(str, action.choices))}")
+        setattr(args, action.dest, value)
+    return args
+
+
+def run_job(job, output_template=None):
+    """
+    Run a single job in the current process. Used as the pool worker.
+
+    Returns:
+        dict: The job with 'status' ('ok', 'failed' or 'error'), 'result',
+        'error' and 'seconds' added.
+    """
+    from .main import run_action
+
+    report = dict(job, output=job.get('output'), result=None, error=None)
+    start = time.perf_counter()
+    try:
+        args = job_arguments(job)
+        set_quiet(args.quiet)
+
+        template = job.get('output') or output_template
+        if template:
+            args.output = render_output_path(template, job)
+            output_dir = os.path.dirname(args.output)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+        report['output'] = args.output
+
+        result = run_action(job['action'], args)
+        # Actions report their own failures and return None
+        report['status'] = 'ok' if result is not None else 'failed'
+        report['result'] = result if isinstance(result, (str, list, tuple)) else None
+    except Exception as e:
+        report['status'] = 'error'
+        report['error'] = f"{type(e).__name__}: {e}"
+    report['seconds'] = time.perf_counter() - start
+
+    return report
+
+
+def run_batch(manifest, action=None, workers=None, output_template=None, report_path=None, job_defaults=None):
+    """
+    Run every job of a manifest on a process pool.
+
+    Args:
+        manifest (str): Path to a .jsonl/.csv manifest, or a glob pattern.
+        action (str): Action for globbed files / rows without an action.
+        workers (int): Number of worker processes (default: CPU count).
+        output_template (str): Output path template applied to jobs that
+            don't set their own 'output' (see render_output_path).
+        report_path (str): Where to write the JSON report (optional).
+        job_defaults (dict): Arguments applied to jobs that don't set them,
+            e.g. the batch's own cache and quiet options.
+
+    Returns:
+        list: Per-job reports ordered by job index. Jobs lost with their
+        worker process are reported as errors.
+    """
+    jobs = load_manifest(manifest, action)
+    for job in jobs:
+        for name, value in (job_defaults or {}).items():
+            job.setdefault(name, value)
+    workers = workers or os.cpu_count() or 1
+
+    log(f"Running {len(jobs)} jobs on {workers} workers")
+
+    start = time.perf_counter()
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, output_template): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                report = future.result()
+            except Exception as e:
+                # E.g. a worker was killed, which breaks the pool and fails
+                # every job still pending on it
+                job = futures[future]
+                report = dict(job, output=job.get('output'), result=None, status='error',
+                              error=f"{type(e).__name__}: {e}", seconds=0.0)
+            reports.append(report)
+            message = (f"[{report['id']}] {report['action']} {report['status']} in {report['seconds']:.2f}s"
+                       + (f": {report['error']}" if report['error'] else ''))
+            # Failures are shown in quiet mode too
+            if report['status'] == 'ok':
+                log(message)
+            else:
+                print(message)
+    elapsed = time.perf_counter() - start
+
+    reports.sort(key=lambda r: r['id'])
+    succeeded = sum(1 for r in reports if r['status'] == 'ok')
+    log(f"Batch finished: {succeeded}/{len(reports)} succeeded in {elapsed:.2f}s")
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump({'elapsed': elapsed, 'jobs': reports}, f, indent=2)
+        log(f"Batch report saved to {report_path}")
+
+    return reports
@@ -0,0 +1,1114 @@
+import os
+import re
+import subprocess
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+# Modules that must never be imported just to start the CLI.
+HEAVY_MODULES = ['cv2', 'numpy', 'PIL', 'requests', 'HersheyFonts', 'svgwrite', 'nextdraw', 'vpype', 'dotenv']
+
+# Cold-start budget for `import drawscape.main`, in milliseconds.
+STARTUP_BUDGET_MS = 50
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_startup(module='drawscape.main'):
+    """
+    Measure the cold import cost of a module with `python -X importtime`.
+
+    Args:
+        module (str): Module to import in a fresh interpreter.
+
+    Returns:
+        dict: A dictionary containing the startup information:
+            - 'total_ms': Cumulative import time of the module in milliseconds
+            - 'modules': Modules imported beyond those of a bare interpreter
+            - 'heavy': Entries of HEAVY_MODULES that were imported
+    """
+    def importtime(code):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, check=True,
+        )
+        return [IMPORTTIME_LINE.match(line) for line in result.stderr.splitlines()]
+
+    # Modules the bare interpreter imports anyway (site, encodings, ...)
+    interpreter = {match.group(4) for match in importtime('pass') if match}
+
+    # The module and each of its parent packages show up as top-level imports
+    parts = module.split('.')
+    targets = {'.'.join(parts[:i]) for i in range(1, len(parts) + 1)}
+
+    total_us = 0
+    modules = []
+    for match in importtime(f'import {module}'):
+        if not match or match.group(4) in interpreter:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules.append(name)
+        if len(indent) == 1 and name in targets:
+            total_us += cumulative
+
+    heavy = sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+
+    return {
+        'total_ms': total_us / 1000,
+        'modules': modules,
+        'heavy': heavy,
+    }
+
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS, module='drawscape.main'):
+    """
+    Check that importing the CLI stays within the cold-start budget and does
+    not pull in any heavy action dependency.
+
+    Returns:
+        bool: True if the startup check passed.
+    """
+    startup = measure_startup(module)
+    print(f"Startup: {startup['total_ms']:.1f} ms for {len(startup['modules'])} modules (budget {budget_ms} ms)")
+
+    ok = True
+    if startup['heavy']:
+        print(f"Error: heavy modules imported at startup: {', '.join(startup['heavy'])}")
+        ok = False
+    if startup['total_ms'] > budget_ms:
+        print(f"Error: startup exceeded budget by {startup['total_ms'] - budget_ms:.1f} ms")
+        ok = False
+    return ok
+
+
+def bench_svg_writer(sizes=(10_000, 100_000, 400_000), points_per_path=8):
+    """
+    Stream documents of increasing path counts through SVGWriter to
+    os.devnull and report time and peak traced memory per size. Time per
+    path should stay flat and peak memory should not grow with the size.
+
+    Returns:
+        list: One dict per size with 'paths', 'seconds', 'us_per_path' and
+        'peak_kb'.
+    """
+    from .svg_writer import SVGWriter
+
+    d = 'M' + ' L'.join(f'{i},{i * 2}' for i in range(points_per_path))
+
+    def write(paths):
+        with open(os.devnull, 'w') as f:
+            svg = SVGWriter(f)
+            with svg.document(width='100mm', height='100mm', viewBox='0 0 100 100'):
+                with svg.group(id='paths', fill='none', stroke='black'):
+                    for _ in range(paths):
+                        svg.path(d, stroke_width='0.5')
+
+    results = []
+    for paths in sizes:
+        # Time and memory are measured in separate runs since tracing
+        # allocations slows the writer down considerably
+        start = time.perf_counter()
+        write(paths)
+        seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        write(paths)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            'paths': paths,
+            'seconds': seconds,
+            'us_per_path': seconds / paths * 1e6,
+            'peak_kb': peak / 1024,
+        })
+        print(f"SVGWriter: {paths} paths in {seconds:.2f}s ({seconds / paths * 1e6:.2f} us/path), peak {peak / 1024:.0f} KiB")
+    return results
+
+
+def synthetic_raster(path, width, height, density=1.0, seed=0):
+    """
+    Write a deterministic RGBA PNG for the raster actions: a subject of
+    random filled shapes and strokes on a transparent margin.
+
+    Args:
+        density (float): Shapes per 10,000 pixels of the subject. The number
+            of edge pixels svglines finds grows linearly with it.
+    """
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    # The subject covers the middle, so trim has a margin to remove
+    left, top, right, bottom = width // 8, height // 8, width * 7 // 8, height * 7 // 8
+    shapes = max(int(density * (right - left) * (bottom - top) / 10_000), 1)
+    radius = max(min(width, height) // 40, 2)
+    for _ in range(shapes):
+        color = tuple(int(c) for c in rng.integers(30, 256, 3)) + (255,)
+        x, y = int(rng.integers(left, right)), int(rng.integers(top, bottom))
+        kind = rng.integers(3)
+        if kind == 0:
+            cv2.circle(pixels, (x, y), int(rng.integers(2, radius)), color, -1)
+        elif kind == 1:
+            w, h = (int(v) for v in rng.integers(2, 2 * radius, 2))
+            cv2.rectangle(pixels, (x, y), (min(x + w, right), min(y + h, bottom)), color, -1)
+        else:
+            end = (int(rng.integers(left, right)), int(rng.integers(top, bottom)))
+            cv2.line(pixels, (x, y), end, color, int(rng.integers(1, 4)))
+    Image.fromarray(pixels, 'RGBA').save(path)
+    return path
+
+
+def synthetic_svg(path, paths=1000, points=10, size=1000, depth=3, seed=0, lines=False):
+    """
+    Write a deterministic SVG for the vector actions: paths of mixed
+    absolute and relative commands (lines, curves, arcs, closepath) spread
+    over groups nested depth deep, each with a transform. Coordinates are
+    in px, as svglines writes them.
+
+    Args:
+        paths (int): Number of <path> elements.
+        points (int): Number of commands per path.
+        size (int): Page width and height in px.
+        depth (int): Nesting depth of the transformed groups, 0 for none.
+        lines (bool): Only absolute line commands, so every path is a
+            polyline of points - 1 segments.
+    """
+    from .svg_writer import SVGWriter
+
+    rng = random.Random(seed)
+
+    def coordinate():
+        return f'{rng.uniform(0, size):.2f},{rng.uniform(0, size):.2f}'
+
+    def offset():
+        return f'{rng.uniform(-20, 20):.2f},{rng.uniform(-20, 20):.2f}'
+
+    commands = [
+        lambda: f'L{coordinate()}',
+        lambda: f'l{offset()}',
+        lambda: f'H{rng.uniform(0, size):.2f}',
+        lambda: f'v{rng.uniform(-20, 20):.2f}',
+        lambda: f'C{coordinate()} {coordinate()} {coordinate()}',
+        lambda: f'c{offset()} {offset()} {offset()}',
+        lambda: f'Q{coordinate()} {coordinate()}',
+        lambda: f's{offset()} {offset()}',
+        lambda: f'T{coordinate()}',
+        lambda: f'a{rng.uniform(5, 50):.1f},{rng.uniform(5, 50):.1f} {rng.randrange(360)} {rng.randrange(2)},{rng.randrange(2)} {offset()}',
+    ]
+    if lines:
+        commands = commands[:1]
+    transforms = [
+        lambda: f'translate({rng.uniform(-10, 10):.2f},{rng.uniform(-10, 10):.2f})',
+        lambda: f'rotate({rng.uniform(-5, 5):.2f} {size / 2:g} {size / 2:g})',
+        lambda: f'scale({rng.uniform(0.95, 1.05):.3f})',
+    ]
+
+    groups = 4 ** depth
+    with open(path, 'w') as f:
+        svg = SVGWriter(f)
+
+        def write_group(level, count):
+            if level == depth:
+                for _ in range(count):
+                    d = f'M{coordinate()}' + ''.join(rng.choice(commands)() for _ in range(points - 1))
+                    svg.path(d + ('Z' if not lines and rng.random() < 0.3 else ''))
+                return
+            # Split the paths over four child groups
+            for i in range(4):
+                child_count = count * (i + 1) // 4 - count * i // 4
+                with svg.group(transform=rng.choice(transforms)()):
+                    write_group(level + 1, child_count)
+
+        with svg.document(width=size, height=size, viewBox=f'0 0 {size} {size}'):
+            with svg.group(fill='none', stroke='black'):
+                write_group(0, paths)
+    return path
+
+
+def bench_optimize(files=100):
+    """
+    Compare optimize_svg throughput with vpype run as a subprocess per file
+    against the in-process engine on the same set of files.
+
+    Returns:
+        dict: Seconds taken by each engine, keyed 'subprocess' and 'in_process'.
+    """
+    import contextlib
+    import io
+    from .optimize import optimize_svg, vpype_available
+
+    if not vpype_available():
+        print("vpype is not installed, skipping the in-process optimize benchmark")
+        return {}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [synthetic_svg(os.path.join(tmp, f'{i}.svg'), paths=200, size=200, depth=0, seed=i, lines=True) for i in range(files)]
+        for engine, in_process in [('subprocess', False), ('in_process', True)]:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for path in inputs:
+                    optimize_svg(path, in_process=in_process)
+            results[engine] = time.perf_counter() - start
+            print(f"optimize ({engine}): {files} files in {results[engine]:.2f}s ({files / results[engine]:.1f} files/s)")
+    return results
+
+
+def bench_convert(segments=1_000_000, points=11):
+    """
+    Time convert_svg in both modes on a generated file of the given number
+    of line segments. The viewbox mode should take about as long as copying
+    the file, whatever its size.
+
+    Returns:
+        dict: Seconds taken per mode, keyed by mode.
+    """
+    import contextlib
+    import io
+    from .convert import convert_svg, CONVERT_MODES
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = synthetic_svg(os.path.join(tmp, 'segments.svg'), paths=segments // (points - 1), points=points,
+                               depth=0, lines=True)
+        print(f"convert: {segments} segments, {os.path.getsize(source) / 1e6:.1f} MB")
+        for mode in CONVERT_MODES:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                convert_svg(source, os.path.join(tmp, f'{mode}.svg'), mode)
+            results[mode] = time.perf_counter() - start
+            print(f"convert ({mode}): {results[mode]:.2f}s ({segments / results[mode] / 1e6:.2f}M segments/s)")
+    return results
+
+
+def bench_geometry(points=2_000_000, per_path=10):
+    """
+    Time loading a generated drawing of the given number of points by
+    parsing the SVG, and from the memory-mapped geometry cache.
+
+    Returns:
+        dict: Seconds taken, keyed 'parse', 'store' (first cached load,
+        which parses and writes the arrays) and 'mapped'.
+    """
+    from .cache import configure
+    from .geometry import Drawing, load_drawing
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = synthetic_svg(os.path.join(tmp, 'drawing.svg'), paths=points // per_path, points=per_path,
+                               depth=0, lines=True)
+        print(f"geometry: {points} points, {os.path.getsize(source) / 1e6:.1f} MB")
+        configure(argparse.Namespace(cache_dir=os.path.join(tmp, 'cache')))
+        for name, load in [('parse', Drawing.from_svg), ('store', load_drawing), ('mapped', load_drawing)]:
+            start = time.perf_counter()
+            drawing = load(source)
+            # Touch every coordinate so mapped pages are actually read
+            drawing.coords.sum()
+            results[name] = time.perf_counter() - start
+            print(f"geometry ({name}): {results[name] * 1000:.1f} ms for {len(drawing)} paths")
+    return results
+
+
+def stub_removebg_server(latency=0.05, throttle=0.0, payload=256 * 1024, seed=0):
+    """
+    Start a local HTTP server standing in for the remove.bg API. Every
+    request takes `latency` seconds and returns a PNG-sized body, and a
+    `throttle` fraction of requests is answered 429 with a Retry-After
+    header. Connections are kept alive, as the real API does.
+
+    Returns:
+        ThreadingHTTPServer: The running server; its URL is server.url and
+        server.stats counts 'connections', 'requests' and 'throttled'. Call
+        server.shutdown() when done.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    body = b'\x89PNG\r\n\x1a\n' + bytes(payload)
+    stats = {'connections': 0, 'requests': 0, 'throttled': 0}
+    lock = threading.Lock()
+    rng = random.Random(seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            with lock:
+                stats['connections'] += 1
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            with lock:
+                stats['requests'] += 1
+                throttled = rng.random() < throttle
+                stats['throttled'] += throttled
+            if throttled:
+                self.send_response(429)
+                self.send_header('Retry-After', '0.1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.stats = stats
+    server.url = f'http://127.0.0.1:{server.server_port}/v1.0/removebg'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_removebg(images=100, workers=8, latency=0.05, throttle=0.05):
+    """
+    Compare background removal one image at a time with a new connection
+    per request (how removebg used to work) against the concurrent batch on
+    a pooled session, both against a local stub server.
+
+    Returns:
+        dict: Seconds taken, keyed 'per_request', 'batch' and 'rerun' (the
+        batch again, with every output already present).
+    """
+    import contextlib
+    import io
+    from .removebg import remove_background, remove_backgrounds
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = []
+        for i in range(images):
+            path = os.path.join(tmp, f'{i}.jpg')
+            with open(path, 'wb') as f:
+                f.write(os.urandom(200 * 1024))
+            inputs.append(path)
+
+        runs = [
+            ('per_request', lambda url: [remove_background(path, os.path.join(tmp, 'single', f'{i}.png'), url=url, api_key='')
+                                         for i, path in enumerate(inputs)]),
+            ('batch', lambda url: remove_backgrounds(inputs, os.path.join(tmp, 'batch'), workers, url=url, api_key='')),
+            ('rerun', lambda url: remove_backgrounds(inputs, os.path.join(tmp, 'batch'), workers, url=url, api_key='')),
+        ]
+        os.makedirs(os.path.join(tmp, 'single'))
+        for name, run in runs:
+            server = stub_removebg_server(latency, throttle)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run(server.url)
+            results[name] = time.perf_counter() - start
+            server.shutdown()
+            stats = server.stats
+            print(f"removebg ({name}): {images} images in {results[name]:.2f}s ({images / results[name]:.1f} images/s), "
+                  f"{stats['requests']} requests, {stats['throttled']} throttled, {stats['connections']} connections")
+    return results
+
+
+def bench_trim(images=40, size=(3000, 2000)):
+    """
+    Compare trimming a directory of transparent PNGs the old way (RGBA
+    conversion and getbbox, one image at a time, default compression)
+    against trim_images on a thread pool at a low compression level.
+
+    Returns:
+        dict: Seconds taken, keyed 'sequential' and 'threaded'.
+    """
+    import contextlib
+    import io
+    import numpy as np
+    from PIL import Image
+    from .trim import trim_images
+
+    rng = np.random.default_rng(0)
+    width, height = size
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = []
+        for i in range(images):
+            # A smooth gradient subject on a transparent background
+            pixels = np.zeros((height, width, 4), dtype=np.uint8)
+            top, left = rng.integers(0, height // 4), rng.integers(0, width // 4)
+            ramp = np.linspace(0, 255, width // 2, dtype=np.uint8)
+            pixels[top:top + height // 2, left:left + width // 2, :3] = ramp[None, :, None]
+            pixels[top:top + height // 2, left:left + width // 2, 3] = 255
+            path = os.path.join(tmp, f'{i}.png')
+            Image.fromarray(pixels, 'RGBA').save(path)
+            inputs.append(path)
+
+        def sequential():
+            for i, path in enumerate(inputs):
+                with Image.open(path) as img:
+                    img = img.convert('RGBA')
+                    img.crop(img.getbbox()).save(os.path.join(tmp, f'{i}_sequential.png'))
+
+        runs = [
+            ('sequential', sequential),
+            ('threaded', lambda: trim_images(inputs, os.path.join(tmp, 'threaded'), compress_level=1)),
+        ]
+        for name, run in runs:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run()
+            results[name] = time.perf_counter() - start
+            print(f"trim ({name}): {images} images of {width}x{height} in {results[name]:.2f}s "
+                  f"({images / results[name]:.1f} images/s)")
+    return results
+
+
+def bench_pipeline(size=(2000, 1500), shapes=150):
+    """
+    Compare running trim, svglines, optimize, convert and blueprint-label
+    one action at a time through intermediate files against the in-memory
+    pipeline, both in this process.
+
+    Returns:
+        dict: Seconds taken, keyed 'files' and 'pipeline'.
+    """
+    import contextlib
+    import io
+    import json
+    import cv2
+    import numpy as np
+    from PIL import Image
+    from .trim import trim
+    from .svg_utils import svglines
+    from .optimize import optimize_svg
+    from .convert import convert_svg
+    from .blueprint_label import blueprint_label
+    from .pipeline import run_pipeline
+    # Loaded up front so neither run pays for vpype's import
+    import vpype_cli  # noqa: F401
+
+    rng = np.random.default_rng(0)
+    width, height = size
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Filled circles on a transparent background
+        pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        for _ in range(shapes):
+            color = tuple(int(c) for c in rng.integers(40, 256, 3)) + (255,)
+            center = (int(rng.integers(width // 8, width * 7 // 8)), int(rng.integers(height // 8, height * 7 // 8)))
+            cv2.circle(pixels, center, int(rng.integers(10, min(size) // 12)), color, -1)
+        image_path = os.path.join(tmp, 'photo.png')
+        Image.fromarray(pixels, 'RGBA').save(image_path)
+        json_path = os.path.join(tmp, 'label.json')
+        with open(json_path, 'w') as f:
+            json.dump({'title': 'Benchmark'}, f)
+
+        def files():
+            trimmed = trim(image_path)
+            optimized = optimize_svg(svglines(trimmed))
+            blueprint_label(json_path, convert_svg(optimized), os.path.join(tmp, 'files_label.svg'), estimate='native')
+
+        runs = [
+            ('files', files),
+            ('pipeline', lambda: run_pipeline(image_path, ['trim', 'svglines', 'optimize', 'convert', 'blueprint-label'],
+                                              os.path.join(tmp, 'pipeline_label.svg'), json_path=json_path,
+                                              options={'blueprint-label': {'estimate': 'native'}})),
+        ]
+        for name, run in runs:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run()
+            results[name] = time.perf_counter() - start
+            print(f"pipeline ({name}): {width}x{height} image to label in {results[name]:.2f}s")
+    return results
+
+
+def bench_shipping(labels=1000):
+    """
+    Compare rendering shipping labels one create_shipping_label call per
+    recipient JSON file against the bulk renderer, as one file per label
+    and on 2x2 sheets.
+
+    Returns:
+        dict: Seconds taken, keyed 'per_label', 'bulk' and 'sheets'.
+    """
+    import contextlib
+    import io
+    import json
+    from .shipping import create_shipping_label, create_shipping_labels
+
+    rng = random.Random(0)
+    streets = ['Main Street', 'Oak Avenue', 'Pine Road', 'Lakeview Drive']
+    cities = ['Springfield, IL 62701', 'Reno, NV 89501', 'Austin, TX 73301']
+    recipients = [{'to_name': f"Customer {i}", 'to_address': f"{rng.randint(1, 9999)} {rng.choice(streets)}",
+                   'to_city': rng.choice(cities)} for i in range(labels)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        recipients_path = os.path.join(tmp, 'recipients.jsonl')
+        with open(recipients_path, 'w') as f:
+            for recipient in recipients:
+                f.write(json.dumps(recipient) + '\n')
+
+        def per_label():
+            for i, recipient in enumerate(recipients):
+                json_path = os.path.join(tmp, f'{i}.json')
+                with open(json_path, 'w') as f:
+                    json.dump(recipient, f)
+                create_shipping_label(json_path, os.path.join(tmp, 'single', f'{i}.svg'))
+
+        runs = [
+            ('per_label', per_label),
+            ('bulk', lambda: create_shipping_labels(recipients_path, os.path.join(tmp, 'bulk', '{index}.svg'))),
+            ('sheets', lambda: create_shipping_labels(recipients_path, os.path.join(tmp, 'sheets', '{index}.svg'), (2, 2))),
+        ]
+        os.makedirs(os.path.join(tmp, 'single'))
+        for name, run in runs:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run()
+            results[name] = time.perf_counter() - start
+            print(f"shipping ({name}): {labels} labels in {results[name]:.2f}s ({labels / results[name]:.0f} labels/s)")
+    return results
+
+
+def bench_blueprint(designs=50):
+    """
+    Compare rendering every paper size and orientation of a blueprint with
+    one blueprint call per variant, measuring the text every time as
+    separate runs do, against one blueprint_variants call per design.
+
+    Returns:
+        dict: Seconds taken, keyed 'per_variant' and 'variants'.
+    """
+    import contextlib
+    import io
+    import json
+    from .blueprint import blueprint, blueprint_variants, parse_variants
+    from .text import text_layout, text_path_data
+
+    rng = random.Random(0)
+    variants = parse_variants('all', 'all')
+    words = ['Pen', 'Ink', 'Paper', 'Plotter', 'Ballpoint', 'Archival', 'Fineliner', 'Cotton']
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_paths = []
+        for i in range(designs):
+            json_paths.append(os.path.join(tmp, f'{i}.json'))
+            with open(json_paths[-1], 'w') as f:
+                json.dump({'title': f"Design {i}", 'subtitle': ' '.join(rng.sample(words, 3)),
+                           'specifications': [{'label': rng.choice(words), 'detail': ' '.join(rng.sample(words, 4))}
+                                              for _ in range(8)]}, f)
+
+        def per_variant():
+            for i, json_path in enumerate(json_paths):
+                for size, orientation in variants:
+                    text_layout.cache_clear()
+                    text_path_data.cache_clear()
+                    blueprint(json_path, size, orientation, os.path.join(tmp, f'{i}_{size}_{orientation}.svg'))
+
+        def all_variants():
+            text_layout.cache_clear()
+            text_path_data.cache_clear()
+            for i, json_path in enumerate(json_paths):
+                blueprint_variants(json_path, variants, os.path.join(tmp, f'{i}_{{size}}_{{orientation}}.svg'))
+
+        for name, run in [('per_variant', per_variant), ('variants', all_variants)]:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run()
+            results[name] = time.perf_counter() - start
+            print(f"blueprint ({name}): {designs} designs x {len(variants)} variants in {results[name]:.2f}s")
+    return results
+
+
+def bench_serve(requests=50, cold_runs=10):
+    """
+    Compare the latency of a shipping label from a fresh `drawscape`
+    process per label against requests to a warm render server.
+
+    Returns:
+        dict: Median and 95th percentile milliseconds, keyed 'cold' and
+        'served'.
+    """
+    import contextlib
+    import io
+    import json
+    import threading
+    import urllib.request
+    from .serve import create_server
+
+    data = {'to_name': 'Jane Doe', 'to_address': '1 Main Street', 'to_city': 'Springfield, IL 62701'}
+
+    def percentiles(samples):
+        samples = sorted(samples)
+        return {'p50': samples[len(samples) // 2], 'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))]}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'shipping.json')
+        with open(json_path, 'w') as f:
+            json.dump(data, f)
+        output_path = os.path.join(tmp, 'label.svg')
+
+        samples = []
+        for _ in range(cold_runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'drawscape.main', 'shipping', '--json', json_path,
+                            '--output', output_path, '--quiet'], check=True)
+            samples.append((time.perf_counter() - start) * 1000)
+        results['cold'] = percentiles(samples)
+
+        server = create_server(port=0, workers=1, job_defaults={'quiet': True})
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        body = json.dumps({'action': 'shipping', 'json': data, 'inline': True}).encode('utf-8')
+        samples = []
+        try:
+            # The server logs every request
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    with urllib.request.urlopen(urllib.request.Request(url, data=body)) as response:
+                        json.load(response)
+                    samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.pool.shutdown()
+        results['served'] = percentiles(samples)
+
+    for name, runs in (('cold', cold_runs), ('served', requests)):
+        print(f"serve ({name}): shipping label p50 {results[name]['p50']:.1f} ms, "
+              f"p95 {results[name]['p95']:.1f} ms over {runs} runs")
+    return results
+
+
+def load_plot_references(references_path):
+    """
+    Load recorded plot-time references: SVG file name -> 'time_estimate'
+    (seconds) and 'distance_pendown' (meters), None where not recorded.
+    """
+    import json
+
+    if not os.path.exists(references_path):
+        return {}
+    with open(references_path, 'r') as f:
+        return json.load(f)
+
+
+def record_plot_time(svg_paths, references_path):
+    """
+    Run NextDraw's preview simulation on SVG files and store its plot time
+    and pen-down distance as references, keyed by file name, so the
+    analytical estimator can be checked against them without NextDraw.
+    """
+    import json
+    from .plot_time import estimate_plot_nextdraw
+
+    references = load_plot_references(references_path)
+    for path in svg_paths:
+        exact = estimate_plot_nextdraw(path)
+        references[os.path.basename(path)] = {'distance_pendown': exact['distance_pendown'],
+                                              'time_estimate': exact['time_estimate']}
+        print(f"{path}: NextDraw {exact['time_estimate']:.2f}s, {exact['distance_pendown']:.3f} m pen down")
+    with open(references_path, 'w') as f:
+        json.dump(references, f, indent=2, sort_keys=True)
+    print(f"References saved to {references_path}")
+
+
+def check_plot_time(svg_paths, tolerance=0.1, references_path=None):
+    """
+    Compare the analytical plot-time estimator against NextDraw's preview
+    simulation on SVG files, or against recorded references (see
+    record_plot_time) when NextDraw isn't installed.
+
+    Args:
+        svg_paths (list): SVG files to compare on.
+        tolerance (float): Allowed relative difference in plot time and
+            pen-down distance.
+        references_path (str): Recorded references to use without NextDraw.
+
+    Returns:
+        bool: True if every file agrees within tolerance. Values without a
+        reference to compare against count as failures.
+    """
+    from .plot_time import estimate_plot, estimate_plot_nextdraw
+
+    try:
+        import nextdraw  # noqa: F401
+        references = None
+    except ImportError:
+        references = load_plot_references(references_path) if references_path else {}
+        if not references:
+            print("NextDraw is not installed and there are no recorded references (--references) to compare against")
+            return False
+
+    ok = True
+    for path in svg_paths:
+        start = time.perf_counter()
+        native = estimate_plot(path)
+        native_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        exact = estimate_plot_nextdraw(path) if references is None else references.get(os.path.basename(path), {})
+        exact_seconds = time.perf_counter() - start
+        source = 'NextDraw' if references is None else 'reference'
+
+        for key in ['time_estimate', 'distance_pendown']:
+            if exact.get(key) is None:
+                print(f"{path} {key}: native {native[key]:.2f}, no {source} value FAIL")
+                ok = False
+                continue
+            error = abs(native[key] - exact[key]) / max(exact[key], 1e-9)
+            status = 'ok' if error <= tolerance else 'FAIL'
+            ok = ok and error <= tolerance
+            print(f"{path} {key}: native {native[key]:.2f}, {source} {exact[key]:.2f} ({error:.1%}) {status}")
+        if references is None:
+            print(f"{path}: native {native_seconds:.3f}s, NextDraw {exact_seconds:.3f}s")
+    return ok
+
+
+# Inputs of the benchmark suite per size: synthetic rasters, synthetic SVGs
+# and, for vpype's slower parser, lighter SVGs
+SUITE_SIZES = ['small', 'medium', 'large']
+SUITE_DEFAULT_SIZES = ['small', 'medium']
+SUITE_INPUTS = {
+    'raster': {'small': {'width': 1000, 'height': 1000}, 'medium': {'width': 2000, 'height': 2000},
+               'large': {'width': 4000, 'height': 4000}},
+    'svg': {'small': {'paths': 500}, 'medium': {'paths': 2_000}, 'large': {'paths': 10_000}},
+    'svg-light': {'small': {'paths': 100}, 'medium': {'paths': 400}, 'large': {'paths': 2_000}},
+}
+
+# A slower run only counts as a regression beyond this noise floor
+REGRESSION_THRESHOLD = 0.25
+MIN_SECONDS_DELTA = 0.005
+MIN_PEAK_DELTA_KB = 64
+
+
+def suite_cases():
+    """
+    The actions the suite measures: name -> (input kind, run(input_path,
+    output_dir)). Input kinds are keys of SUITE_INPUTS, or 'json' for the
+    template actions, which don't depend on an input size.
+    """
+    import xml.etree.ElementTree as ET
+
+    stub = {}
+
+    def removebg(path, out):
+        from .removebg import remove_background
+        # Against a local stand-in for the API without added latency, so the
+        # case measures the client: reading, uploading and saving the image.
+        # It is started on first use and stops with the process.
+        if 'server' not in stub:
+            stub['server'] = stub_removebg_server(latency=0)
+        return remove_background(path, os.path.join(out, 'removebg.png'), url=stub['server'].url, api_key='')
+
+    def trim(path, out):
+        from .trim import trim
+        return trim(path, os.path.join(out, 'trimmed.png'))
+
+    def svglines(path, out):
+        from .svg_utils import svglines
+        return svglines(path, os.path.join(out, 'lines.svg'))
+
+    def svgdetails(path, out):
+        from .details import parse_svg_file
+        return parse_svg_file(path)
+
+    def bounding_box(path, out):
+        from .details import calculate_bounding_box
+        return calculate_bounding_box(ET.parse(path).getroot())
+
+    def convert(path, out):
+        from .convert import convert_svg
+        return convert_svg(path, os.path.join(out, 'converted.svg'))
+
+    def split(path, out):
+        from .split import split_svg
+        return split_svg(path, os.path.join(out, 'tile.svg'), rows=2, cols=2)
+
+    def optimize(path, out):
+        from .optimize import optimize_svg
+        return optimize_svg(path, os.path.join(out, 'optimized.svg'), in_process=True)
+
+    def blueprint_label(path, out):
+        from .blueprint_label import blueprint_label
+        return blueprint_label(suite_json(out), path, os.path.join(out, 'label.svg'), estimate='native')
+
+    def pipeline(path, out):
+        from .pipeline import run_pipeline
+        return run_pipeline(path, ['trim', 'svglines', 'optimize', 'convert'], os.path.join(out, 'pipeline.svg'))
+
+    def blueprint(path, out):
+        from .blueprint import blueprint
+        return blueprint(path, 'a3', output_path=os.path.join(out, 'blueprint.svg'))
+
+    def shipping(path, out):
+        from .shipping import create_shipping_label
+        return create_shipping_label(path, os.path.join(out, 'shipping.svg'))
+
+    return {
+        'removebg': ('raster', removebg),
+        'trim': ('raster', trim),
+        'svglines': ('raster', svglines),
+        'svgdetails': ('svg', svgdetails),
+        'bounding-box': ('svg', bounding_box),
+        'convert': ('svg', convert),
+        'split': ('svg', split),
+        'optimize': ('svg-light', optimize),
+        'blueprint-label': ('svg', blueprint_label),
+        'pipeline': ('raster', pipeline),
+        'blueprint': ('json', blueprint),
+        'shipping': ('json', shipping),
+    }
+
+
+def suite_json(directory):
+    """
+    Write the label data used by the template actions, once per directory.
+    """
+    import json
+
+    path = os.path.join(directory, 'label.json')
+    if not os.path.exists(path):
+        with open(path, 'w') as f:
+            json.dump({
+                'title': 'Benchmark Suite', 'subtitle': 'Synthetic workload',
+                'to_name': 'Drawscape Benchmark', 'to_address': '1 Plotter Way', 'to_city': 'Truckee, CA 96161',
+            }, f)
+    return path
+
+
+def measure(run, repeat=3):
+    """
+    Time run (best of repeat runs) and measure its peak traced memory
+    (Python and NumPy allocations) in one more run, since tracing slows
+    allocation-heavy code down. Output printed by run is discarded.
+
+    Returns:
+        dict: 'seconds' and 'peak_kb'.
+
+    Raises:
+        RuntimeError: If run returns None, the way actions report failure.
+    """
+    import contextlib
+    import gc
+    import io
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            result = run()
+        times.append(time.perf_counter() - start)
+        if result is None:
+            # Actions print their error and return None
+            lines = output.getvalue().strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else 'no result')
+
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(times), 'peak_kb': peak / 1024}
+
+
+def run_suite(actions=None, sizes=SUITE_DEFAULT_SIZES, repeat=3):
+    """
+    Measure every action of the suite on deterministic synthetic inputs of
+    each size. The caches are disabled so every run does the full work.
+
+    Args:
+        actions (list): Actions to measure (default: all, see suite_cases).
+        sizes (list): Input sizes, see SUITE_INPUTS.
+        repeat (int): Timed runs per case; the fastest counts.
+
+    Returns:
+        dict: Environment details and 'results', which maps
+        "<action>/<size>" to the case's 'seconds' and 'peak_kb', or to
+        'failed' with the error of a case whose action failed.
+    """
+    import platform
+    from types import SimpleNamespace
+    from .cache import configure, tool_version
+
+    configure(SimpleNamespace(no_cache=True))
+    cases = suite_cases()
+    unknown = set(actions or []) - set(cases)
+    if unknown:
+        raise ValueError(f"Unknown suite actions: {', '.join(sorted(unknown))}")
+    unknown = set(sizes) - set(SUITE_SIZES)
+    if unknown:
+        raise ValueError(f"Unknown suite sizes: {', '.join(sorted(unknown))}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = {}
+
+        def input_path(kind, size):
+            # Inputs are generated once and shared by all actions of a kind
+            if (kind, size) not in inputs:
+                if kind == 'json':
+                    inputs[kind, size] = suite_json(tmp)
+                elif kind == 'raster':
+                    inputs[kind, size] = synthetic_raster(os.path.join(tmp, f'{size}.png'), **SUITE_INPUTS[kind][size])
+                else:
+                    inputs[kind, size] = synthetic_svg(os.path.join(tmp, f'{kind}_{size}.svg'), **SUITE_INPUTS[kind][size])
+            return inputs[kind, size]
+
+        for action in actions or cases:
+            kind, run = cases[action]
+            for size in (['fixed'] if kind == 'json' else sizes):
+                path = input_path(kind, size)
+                out = tempfile.mkdtemp(dir=tmp)
+                try:
+                    result = measure(lambda: run(path, out), repeat)
+                except ImportError as e:
+                    print(f"{action}/{size}: skipped ({e})")
+                    continue
+                except RuntimeError as e:
+                    # A failing action must not pass as a fast one
+                    results[f"{action}/{size}"] = {'failed': str(e)}
+                    print(f"{action}/{size}: FAILED ({e})")
+                    continue
+                results[f"{action}/{size}"] = result
+                print(f"{action}/{size}: {result['seconds']:.3f}s, peak {result['peak_kb']:.0f} KiB")
+
+    return {
+        'drawscape': tool_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare_results(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare suite results against a stored baseline. A case regresses when
+    it failed, or when its time or peak memory grew by more than threshold
+    (and more than the noise floor).
+
+    Returns:
+        list: Names of the regressed cases.
+    """
+    if baseline.get('platform') != current.get('platform'):
+        print(f"Warning: baseline was measured on {baseline.get('platform')}")
+
+    regressions = []
+    for case, result in current['results'].items():
+        base = baseline['results'].get(case)
+        if 'failed' in result:
+            regressions.append(case)
+            print(f"{case}: FAILED ({result['failed']})")
+            continue
+        if base is None or 'failed' in base:
+            print(f"{case}: new, {result['seconds']:.3f}s, peak {result['peak_kb']:.0f} KiB")
+            continue
+        slower = (result['seconds'] > base['seconds'] * (1 + threshold)
+                  and result['seconds'] - base['seconds'] > MIN_SECONDS_DELTA)
+        larger = (result['peak_kb'] > base['peak_kb'] * (1 + threshold)
+                  and result['peak_kb'] - base['peak_kb'] > MIN_PEAK_DELTA_KB)
+        status = 'REGRESSION' if slower or larger else 'ok'
+        if slower or larger:
+            regressions.append(case)
+        print(f"{case}: {base['seconds']:.3f}s -> {result['seconds']:.3f}s "
+              f"({result['seconds'] / max(base['seconds'], 1e-9) - 1:+.0%}), "
+              f"peak {base['peak_kb']:.0f} -> {result['peak_kb']:.0f} KiB "
+              f"({result['peak_kb'] / max(base['peak_kb'], 1e-9) - 1:+.0%}) {status}")
+
+    print(f"{len(regressions)} of {len(current['results'])} cases regressed")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drawscape benchmarks')
+    parser.add_argument('benchmark', choices=['startup', 'svg-writer', 'optimize', 'convert', 'geometry', 'removebg', 'trim', 'pipeline', 'shipping', 'blueprint', 'serve', 'suite', 'plot-time'], help='Benchmark to run')
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS, help='Cold-start budget in milliseconds')
+    parser.add_argument('--files', type=int, default=100, help='Number of files for the optimize benchmark')
+    parser.add_argument('--segments', type=int, default=1_000_000, help='Number of line segments for the convert benchmark')
+    parser.add_argument('--points', type=int, default=2_000_000, help='Number of points for the geometry benchmark')
+    parser.add_argument('--images', type=int, default=100, help='Number of images for the removebg and trim benchmarks')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent requests for the removebg benchmark')
+    parser.add_argument('--labels', type=int, default=1000, help='Number of labels for the shipping benchmark')
+    parser.add_argument('--designs', type=int, default=50, help='Number of designs for the blueprint benchmark')
+    parser.add_argument('--requests', type=int, default=50, help='Number of requests for the serve benchmark')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative error for the plot-time comparison')
+    parser.add_argument('--references', help='Recorded plot-time references to compare against when NextDraw is not installed')
+    parser.add_argument('--record', help='Store NextDraw plot times of the inputs as references in this JSON file instead of comparing')
+    parser.add_argument('--actions', help='Comma separated actions for the suite (default: all)')
+    parser.add_argument('--sizes', default=','.join(SUITE_DEFAULT_SIZES), help=f"Comma separated input sizes for the suite, of {', '.join(SUITE_SIZES)}")
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per suite case, the fastest counts')
+    parser.add_argument('--save', help='Write the suite results to this JSON file, e.g. as a baseline')
+    parser.add_argument('--baseline', help='Suite results JSON to compare against; regressions fail the run')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='Relative slowdown or memory growth counted as a regression')
+    parser.add_argument('inputs', nargs='*', help='SVG files for the plot-time comparison')
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'startup':
+        ok = check_startup(args.budget_ms)
+    elif args.benchmark == 'plot-time':
+        if args.record:
+            record_plot_time(args.inputs, args.record)
+            ok = True
+        else:
+            ok = check_plot_time(args.inputs, args.tolerance, args.references)
+    elif args.benchmark == 'optimize':
+        bench_optimize(args.files)
+        ok = True
+    elif args.benchmark == 'convert':
+        bench_convert(args.segments)
+        ok = True
+    elif args.benchmark == 'geometry':
+        bench_geometry(args.points)
+        ok = True
+    elif args.benchmark == 'removebg':
+        bench_removebg(args.images, args.workers)
+        ok = True
+    elif args.benchmark == 'trim':
+        bench_trim(args.images)
+        ok = True
+    elif args.benchmark == 'pipeline':
+        bench_pipeline()
+        ok = True
+    elif args.benchmark == 'shipping':
+        bench_shipping(args.labels)
+        ok = True
+    elif args.benchmark == 'blueprint':
+        bench_blueprint(args.designs)
+        ok = True
+    elif args.benchmark == 'serve':
+        bench_serve(args.requests)
+        ok = True
+    elif args.benchmark == 'suite':
+        import json
+        results = run_suite(args.actions.split(',') if args.actions else None, args.sizes.split(','), args.repeat)
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results saved to {args.save}")
+        ok = not any('failed' in result for result in results['results'].values())
+        if args.baseline:
+            with open(args.baseline) as f:
+                ok = not compare_results(results, json.load(f), args.threshold)
+    elif args.benchmark == 'svg-writer':
+        bench_svg_writer()
+        ok = True
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
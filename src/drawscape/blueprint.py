@@ -1,8 +1,11 @@
 import os
 import json
-from HersheyFonts import HersheyFonts
 import xml.etree.ElementTree as ET
 import re
+import io
+from .svg_writer import SVGWriter, DEFAULT_PRECISION
+from .text import text_layout, text_path_data, get_text_bounding_box
+from .profiling import log, span
 
 
 
@@ -14,36 +17,162 @@ PAPER_SIZES = {
     'tabloid': (279.4, 431.8)
 }
 
+ORIENTATIONS = ('portrait', 'landscape')
 
-def blueprint(json_file_path, size, orientation='portrait'):
+
+def blueprint(json_file_path, size, orientation='portrait', output_path=None, precision=DEFAULT_PRECISION):
 
     # Load data from JSON file
     with open(json_file_path, 'r') as f:
         data = json.load(f)
 
-    # Determine which function to use based on size
-    svg_content = container(size, data, orientation)
-    
     # Generate output file path
-    output_dir = os.getcwd()  # Current working directory
-    
-    # Create the new output filename
-    output_filename = "blueprint.svg"
-    output_path = os.path.join(output_dir, output_filename)
+    if not output_path:
+        output_dir = os.getcwd()  # Current working directory
+
+        # Create the new output filename
+        output_filename = "blueprint.svg"
+        output_path = os.path.join(output_dir, output_filename)
     
-    # Save SVG content to file
-    with open(output_path, 'w') as f:
-        f.write(svg_content)
+    # Stream SVG content straight to the file
+    with span('serialize'), open(output_path, 'w') as f:
+        container(size, data, orientation, f, precision)
     
-    print(f"SVG template with Border, legend, title, subtitle saved to {output_path}")
+    log(f"SVG template with Border, legend, title, subtitle saved to {output_path}")
     
     return output_path
 
 
-def container(size, json_data, orientation):
-    
-    thefont = HersheyFonts()
-    thefont.load_default_font('futural')
+def parse_variants(sizes, orientations):
+    """
+    Parse comma separated paper sizes and orientations, or "all" of either,
+    into the (size, orientation) variants to render.
+
+    Raises:
+        ValueError: If a size or orientation is unknown.
+    """
+    sizes = list(PAPER_SIZES) if sizes == 'all' else [s.strip().lower() for s in (sizes or 'tabloid').split(',') if s.strip()]
+    orientations = list(ORIENTATIONS) if orientations == 'all' else [o.strip().lower() for o in (orientations or 'portrait').split(',') if o.strip()]
+    for size in sizes:
+        if size not in PAPER_SIZES:
+            raise ValueError(f"Unknown paper size {size!r}, expected one of {', '.join(PAPER_SIZES)} or all")
+    for orientation in orientations:
+        if orientation not in ORIENTATIONS:
+            raise ValueError(f"Unknown orientation {orientation!r}, expected one of {', '.join(ORIENTATIONS)} or all")
+    return [(size, orientation) for size in sizes for orientation in orientations]
+
+
+def blueprint_variants(json_file_path, variants, output_template=None, precision=DEFAULT_PRECISION, workers=None):
+    """
+    Render the blueprint of one JSON file at several paper sizes and
+    orientations. The text is measured once and every variant's layout is
+    derived from the shared measurements, then the variants are written on a
+    thread pool.
+
+    Args:
+        json_file_path (str): Blueprint JSON file.
+        variants (list): (size, orientation) pairs, see parse_variants.
+        output_template (str): Path of each variant, with {size} and
+            {orientation}. A path without them gets a _{size}_{orientation}
+            suffix. Default: blueprint_{size}_{orientation}.svg.
+        precision (int): Decimal places of coordinates.
+        workers (int): Number of threads (default: CPU count).
+
+    Returns:
+        list: Paths of the written files, in the order of variants, or None
+        if the output template is invalid.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with span('parse'):
+        with open(json_file_path, 'r') as f:
+            data = json.load(f)
+    with span('compute'):
+        text = measure_text(data)
+
+    if not output_template:
+        output_template = 'blueprint_{size}_{orientation}.svg'
+    elif '{' not in output_template:
+        stem, ext = os.path.splitext(output_template)
+        output_template = f"{stem}_{{size}}_{{orientation}}{ext or '.svg'}"
+    try:
+        output_paths = [output_template.format(size=size, orientation=orientation) for size, orientation in variants]
+    except KeyError as e:
+        print(f"Error: Unknown field {e} in output template {output_template}")
+        return None
+    for output_dir in {os.path.dirname(path) for path in output_paths}:
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    def write_one(variant, output_path):
+        size, orientation = variant
+        with open(output_path, 'w') as f:
+            container(size, data, orientation, f, precision, text)
+        return output_path
+
+    with span('serialize'), ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        written = list(pool.map(write_one, variants, output_paths))
+
+    log(f"Saved {len(written)} blueprint variants: {', '.join(written)}")
+    return written
+
+
+def measure_text(json_data):
+    """
+    Lay out the title, subtitle and specifications of a blueprint. The
+    measurements don't depend on the paper size, so they are shared by all
+    variants of one blueprint.
+
+    Returns:
+        dict: The texts, their widths in font units ('title_width',
+        'subtitle_width', 'max_name_width', 'max_detail_width'), the
+        'letter_height' of capitals and the path data of every text.
+    """
+    title_text = json_data.get('title', '').upper()
+    subtitle_text = json_data.get('subtitle', '')
+    legend_details = [{'name': spec['label'], 'detail': spec['detail']} for spec in json_data.get('specifications', [])]
+
+    # Calculate the width of the widest label name and label detail
+    max_name_width = float('-inf')
+    max_detail_width = float('-inf')
+    for spec in legend_details:
+        max_name_width = max(max_name_width, text_layout(spec["name"]).width)
+        max_detail_width = max(max_detail_width, text_layout(spec["detail"]).width)
+
+    # baseline letter heigh calculations
+    heightcalc = get_text_bounding_box("R") # letters belwo the line (y, g, etc) mess up the calc when using lowercase. We are currenlty forcing uppercase.
+
+    return {
+        'title': title_text,
+        'subtitle': subtitle_text,
+        'legend_details': legend_details,
+        'max_name_width': max_name_width,
+        'max_detail_width': max_detail_width,
+        'letter_height': heightcalc['height'],
+        'title_width': get_text_bounding_box(title_text)['width'],
+        'subtitle_width': get_text_bounding_box(subtitle_text)['width'],
+        'title_path': text_path_data(title_text),
+        'subtitle_path': text_path_data(subtitle_text),
+        'legend_paths': [(text_path_data(spec["name"]), text_path_data(spec["detail"])) for spec in legend_details],
+    }
+
+
+def container(size, json_data, orientation, stream=None, precision=DEFAULT_PRECISION, text=None):
+    """
+    Write the blueprint template SVG to stream. If no stream is given the
+    SVG is returned as a string. Coordinates are rounded to precision
+    decimal places. text is the measure_text result of json_data, when
+    already computed for another variant.
+    """
+    if stream is None:
+        with io.StringIO() as buffer:
+            container(size, json_data, orientation, buffer, precision, text)
+            return buffer.getvalue()
+
+    if text is None:
+        text = measure_text(json_data)
+
+    svg = SVGWriter(stream, precision=precision)
 
     # Default to tabloid size if no size specified
     if not size:
@@ -104,126 +233,78 @@ def container(size, json_data, orientation):
     LEGEND_START_Y = BORDER_INSET + INTERNAL_PADDING
         
 
-    # Extract title, subtitle, and specifications from JSON data
-    title_text = json_data.get('title', '').upper()
-    subtitle_text = json_data.get('subtitle', '')
-    legend_details = [{'name': spec['label'], 'detail': spec['detail']} for spec in json_data.get('specifications', [])]
-    
     # Start SVG content with XML declaration and dimensions with viewBox
-    svg_content = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
-    svg_content += f'<svg width="{DOCUMENT_WIDTH}mm" height="{DOCUMENT_HEIGHT}mm" viewBox="0 0 {DOCUMENT_WIDTH} {DOCUMENT_HEIGHT}" xmlns="http://www.w3.org/2000/svg">\n'
+    svg.declaration()
+    svg.start('svg', width=f"{DOCUMENT_WIDTH}mm", height=f"{DOCUMENT_HEIGHT}mm", viewBox=f"0 0 {DOCUMENT_WIDTH} {DOCUMENT_HEIGHT}", xmlns="http://www.w3.org/2000/svg")
     
     # Add a group for border elements
-    svg_content += '  <g id="borders">\n'
-    svg_content += '    <title>Borders</title>\n'
-    
-    # Add a 1pt Border rectangle from the edges using a path element
-    svg_content += f'    <path d="M {BORDER_INSET} {BORDER_INSET} H {BORDER_INSET + BORDER_WIDTH} V {BORDER_INSET + BORDER_HEIGHT} H {BORDER_INSET} Z" fill="none" stroke="black" stroke-width="{BORDER_STROKE_WIDTH}" id="Border" />\n'
-    svg_content += f'    <path d="M {BORDER_INSET} {BORDER_INSET} V {BORDER_INSET + BORDER_HEIGHT} H {BORDER_INSET + BORDER_WIDTH} V {BORDER_INSET} Z" fill="none" stroke="black" stroke-width="{BORDER_STROKE_WIDTH}" id="ReversedBorder" />\n'
-    
-    # Close the group for border elements
-    svg_content += '  </g>\n'
-    
-    # Calculate the width of the widest label name and label detail
-    max_name_width = float('-inf')
-    max_detail_width = float('-inf')
-    for spec in legend_details:
-        # Calculate bounding box for name
-        min_x, max_x = float('inf'), float('-inf')
-        for line in thefont.lines_for_text(spec["name"]):
-            for x, y in line:
-                min_x = min(min_x, x)
-                max_x = max(max_x, x)
-        name_width = max_x - min_x
-        max_name_width = max(max_name_width, name_width)
-
-        # Calculate bounding box for detail
-        min_x, max_x = float('inf'), float('-inf')
-        for line in thefont.lines_for_text(spec["detail"]):
-            for x, y in line:
-                min_x = min(min_x, x)
-                max_x = max(max_x, x)
-        detail_width = max_x - min_x
-        max_detail_width = max(max_detail_width, detail_width)
+    with svg.group(id="borders"):
+        svg.title("Borders")
 
+        # Add a 1pt Border rectangle from the edges using a path element
+        svg.path(f"M {BORDER_INSET} {BORDER_INSET} H {BORDER_INSET + BORDER_WIDTH} V {BORDER_INSET + BORDER_HEIGHT} H {BORDER_INSET} Z", fill="none", stroke="black", stroke_width=BORDER_STROKE_WIDTH, id="Border")
+        svg.path(f"M {BORDER_INSET} {BORDER_INSET} V {BORDER_INSET + BORDER_HEIGHT} H {BORDER_INSET + BORDER_WIDTH} V {BORDER_INSET} Z", fill="none", stroke="black", stroke_width=BORDER_STROKE_WIDTH, id="ReversedBorder")
+    
     # Calculate the legend width based on the widest text with increased padding
-    name_column_width = max_name_width * LEGEND_TEXT_SCALE_FACTOR + LEGEND_PADDING  # Scale factor 0.1, plus 8 for padding
-    detail_column_width = max_detail_width * LEGEND_TEXT_SCALE_FACTOR + LEGEND_PADDING  # Scale factor 0.1, plus 8 for padding
+    name_column_width = text['max_name_width'] * LEGEND_TEXT_SCALE_FACTOR + LEGEND_PADDING  # Scale factor 0.1, plus 8 for padding
+    detail_column_width = text['max_detail_width'] * LEGEND_TEXT_SCALE_FACTOR + LEGEND_PADDING  # Scale factor 0.1, plus 8 for padding
     legend_width = name_column_width + detail_column_width
 
     # Recalculate legend dimensions
-    legend_height = len(legend_details) * LEGEND_CELL_HEIGHT  # Adjusted for dynamic number of rows
+    legend_height = len(text['legend_details']) * LEGEND_CELL_HEIGHT  # Adjusted for dynamic number of rows
 
     # Add 2 column legend outline with labels
-    svg_content += f'  <g id="legend" fill="none" stroke="black" stroke-width="{LEGEND_STROKE_WIDTH}">\n'
-    svg_content += f'    <title>Legend</title>\n'
-    svg_content += f'    <rect id="legend-border" x="{LEGEND_START_X}" y="{LEGEND_START_Y}" width="{legend_width}" height="{legend_height}" />\n'
-    
-    # Add vertical line for columns
-    svg_content += f'    <line id="legend-column-divider" x1="{LEGEND_START_X + name_column_width}" y1="{LEGEND_START_Y}" x2="{LEGEND_START_X + name_column_width}" y2="{LEGEND_START_Y + legend_height}" />\n'
-    
-    # Add horizontal lines for rows and text for specifications
-    for i, spec in enumerate(legend_details):
-        y = LEGEND_START_Y + i * LEGEND_CELL_HEIGHT
-        svg_content += f'    <line id="legend-row-divider-{i}" x1="{LEGEND_START_X}" y1="{y + LEGEND_CELL_HEIGHT}" x2="{LEGEND_START_X + legend_width}" y2="{y + LEGEND_CELL_HEIGHT}" />\n'
-        text_y = y + (LEGEND_CELL_HEIGHT / 2)  # Vertically center the text
-        
-        svg_content += f'    <g id="legend-label-{i}-name" transform="translate({LEGEND_START_X + 2}, {text_y}) scale({LEGEND_TEXT_SCALE_FACTOR})">\n'
-        for line in thefont.lines_for_text(spec["name"]):
-            path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-            svg_content += f'      <path d="{path_data}" fill="none" stroke="black" stroke-width="{TEXT_STROKE_WIDTH}" />\n'
-        svg_content += '    </g>\n'
-        
-        svg_content += f'    <g id="legend-label-{i}-detail" transform="translate({LEGEND_START_X + name_column_width + 2}, {text_y}) scale({LEGEND_TEXT_SCALE_FACTOR})">\n'
-        for line in thefont.lines_for_text(spec["detail"]):
-            path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-            svg_content += f'      <path d="{path_data}" fill="none" stroke="black" stroke-width="{TEXT_STROKE_WIDTH}" />\n'
-        svg_content += '    </g>\n'
+    with svg.group(id="legend", fill="none", stroke="black", stroke_width=LEGEND_STROKE_WIDTH):
+        svg.title("Legend")
+        svg.rect(id="legend-border", x=LEGEND_START_X, y=LEGEND_START_Y, width=legend_width, height=legend_height)
 
-    svg_content += '  </g>\n'
+        # Add vertical line for columns
+        svg.line(id="legend-column-divider", x1=LEGEND_START_X + name_column_width, y1=LEGEND_START_Y, x2=LEGEND_START_X + name_column_width, y2=LEGEND_START_Y + legend_height)
+
+        # Add horizontal lines for rows and text for specifications
+        for i, (name_path, detail_path) in enumerate(text['legend_paths']):
+            y = LEGEND_START_Y + i * LEGEND_CELL_HEIGHT
+            svg.line(id=f"legend-row-divider-{i}", x1=LEGEND_START_X, y1=y + LEGEND_CELL_HEIGHT, x2=LEGEND_START_X + legend_width, y2=y + LEGEND_CELL_HEIGHT)
+            text_y = y + (LEGEND_CELL_HEIGHT / 2)  # Vertically center the text
+
+            with svg.group(id=f"legend-label-{i}-name", transform=f"translate({svg.number(LEGEND_START_X + 2)}, {svg.number(text_y)}) scale({LEGEND_TEXT_SCALE_FACTOR})", stroke_width=TEXT_STROKE_WIDTH):
+                svg.path(name_path)
+
+            with svg.group(id=f"legend-label-{i}-detail", transform=f"translate({svg.number(LEGEND_START_X + name_column_width + 2)}, {svg.number(text_y)}) scale({LEGEND_TEXT_SCALE_FACTOR})", stroke_width=TEXT_STROKE_WIDTH):
+                svg.path(detail_path)
 
     
-    # baseline letter heigh calculations
-    heightcalc = get_text_bounding_box("R", thefont) # letters belwo the line (y, g, etc) mess up the calc when using lowercase. We are currenlty forcing uppercase.
-    title_height = heightcalc['height']
+    # baseline letter height, measured on capitals
+    title_height = text['letter_height']
 
     """
     Title
     """
-    title_box = get_text_bounding_box(title_text, thefont)
-    title_width = title_box['width']
+    title_width = text['title_width']
 
     title_translate_x = DOCUMENT_WIDTH - (title_width * TITLE_SCALE_FACTOR) - TITLE_RIGHT_MARGIN
     title_translate_y =  ((title_height / 2) * TITLE_SCALE_FACTOR) + BORDER_INSET + INTERNAL_PADDING
-    svg_content += f'  <g id="title" transform="translate({title_translate_x}, {title_translate_y}) scale({TITLE_SCALE_FACTOR})">\n'
-    svg_content += f'    <title>Title</title>\n'
-    for line in thefont.lines_for_text(title_text):
-        title_path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-        svg_content += f'    <path d="{title_path_data}" fill="none" stroke="black" stroke-width="{TITLE_STROKE_WIDTH}" />\n'
-    svg_content += '  </g>\n'
+    with svg.group(id="title", transform=f"translate({svg.number(title_translate_x)}, {svg.number(title_translate_y)}) scale({TITLE_SCALE_FACTOR})",
+                   fill="none", stroke="black", stroke_width=TITLE_STROKE_WIDTH):
+        svg.title("Title")
+        svg.path(text['title_path'])
     
     """
     Sub Title
     """
-    subtitle_box = get_text_bounding_box(subtitle_text, thefont)    
-    subtitle_width = subtitle_box['width']
+    subtitle_width = text['subtitle_width']
     subtitle_translate_x = DOCUMENT_WIDTH - (subtitle_width * SUBTITLE_SCALE_FACTOR) - SUBTITLE_RIGHT_MARGIN
     subtitle_translate_y = ((title_height / 2) * SUBTITLE_SCALE_FACTOR) + (title_height * TITLE_SCALE_FACTOR) + BORDER_INSET + INTERNAL_PADDING + INTERNAL_PADDING
-    svg_content += f'  <g id="subtitle" transform="translate({subtitle_translate_x}, {subtitle_translate_y}) scale({SUBTITLE_SCALE_FACTOR})">\n'
-    svg_content += f'    <title>Subtitle</title>\n'
-    for line in thefont.lines_for_text(subtitle_text):
-        path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-        svg_content += f'    <path d="{path_data}" fill="none" stroke="black" stroke-width="{TITLE_STROKE_WIDTH}" />\n'
-    svg_content += '  </g>\n'
+    with svg.group(id="subtitle", transform=f"translate({svg.number(subtitle_translate_x)}, {svg.number(subtitle_translate_y)}) scale({SUBTITLE_SCALE_FACTOR})",
+                   fill="none", stroke="black", stroke_width=TITLE_STROKE_WIDTH):
+        svg.title("Subtitle")
+        svg.path(text['subtitle_path'])
 
-    svg_content += f'  <g id="svg-content" transform="translate({subtitle_translate_x}, {subtitle_translate_y}) scale({SUBTITLE_SCALE_FACTOR})">\n'
-    svg_content += f'    <title>SVG Content</title>\n'
-    svg_content += '  </g>\n'
+    with svg.group(id="svg-content", transform=f"translate({svg.number(subtitle_translate_x)}, {svg.number(subtitle_translate_y)}) scale({SUBTITLE_SCALE_FACTOR})"):
+        svg.title("SVG Content")
 
     # Close the SVG tag
-    svg_content += '</svg>\n'
-
-    return svg_content
+    svg.end()
 
 
 # This function loads SVG data from a file and returns the SVG content as a string,
@@ -268,53 +349,9 @@ def load_svg_data(svg_file_path):
         svg_content = re.sub(r'<svg.*?>', '', svg_content)
         svg_content = re.sub(r'</svg>', '', svg_content)
 
-        print(width_value, height_value, units)
-
         return svg_content.strip(), width_value, height_value, units
 
     except Exception as e:
         print(f"Error reading SVG file: {e}")
         return None, None, None, None
 
-
-
-def get_text_bounding_box(text, thefont):
-    """
-    Calculate the bounding box of a given text using the specified font.
-
-    Args:
-        text (str): The text to calculate the bounding box for.
-        thefont (Font): The font object used to render the text.
-
-    Returns:
-        dict: A dictionary containing the bounding box information:
-            - 'min_x': Minimum x-coordinate
-            - 'max_x': Maximum x-coordinate
-            - 'min_y': Minimum y-coordinate
-            - 'max_y': Maximum y-coordinate
-            - 'width': Width of the bounding box
-            - 'height': Height of the bounding box
-    """
-    min_x, max_x = float('inf'), float('-inf')
-    min_y, max_y = float('inf'), float('-inf')
-    
-    for line in thefont.lines_for_text(text):
-        print(line)
-        for x, y in line:
-            print(x, y)
-            min_x = min(min_x, x)
-            max_x = max(max_x, x)
-            min_y = min(min_y, y)
-            max_y = max(max_y, y)
-    
-    width = max_x - min_x
-    height = max_y - min_y
-    
-    return {
-        'min_x': min_x,
-        'max_x': max_x,
-        'min_y': min_y,
-        'max_y': max_y,
-        'width': width,
-        'height': height
-    }
\ No newline at end of file
@@ -1,10 +1,13 @@
 import os
 import json
-from HersheyFonts import HersheyFonts
 import xml.etree.ElementTree as ET
 import re
+import io
+from .svg_writer import SVGWriter, DEFAULT_PRECISION
+from .text import text_layout, text_path_data
 from datetime import datetime
-from nextdraw import NextDraw   # Import the module
+from .plot_time import estimate_plot, estimate_plot_nextdraw
+from .profiling import log, span
 
 
 # Paper sizes in millimeters (width, height)
@@ -16,35 +19,58 @@ PAPER_SIZES = {
 }
 
 
-def blueprint_label(json_file_path, svg_file_path):
+def blueprint_label(json_file_path, svg_file_path, output_path=None, estimate='exact', precision=DEFAULT_PRECISION):
 
     # Load data from JSON file
     with open(json_file_path, 'r') as f:
         data = json.load(f)
 
-    # Determine which function to use based on size
-    svg_content = container(data, svg_file_path)
-    
     # Generate output file path
-    output_dir = os.getcwd()  # Current working directory
-    
-    # Create the new output filename
-    output_filename = "label.svg"
-    output_path = os.path.join(output_dir, output_filename)
+    if not output_path:
+        output_dir = os.getcwd()  # Current working directory
+
+        # Create the new output filename
+        output_filename = "label.svg"
+        output_path = os.path.join(output_dir, output_filename)
     
-    # Save SVG content to file
-    with open(output_path, 'w') as f:
-        f.write(svg_content)
+    # Estimate first, so a failed estimate doesn't leave an empty file behind
+    plot = plot_estimate(svg_file_path, estimate)
+
+    # Stream SVG content straight to the file
+    with span('serialize'), open(output_path, 'w') as f:
+        container(data, svg_file_path, f, estimate, precision, plot)
     
-    print(f"SVG template with Border, legend, title, subtitle saved to {output_path}")
+    log(f"SVG template with Border, legend, title, subtitle saved to {output_path}")
     
     return output_path
 
 
-def container(json_data, svg_file_path):
-    
-    thefont = HersheyFonts()
-    thefont.load_default_font('futural')
+def plot_estimate(svg_file_path, estimate='exact'):
+    """
+    Estimate the plot of svg_file_path (a path or a loaded Drawing) with a
+    NextDraw preview run (estimate='exact') or the experimental analytical
+    estimator (estimate='native').
+    """
+    if estimate == 'exact':
+        return estimate_plot_nextdraw(svg_file_path)
+    return estimate_plot(svg_file_path)
+
+
+def container(json_data, svg_file_path, stream=None, estimate='exact', precision=DEFAULT_PRECISION, plot=None):
+    """
+    Write the label SVG for svg_file_path (a path or a loaded Drawing) to
+    stream. If no stream is given the SVG is returned as a string.
+
+    The draw time and pen travel come from plot, or else from
+    plot_estimate(svg_file_path, estimate).
+    Coordinates are rounded to precision decimal places.
+    """
+    if stream is None:
+        with io.StringIO() as buffer:
+            container(json_data, svg_file_path, buffer, estimate, precision, plot)
+            return buffer.getvalue()
+
+    svg = SVGWriter(stream, precision=precision)
 
     # Default to tabloid size if no size specified
     
@@ -91,21 +117,13 @@ def container(json_data, svg_file_path):
     title_text = json_data.get('title', '').upper()
     subtitle_text = json_data.get('subtitle', '')
     combined_title = f"{title_text} - {subtitle_text}" if subtitle_text else title_text
-    print(combined_title)
+    log(combined_title)
 
     # Load the SVG file and extract the time estimate
-    nd1 = NextDraw()
-    nd1.plot_setup(svg_file_path)
-    nd1.options.preview = True
-    nd1.options.report_time = True
-    nd1.options.model = 9 ## https://bantam.tools/nd_py/#model
-    nd1.options.pen_rate_lower = 10
-    nd1.options.pen_rate_upper = 10
-    nd1.options.speed_pendown = 30
-    nd1.options.speed_penup = 50
-    nd1.plot_run()
-
-    time_estimate_seconds = nd1.time_estimate
+    if plot is None:
+        plot = plot_estimate(svg_file_path, estimate)
+
+    time_estimate_seconds = plot['time_estimate']
     hours, remainder = divmod(time_estimate_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     if hours > 0:
@@ -114,7 +132,7 @@ def container(json_data, svg_file_path):
         time_estimate = f"{int(minutes)}m {int(seconds)}s"
 
     # Convert pen travel distance from meters to feet
-    distance_pendown_m = nd1.distance_pendown
+    distance_pendown_m = plot['distance_pendown']
     distance_pendown_ft = distance_pendown_m * 3.28084
 
     legend_details = [
@@ -128,30 +146,15 @@ def container(json_data, svg_file_path):
     
 
     # Start SVG content with XML declaration and dimensions with viewBox
-    svg_content = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
-    svg_content += f'<svg width="{DOCUMENT_WIDTH}mm" height="{DOCUMENT_HEIGHT}mm" viewBox="0 0 {DOCUMENT_WIDTH} {DOCUMENT_HEIGHT}" xmlns="http://www.w3.org/2000/svg">\n'
+    svg.declaration()
+    svg.start('svg', width=f"{DOCUMENT_WIDTH}mm", height=f"{DOCUMENT_HEIGHT}mm", viewBox=f"0 0 {DOCUMENT_WIDTH} {DOCUMENT_HEIGHT}", xmlns="http://www.w3.org/2000/svg")
         
     # Calculate the width of the widest label name and label detail
     max_name_width = float('-inf')
     max_detail_width = float('-inf')
     for spec in legend_details:
-        # Calculate bounding box for name
-        min_x, max_x = float('inf'), float('-inf')
-        for line in thefont.lines_for_text(spec["name"]):
-            for x, y in line:
-                min_x = min(min_x, x)
-                max_x = max(max_x, x)
-        name_width = max_x - min_x
-        max_name_width = max(max_name_width, name_width)
-
-        # Calculate bounding box for detail
-        min_x, max_x = float('inf'), float('-inf')
-        for line in thefont.lines_for_text(spec["detail"]):
-            for x, y in line:
-                min_x = min(min_x, x)
-                max_x = max(max_x, x)
-        detail_width = max_x - min_x
-        max_detail_width = max(max_detail_width, detail_width)
+        max_name_width = max(max_name_width, text_layout(spec["name"]).width)
+        max_detail_width = max(max_detail_width, text_layout(spec["detail"]).width)
 
     # Calculate the legend width based on the widest text with increased padding
     name_column_width = max_name_width * LEGEND_TEXT_SCALE_FACTOR + LEGEND_PADDING  # Scale factor 0.1, plus 8 for padding
@@ -162,36 +165,24 @@ def container(json_data, svg_file_path):
     legend_height = len(legend_details) * LEGEND_CELL_HEIGHT  # Adjusted for dynamic number of rows
 
     # Add 2 column legend outline with labels
-    svg_content += f'  <g id="legend" fill="none" stroke="black" stroke-width="{LEGEND_STROKE_WIDTH}">\n'
-    svg_content += f'    <title>Legend</title>\n'
-    svg_content += f'    <rect id="legend-border" x="{LEGEND_START_X}" y="{LEGEND_START_Y}" width="{legend_width}" height="{legend_height}" />\n'
-    
-    # Add vertical line for columns
-    svg_content += f'    <line id="legend-column-divider" x1="{LEGEND_START_X + name_column_width}" y1="{LEGEND_START_Y}" x2="{LEGEND_START_X + name_column_width}" y2="{LEGEND_START_Y + legend_height}" />\n'
-    
-    # Add horizontal lines for rows and text for specifications
-    for i, spec in enumerate(legend_details):
-        y = LEGEND_START_Y + i * LEGEND_CELL_HEIGHT
-        svg_content += f'    <line id="legend-row-divider-{i}" x1="{LEGEND_START_X}" y1="{y + LEGEND_CELL_HEIGHT}" x2="{LEGEND_START_X + legend_width}" y2="{y + LEGEND_CELL_HEIGHT}" />\n'
-        text_y = y + (LEGEND_CELL_HEIGHT / 2)  # Vertically center the text
-        
-        svg_content += f'    <g id="legend-label-{i}-name" transform="translate({LEGEND_START_X + 2}, {text_y}) scale({LEGEND_TEXT_SCALE_FACTOR})">\n'
-        for line in thefont.lines_for_text(spec["name"]):
-            path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-            svg_content += f'      <path d="{path_data}" fill="none" stroke="black" stroke-width="{TEXT_STROKE_WIDTH}" />\n'
-        svg_content += '    </g>\n'
-        
-        svg_content += f'    <g id="legend-label-{i}-detail" transform="translate({LEGEND_START_X + name_column_width + 2}, {text_y}) scale({LEGEND_TEXT_SCALE_FACTOR})">\n'
-        for line in thefont.lines_for_text(spec["detail"]):
-            path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-            svg_content += f'      <path d="{path_data}" fill="none" stroke="black" stroke-width="{TEXT_STROKE_WIDTH}" />\n'
-        svg_content += '    </g>\n'
+    with svg.group(id="legend", fill="none", stroke="black", stroke_width=LEGEND_STROKE_WIDTH):
+        svg.title("Legend")
+        svg.rect(id="legend-border", x=LEGEND_START_X, y=LEGEND_START_Y, width=legend_width, height=legend_height)
 
-    svg_content += '  </g>\n'
+        # Add vertical line for columns
+        svg.line(id="legend-column-divider", x1=LEGEND_START_X + name_column_width, y1=LEGEND_START_Y, x2=LEGEND_START_X + name_column_width, y2=LEGEND_START_Y + legend_height)
 
-    # Close the SVG tag
-    svg_content += '</svg>\n'
+        # Add horizontal lines for rows and text for specifications
+        for i, spec in enumerate(legend_details):
+            y = LEGEND_START_Y + i * LEGEND_CELL_HEIGHT
+            svg.line(id=f"legend-row-divider-{i}", x1=LEGEND_START_X, y1=y + LEGEND_CELL_HEIGHT, x2=LEGEND_START_X + legend_width, y2=y + LEGEND_CELL_HEIGHT)
+            text_y = y + (LEGEND_CELL_HEIGHT / 2)  # Vertically center the text
 
-    
+            with svg.group(id=f"legend-label-{i}-name", transform=f"translate({svg.number(LEGEND_START_X + 2)}, {svg.number(text_y)}) scale({LEGEND_TEXT_SCALE_FACTOR})", stroke_width=TEXT_STROKE_WIDTH):
+                svg.path(text_path_data(spec["name"]))
 
-    return svg_content
\ No newline at end of file
+            with svg.group(id=f"legend-label-{i}-detail", transform=f"translate({svg.number(LEGEND_START_X + name_column_width + 2)}, {svg.number(text_y)}) scale({LEGEND_TEXT_SCALE_FACTOR})", stroke_width=TEXT_STROKE_WIDTH):
+                svg.path(text_path_data(spec["detail"]))
+
+    # Close the SVG tag
+    svg.end()
@@ -0,0 +1,332 @@
+import os
+import json
+import shutil
+import hashlib
+from datetime import date
+
+# Default cache location and size limit
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'drawscape')
+DEFAULT_CACHE_SIZE_MB = 1024
+
+# Arguments naming input files, hashed by content instead of by path
+INPUT_ARGUMENTS = ['image', 'json', 'svg']
+
+# Cache options of the running command, applied by configure() to caches
+# used from inside actions (such as the geometry cache)
+_settings = {'enabled': True, 'directory': None, 'max_size_mb': None}
+
+# Arguments that don't change an action's output
+IGNORED_ARGUMENTS = {'action', 'output', 'manifest', 'batch_action', 'workers', 'report',
+                     'no_cache', 'cache_dir', 'cache_size', 'profile', 'profile_stats', 'quiet',
+                     'host', 'port', 'socket'}
+
+
+def tool_version():
+    """
+    Version of the installed drawscape package, part of every cache key.
+    """
+    try:
+        from importlib.metadata import version
+        return version('drawscape')
+    except Exception:
+        return 'unknown'
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def configure(args):
+    """
+    Apply a command's --no-cache, --cache-dir and --cache-size options to
+    the caches actions use internally, see shared_cache.
+    """
+    _settings['enabled'] = not getattr(args, 'no_cache', False)
+    _settings['directory'] = getattr(args, 'cache_dir', None)
+    _settings['max_size_mb'] = getattr(args, 'cache_size', None)
+
+
+def shared_cache():
+    """
+    Get the cache configured for the running command, or None if caching is
+    disabled or the cache directory can't be created.
+    """
+    if not _settings['enabled']:
+        return None
+    try:
+        return ResultCache(_settings['directory'], _settings['max_size_mb'])
+    except OSError:
+        return None
+
+
+class ResultCache:
+    """
+    Content-addressed cache of action outputs.
+
+    Entries are keyed by the content hash of the action's input files, the
+    action, its options and the drawscape version, and hold copies of the
+    files the action wrote. Output paths are stored relative to the input,
+    --output or the working directory, so a hit recreates the files where the
+    action would have written them. The least recently used entries are
+    evicted once the cache grows beyond its size limit.
+    """
+
+    def __init__(self, directory=None, max_size_mb=None):
+        self.directory = os.path.expanduser(directory or os.getenv('DRAWSCAPE_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self.max_bytes = int((max_size_mb or DEFAULT_CACHE_SIZE_MB) * 1024 * 1024)
+        self.objects = os.path.join(self.directory, 'objects')
+        os.makedirs(self.objects, exist_ok=True)
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(getattr(args, 'cache_dir', None), getattr(args, 'cache_size', None))
+
+    def key(self, action, args):
+        """
+        Compute the cache key of running action with args.
+        """
+        options = {}
+        for name, value in sorted(vars(args).items()):
+            if name in IGNORED_ARGUMENTS:
+                continue
+            if name in INPUT_ARGUMENTS:
+                value = file_digest(value) if value and os.path.isfile(value) else value
+            options[name] = value
+        # Outputs go to default names, next to --output, or wherever a
+        # template such as "out/{size}.svg" puts them
+        output = getattr(args, 'output', None)
+        options['output'] = (output if '{' in output else True) if output else None
+        if action == 'blueprint-label' or 'blueprint-label' in (getattr(args, 'stages', None) or ''):
+            # Labels print today's date
+            options['date'] = date.today().isoformat()
+        payload = json.dumps([tool_version(), action, options], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def geometry_key(self, svg_file_path, tolerance):
+        """
+        Compute the key of the flattened geometry of an SVG file.
+        """
+        payload = json.dumps([tool_version(), 'geometry', file_digest(svg_file_path), tolerance])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.objects, key[:2], key)
+
+    @staticmethod
+    def _context(action_input, args):
+        context = {'cwd': os.getcwd()}
+        if action_input:
+            context['input_base'] = os.path.splitext(os.path.abspath(action_input))[0]
+        if getattr(args, 'output', None):
+            context['output'] = os.path.abspath(args.output)
+            context['output_base'] = os.path.splitext(context['output'])[0]
+        return context
+
+    @staticmethod
+    def _template(path, context):
+        # Express an output path relative to what determined it
+        path = os.path.abspath(path)
+        if path == context.get('output'):
+            return '{output}'
+        for name in ['output_base', 'input_base']:
+            base = context.get(name)
+            if base and path.startswith(base):
+                return '{' + name + '}' + path[len(base):]
+        if path.startswith(context['cwd'] + os.sep):
+            return '{cwd}' + path[len(context['cwd']):]
+        return path
+
+    def get(self, key, action_input, args):
+        """
+        Restore the outputs of a cached run.
+
+        Returns:
+            The action's original return value with paths rewritten for the
+            current inputs, or None on a miss.
+        """
+        entry = self._entry(key)
+        meta_path = os.path.join(entry, 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            context = self._context(action_input, args)
+            outputs = [template.format(**context) for template in meta['outputs']]
+        except (OSError, ValueError, KeyError):
+            self._record('misses')
+            return None
+
+        for i, output in enumerate(outputs):
+            output_dir = os.path.dirname(output)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            shutil.copyfile(os.path.join(entry, str(i)), output)
+
+        # Mark as recently used
+        os.utime(meta_path)
+        self._record('hits')
+        return outputs[0] if meta['single'] else tuple(outputs)
+
+    def put(self, key, result, action_input, args):
+        """
+        Store the output file(s) an action returned.
+        """
+        outputs = [result] if isinstance(result, str) else list(result)
+        if not outputs or not all(isinstance(p, str) and os.path.isfile(p) for p in outputs):
+            return
+
+        context = self._context(action_input, args)
+        entry = self._entry(key)
+        staging = f"{entry}.{os.getpid()}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        size = 0
+        for i, output in enumerate(outputs):
+            shutil.copyfile(output, os.path.join(staging, str(i)))
+            size += os.path.getsize(output)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({
+                'outputs': [self._template(p, context) for p in outputs],
+                'single': isinstance(result, str),
+                'size': size,
+            }, f)
+
+        # Publish atomically; a concurrent writer may have stored it first
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.evict()
+
+    def get_arrays(self, key):
+        """
+        Open stored NumPy arrays memory-mapped and read-only.
+
+        Returns:
+            tuple: (arrays, info) with arrays keyed by name and the info
+            dict they were stored with, or None on a miss.
+        """
+        import numpy as np
+
+        entry = self._entry(key)
+        meta_path = os.path.join(entry, 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r') for name in meta['arrays']}
+        except (OSError, ValueError, KeyError):
+            self._record('geometry_misses')
+            return None
+
+        os.utime(meta_path)
+        self._record('geometry_hits')
+        return arrays, meta['info']
+
+    def put_arrays(self, key, arrays, info):
+        """
+        Store NumPy arrays as raw .npy files that get_arrays can map
+        straight into memory, along with a JSON serializable info dict.
+        """
+        import numpy as np
+
+        entry = self._entry(key)
+        staging = f"{entry}.{os.getpid()}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        size = 0
+        for name, array in arrays.items():
+            path = os.path.join(staging, f'{name}.npy')
+            np.save(path, np.ascontiguousarray(array))
+            size += os.path.getsize(path)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({'arrays': list(arrays), 'info': info, 'size': size}, f)
+
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.evict()
+
+    def entries(self):
+        """
+        List (last used, size, path) for every cache entry.
+        """
+        entries = []
+        for prefix in os.listdir(self.objects):
+            prefix_dir = os.path.join(self.objects, prefix)
+            for name in os.listdir(prefix_dir):
+                meta_path = os.path.join(prefix_dir, name, 'meta.json')
+                try:
+                    with open(meta_path, 'r') as f:
+                        size = json.load(f)['size']
+                    entries.append((os.path.getmtime(meta_path), size, os.path.join(prefix_dir, name)))
+                except (OSError, ValueError, KeyError):
+                    continue
+        return entries
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits its size limit.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def _record(self, counter):
+        # Best effort hit/miss counters shared by all processes
+        stats_path = os.path.join(self.directory, 'stats.json')
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        try:
+            with open(stats_path, 'a+') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                content = f.read()
+                stats = json.loads(content) if content else {}
+                stats[counter] = stats.get(counter, 0) + 1
+                f.seek(0)
+                f.truncate()
+                json.dump(stats, f)
+        except (OSError, ValueError):
+            pass
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: 'entries', 'size' in bytes, 'max_size' in bytes, 'hits',
+            'misses' and 'hit_rate' of action results, and 'geometry_hits'
+            and 'geometry_misses' of the geometry cache.
+        """
+        try:
+            with open(os.path.join(self.directory, 'stats.json'), 'r') as f:
+                counters = json.load(f)
+        except (OSError, ValueError):
+            counters = {}
+        entries = self.entries()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            'entries': len(entries),
+            'size': sum(size for _, size, _ in entries),
+            'max_size': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'geometry_hits': counters.get('geometry_hits', 0),
+            'geometry_misses': counters.get('geometry_misses', 0),
+        }
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.objects, exist_ok=True)
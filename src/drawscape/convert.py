@@ -1,72 +1,278 @@
 import os
+import re
+import shutil
 import xml.etree.ElementTree as ET
+from .svg_path import NUMBER, NUMBER_RE, COMMAND_RE, ARC_RE, TRANSFORM_RE, length_to_mm
+from .profiling import log, span
 
-def convert_svg(input_svg_path):
-    print(f"Converting SVG file: {input_svg_path}")
+# Pixels to millimeters, assuming 96 DPI
+PX_TO_MM = 0.26458333
+
+# Conversion modes: rewrite every coordinate, or only the root element
+CONVERT_MODES = ['rewrite', 'viewbox']
+
+# Attributes holding a single length in user units
+LENGTH_ATTRIBUTES = {'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'width', 'height', 'stroke-width'}
+
+# Transform arguments that are lengths; rotation angles, scale factors and
+# the linear part of matrix() are kept as written
+TRANSFORM_LENGTHS = {
+    'matrix': (False, False, False, False, True, True),
+    'translate': (True, True),
+    'rotate': (False, True, True),
+}
+
+# Relative path commands: their numbers are steps from the previous point,
+# so rounding errors add up along the path. They keep more decimals so the
+# drift stays far below a plotter's resolution.
+RELATIVE_COMMAND_RE = re.compile(r'[mlhvcsqta]')
+RELATIVE_PLACEHOLDER = '%.5f'
+
+# Splits text into separators and the numbers between them
+NUMBER_SPLIT_RE = re.compile(f'({NUMBER})')
+PLAIN_NUMBER_RE = re.compile(rf'\s*{NUMBER}\s*$')
+
+# Opening tag of the root element and a single attribute within it
+ROOT_TAG_RE = re.compile(rb'<svg\b[^>]*>')
+ATTRIBUTE_RE = r'(\s{name}\s*=\s*)(["\'])(.*?)\2'
+
+
+def _numbers_template(values, lengths):
+    # Format template for a list of number strings: lengths become
+    # placeholders, everything else is kept verbatim
+    parts, numbers = [], []
+    for value, is_length in zip(values, lengths):
+        if is_length:
+            parts.append('%.3f')
+            numbers.append(value)
+        else:
+            parts.append(value)
+    return parts, numbers
+
+
+def numbers_template(text, placeholder='%.3f'):
+    """
+    Replace every number in text with a placeholder ('%.3f'), keeping the
+    separators as written. Numbers packed without a separator ("1.5.5",
+    "5+3") get a space so the formatted values stay apart.
+
+    Returns:
+        tuple: (template, numbers) where numbers are strings, one per
+        placeholder in template.
+    """
+    parts = NUMBER_SPLIT_RE.split(text.replace('%', '%%'))
+    separators = parts[0::2]
+    inner = [separator or ' ' for separator in separators[1:-1]]
+    return placeholder.join([separators[0], *inner, separators[-1]]) if len(separators) > 1 else separators[0], parts[1::2]
+
+
+def path_template(d, placeholder='%.3f'):
+    """
+    Split path data into a format template and the numbers to fill it with.
+    Every number is tokenized properly (commas, packed signs, exponents,
+    packed arc flags) and only lengths get a placeholder: arc rotations and
+    flags are copied as written.
+
+    Returns:
+        tuple: (template, numbers), see numbers_template.
+    """
+    if 'A' not in d and 'a' not in d:
+        # Without arcs every number is a coordinate
+        return numbers_template(d, placeholder)
+
+    parts = COMMAND_RE.split(d)
+    template, numbers = [parts[0].replace('%', '%%')], []
+    for command, args in zip(parts[1::2], parts[2::2]):
+        if command in 'Aa':
+            segments = []
+            for rx, ry, angle, large_arc, sweep, x, y in ARC_RE.findall(args):
+                segments.append(f'{placeholder} {placeholder} {angle} {large_arc} {sweep} {placeholder} {placeholder}')
+                numbers.extend((rx, ry, x, y))
+            template.append(command + ' '.join(segments))
+        else:
+            command_template, command_numbers = numbers_template(args, placeholder)
+            template.append(command + command_template)
+            numbers.extend(command_numbers)
+    return ''.join(template), numbers
+
+
+def transform_template(transform):
+    """
+    Format template and numbers for a transform attribute, where only
+    translations (and rotation centers) are lengths.
+    """
+    template, numbers = [], []
+    for name, args in TRANSFORM_RE.findall(transform):
+        values = NUMBER_RE.findall(args)
+        lengths = TRANSFORM_LENGTHS.get(name, (False,) * len(values))
+        parts, transform_numbers = _numbers_template(values, lengths)
+        template.append(f"{name}({' '.join(parts)})")
+        numbers.extend(transform_numbers)
+    return ' '.join(template), numbers
+
+
+def rewrite_coordinates(root, scale):
+    """
+    Scale every length below the root element in bulk. Attributes whose
+    numbers are all lengths are tokenized together in a single pass, all
+    numbers of the document are converted and scaled with one NumPy
+    operation, and the results are formatted back in one go.
+    """
+    import numpy as np
+
+    # Attributes where every number is a length, as (element, attribute, text)
+    lengths = []
+    # Attributes with other numbers too, as (element, attribute, template, numbers)
+    mixed = []
+
+    for elem in root.iter():
+        if elem is root:
+            continue
+        for attr, value in elem.attrib.items():
+            # Lengths with units or percentages aren't user units
+            if attr in LENGTH_ATTRIBUTES and PLAIN_NUMBER_RE.match(value):
+                lengths.append((elem, attr, value))
+        tag = elem.tag.rsplit('}', 1)[-1] if isinstance(elem.tag, str) else ''
+        d = elem.get('d') if tag == 'path' else None
+        if d is not None:
+            relative = RELATIVE_COMMAND_RE.search(d)
+            if 'A' in d or 'a' in d:
+                mixed.append((elem, 'd', *(path_template(d, RELATIVE_PLACEHOLDER) if relative else path_template(d))))
+            elif relative:
+                mixed.append((elem, 'd', *numbers_template(d, RELATIVE_PLACEHOLDER)))
+            else:
+                lengths.append((elem, 'd', d))
+        if tag in ('polygon', 'polyline') and 'points' in elem.attrib:
+            lengths.append((elem, 'points', elem.get('points')))
+        if 'transform' in elem.attrib:
+            mixed.append((elem, 'transform', *transform_template(elem.get('transform'))))
+
+    if not lengths and not mixed:
+        return
+
+    # NUL can't occur in XML, so it safely separates attribute values
+    template, numbers = numbers_template('\0'.join(text for _, _, text in lengths)) if lengths else ('', [])
+    templates = [template] if lengths else []
+    for _, _, mixed_template, mixed_numbers in mixed:
+        templates.append(mixed_template)
+        numbers.extend(mixed_numbers)
+
+    scaled = (np.array(numbers, dtype=float) * scale).tolist()
+    values = ('\0'.join(templates) % tuple(scaled)).split('\0')
+    for (elem, attr, *_), value in zip(lengths + mixed, values):
+        elem.set(attr, value)
+
+
+def convert_svg(input_svg_path, output_path=None, mode='rewrite'):
+    """
+    Convert an SVG drawn in pixels to millimeters.
+
+    Args:
+        input_svg_path (str): Path to the input SVG file
+        output_path (str): Path to write the converted SVG to (optional)
+        mode (str): 'rewrite' scales every coordinate so user units become
+            millimeters; 'viewbox' only rewrites the root's width and height
+            (adding a viewBox if needed), which renders identically and
+            copies the rest of the file untouched
+
+    Returns:
+        str: Path to the converted SVG file
+    """
+    log(f"Converting SVG file: {input_svg_path}")
+
+    if mode not in CONVERT_MODES:
+        raise ValueError(f"Unknown convert mode {mode!r}, expected one of {', '.join(CONVERT_MODES)}")
+
+    # Generate output file path
+    if not output_path:
+        output_dir = os.path.dirname(input_svg_path)
+        output_filename = os.path.splitext(os.path.basename(input_svg_path))[0] + "_converted.svg"
+        output_path = os.path.join(output_dir, output_filename)
+
+    if mode == 'viewbox':
+        with span('io'):
+            convert_root(input_svg_path, output_path)
+        log(f"Converted SVG saved to {output_path}")
+        return output_path
+
+    from .svg_writer import SVG_NAMESPACE
+
+    # Keep the SVG namespace as the default one when writing
+    ET.register_namespace('', SVG_NAMESPACE)
+    ET.register_namespace('xlink', 'http://www.w3.org/1999/xlink')
 
     # Parse the SVG file
-    tree = ET.parse(input_svg_path)
+    with span('parse'):
+        tree = ET.parse(input_svg_path)
     root = tree.getroot()
 
-    # Function to convert pixels to mm (assuming 96 DPI)
-    def px_to_mm(px):
-        return float(px) * 0.26458333
-
-    # Handle SVG element manually
+    # Without a viewBox user units are pixels; keep the drawing's size by
+    # mapping the converted coordinates onto the same physical size
+    width_mm, height_mm = length_to_mm(root.get('width')), length_to_mm(root.get('height'))
     if 'viewBox' in root.attrib:
-        viewBox = root.attrib['viewBox'].split()
-        viewBox = [f"{px_to_mm(float(val)):.3f}" for val in viewBox]
-        root.attrib['viewBox'] = ' '.join(viewBox)
+        viewBox = NUMBER_RE.findall(root.attrib['viewBox'])
+        root.attrib['viewBox'] = ' '.join(f"{float(val) * PX_TO_MM:.3f}" for val in viewBox)
+    elif width_mm is not None and height_mm is not None:
+        root.attrib['viewBox'] = f"0 0 {width_mm:.3f} {height_mm:.3f}"
 
-    for attr in ['width', 'height']:
-        if attr in root.attrib:
-            root.attrib[attr] = f"{px_to_mm(float(root.attrib[attr].rstrip('px'))):.3f}mm"
+    for attr, value_mm in [('width', width_mm), ('height', height_mm)]:
+        if value_mm is not None:
+            root.attrib[attr] = f"{value_mm:.3f}mm"
 
     # Preserve enable-background attribute if present
     if 'enable-background' in root.attrib:
         enable_background = root.attrib['enable-background'].split()
         if len(enable_background) > 1:
-            enable_background = ['new'] + [f"{px_to_mm(float(val)):.3f}" for val in enable_background[1:]]
+            enable_background = ['new'] + [f"{float(val) * PX_TO_MM:.3f}" for val in enable_background[1:]]
             root.attrib['enable-background'] = ' '.join(enable_background)
 
     # Convert all coordinate and size values for child elements
-    for elem in root.iter():
-        if elem != root:  # Skip the root SVG element
-            for attr in ['x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'width', 'height']:
-                if attr in elem.attrib:
-                    elem.attrib[attr] = f"{px_to_mm(float(elem.attrib[attr])):.3f}"
-            
-            # Convert stroke-width
-            if 'stroke-width' in elem.attrib:
-                elem.attrib['stroke-width'] = f"{px_to_mm(float(elem.attrib['stroke-width'])):.3f}"
-
-            # Convert path data
-            if elem.tag.endswith('path') and 'd' in elem.attrib:
-                d = elem.attrib['d']
-                new_d = []
-                for cmd in d.split():
-                    try:
-                        new_d.append(f"{px_to_mm(float(cmd)):.3f}")
-                    except ValueError:
-                        new_d.append(cmd)
-                elem.attrib['d'] = ' '.join(new_d)
-
-            # Convert polygon and polyline points
-            if elem.tag.endswith(('polygon', 'polyline')) and 'points' in elem.attrib:
-                points = elem.attrib['points'].split()
-                new_points = []
-                for point in points:
-                    x, y = point.split(',')
-                    new_points.append(f"{px_to_mm(float(x)):.3f},{px_to_mm(float(y)):.3f}")
-                elem.attrib['points'] = ' '.join(new_points)
-
-    # Generate output file path
-    output_dir = os.path.dirname(input_svg_path)
-    output_filename = os.path.splitext(os.path.basename(input_svg_path))[0] + "_converted.svg"
-    output_path = os.path.join(output_dir, output_filename)
+    with span('compute'):
+        rewrite_coordinates(root, PX_TO_MM)
 
     # Write the modified SVG to the output file
-    tree.write(output_path, encoding='utf-8', xml_declaration=True)
+    with span('serialize'):
+        tree.write(output_path, encoding='utf-8', xml_declaration=True)
+
+    log(f"Converted SVG saved to {output_path}")
+    return output_path
+
+
+def convert_root(input_svg_path, output_path):
+    """
+    Convert an SVG to millimeters by rewriting only the root element's width
+    and height. The existing viewBox (or one covering the original pixel
+    size) maps the untouched coordinates onto the new size, so the rest of
+    the file is copied byte for byte without being parsed.
+    """
+    with open(input_svg_path, 'rb') as source, open(output_path, 'wb') as target:
+        # Read until the whole root opening tag is in the buffer
+        head = b''
+        while True:
+            chunk = source.read(1 << 16)
+            head += chunk
+            match = ROOT_TAG_RE.search(head)
+            if match or not chunk:
+                break
+        if not match:
+            raise ValueError(f"No <svg> element found in {input_svg_path}")
+
+        tag = match.group(0).decode('utf-8')
+
+        def get(name):
+            found = re.search(ATTRIBUTE_RE.format(name=name), tag)
+            return found.group(3) if found else None
+
+        width, height, viewBox = get('width'), get('height'), get('viewBox')
+        width_mm, height_mm = length_to_mm(width), length_to_mm(height)
+        if viewBox is None and width_mm is not None and height_mm is not None:
+            # User units were pixels of the original size
+            width_px, height_px = (float(NUMBER_RE.match(v.strip()).group(0)) for v in (width, height))
+            end = -2 if tag.endswith('/>') else -1
+            tag = f'{tag[:end]} viewBox="0 0 {width_px:g} {height_px:g}"{tag[end:]}'
+        for name, value_mm in [('width', width_mm), ('height', height_mm)]:
+            if value_mm is not None:
+                tag = re.sub(ATTRIBUTE_RE.format(name=name), rf'\g<1>\g<2>{value_mm:.3f}mm\g<2>', tag, count=1)
 
-    print(f"Converted SVG saved to {output_path}")
-    return output_path
\ No newline at end of file
+        target.write(head[:match.start()] + tag.encode('utf-8') + head[match.end():])
+        shutil.copyfileobj(source, target)
@@ -1,13 +1,25 @@
 import os
 import xml.etree.ElementTree as ET
 import re
+from collections import Counter
+from .profiling import span
 
-def parse_svg_file(svg_file_path):
+# Subpaths buffered while streaming before their bounds and length are
+# folded into the running totals
+STREAM_BATCH = 1000
+
+def parse_svg_file(svg_file_path, include_content=False):
     """
     Parse an SVG file and extract its details.
 
+    The file is streamed with iterparse: every element is measured and then
+    discarded as soon as its end tag is read, so memory stays bounded by the
+    largest element instead of growing with the file. The content string is
+    only built when include_content is set.
+
     Args:
         svg_file_path (str): Path to the SVG file.
+        include_content (bool): Also return the SVG content as a string.
 
     Returns:
         dict: A dictionary containing the SVG details:
@@ -15,80 +27,185 @@ def parse_svg_file(svg_file_path):
             - 'height': Height of the SVG
             - 'viewBox': ViewBox of the SVG
             - 'bounding_box': Bounding box of the SVG content
-            - 'content': SVG content as a string (excluding outer <svg> tag)
+            - 'element_counts': Number of elements per tag (excluding the outer <svg> tag)
+            - 'path_length': Total length of all drawn shapes in user units
+            - 'content': SVG content as a string (excluding outer <svg> tag),
+              or None unless include_content is set
     """
     if not svg_file_path:
         print("Error: No SVG file path specified")
         return None
 
     svg_file_path = os.path.expanduser(svg_file_path)
-    
+
     if not os.path.exists(svg_file_path):
         print(f"Error: SVG file not found at {svg_file_path}")
         return None
 
     try:
-        tree = ET.parse(svg_file_path)
-        root = tree.getroot()
-
-        # Remove the default namespace if present
-        ns = re.match(r'\{.*\}', root.tag)
-        if ns:
-            ns = ns.group(0)
-            for elem in root.iter():
-                elem.tag = elem.tag.replace(ns, '')
-
-        # Extract width and height
-        width = root.get('width', '0')
-        height = root.get('height', '0')
-
-        # Convert width and height to float, removing any units
-        width_value = float(re.sub(r'[^0-9.]', '', width))
-        height_value = float(re.sub(r'[^0-9.]', '', height))
-
-        # Convert all units to mm
-        if 'cm' in width.lower():
-            width_value *= 10  # Convert cm to mm
-        elif 'in' in width.lower():
-            width_value *= 25.4  # Convert inches to mm
-        elif 'px' in width.lower():
-            width_value /= 3.7795275591  # Convert pixels to mm (96 DPI)
-
-        if 'cm' in height.lower():
-            height_value *= 10  # Convert cm to mm
-        elif 'in' in height.lower():
-            height_value *= 25.4  # Convert inches to mm
-        elif 'px' in height.lower():
-            height_value /= 3.7795275591  # Convert pixels to mm (96 DPI)
-
-        # Round to 2 decimal places for practical use
-        width_value = round(width_value, 2)
-        height_value = round(height_value, 2)
+        with span('parse'):
+            root, counts, bounds, path_length, content = stream_svg(svg_file_path, include_content)
+
+        # Extract width and height, converted to mm and rounded to 2 decimal
+        # places for practical use
+        width_value = round(dimension_to_mm(root.get('width', '0')), 2)
+        height_value = round(dimension_to_mm(root.get('height', '0')), 2)
 
         # Extract viewBox
         viewBox = root.get('viewBox')
 
-        # Calculate bounding box
-        bounding_box = calculate_bounding_box(root)
-
-        # Get SVG content (excluding outer <svg> tag)
-        svg_content = ''.join(ET.tostring(child, encoding='unicode') for child in root)
-
         return {
             'width': width_value,
             'height': height_value,
             'viewBox': viewBox,
-            'bounding_box': bounding_box,
-            'content': svg_content.strip()
+            'bounding_box': bounding_box_dict(bounds),
+            'element_counts': dict(counts),
+            'path_length': path_length,
+            'content': content.strip() if content is not None else None
         }
 
     except ET.ParseError as e:
         print(f"Error parsing SVG file: {e}")
         return None
 
+def dimension_to_mm(value):
+    """
+    Convert an SVG width or height to mm. Unitless values are taken as mm.
+    """
+    # Convert to float, removing any units
+    number = float(re.sub(r'[^0-9.]', '', value))
+
+    # Convert all units to mm
+    if 'cm' in value.lower():
+        number *= 10  # Convert cm to mm
+    elif 'in' in value.lower():
+        number *= 25.4  # Convert inches to mm
+    elif 'px' in value.lower():
+        number /= 3.7795275591  # Convert pixels to mm (96 DPI)
+    return number
+
+def stream_svg(svg_file_path, include_content=False):
+    """
+    Measure an SVG file in a single iterparse pass.
+
+    Returns:
+        tuple: (root, element_counts, bounds, path_length, content) where
+        root is the outer <svg> element without children, bounds is a
+        (min_x, min_y, max_x, max_y) tuple or None, and content is None
+        unless include_content is set.
+    """
+    import numpy as np
+    from .svg_path import NON_RENDERED, parse_transform, element_subpaths, group_bounds, group_length
+
+    root = None
+    namespace = ''
+    counts = Counter()
+    boxes = []
+    path_length = 0.0
+    content = [] if include_content else None
+    # Open elements and their combined transforms, outermost first
+    elements, matrices = [], []
+    # Depth inside elements that are never drawn
+    hidden = 0
+    # Buffered subpaths grouped by the matrix object they share
+    groups = {}
+    buffered = 0
+    # Last top-level child, serialized once its tail text has been read
+    finished = None
+
+    def flush():
+        nonlocal path_length, buffered
+        if groups:
+            box = group_bounds(groups.values())
+            if box:
+                boxes.append(box)
+            path_length += group_length(groups.values())
+            groups.clear()
+        buffered = 0
+
+    def emit():
+        nonlocal finished
+        if namespace:
+            for elem in finished.iter():
+                if isinstance(elem.tag, str):
+                    elem.tag = elem.tag.replace(namespace, '')
+        content.append(ET.tostring(finished, encoding='unicode'))
+        root.remove(finished)
+        finished = None
+
+    for event, elem in ET.iterparse(svg_file_path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+                namespace = re.match(r'(\{.*\})?', root.tag).group(0)
+                elements.append(elem)
+                matrices.append(np.identity(3))
+                continue
+            if finished is not None:
+                emit()
+            transform = elem.get('transform')
+            matrices.append(matrices[-1] @ parse_transform(transform) if transform else matrices[-1])
+            elements.append(elem)
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if hidden or tag in NON_RENDERED or elem.get('display') == 'none':
+                hidden += 1
+            continue
+
+        if elem is root:
+            break
+        matrix = matrices.pop()
+        elements.pop()
+        counts[elem.tag.rsplit('}', 1)[-1]] += 1
+
+        if hidden:
+            hidden -= 1
+        else:
+            subpaths = element_subpaths(elem)
+            if subpaths:
+                groups.setdefault(id(matrix), (matrix, []))[1].extend(subpaths)
+                buffered += len(subpaths)
+                if buffered >= STREAM_BATCH:
+                    flush()
+
+        # Done with the element; content needs whole top-level subtrees
+        if include_content:
+            if len(elements) == 1:
+                finished = elem
+        else:
+            elements[-1].remove(elem)
+
+    if finished is not None:
+        emit()
+    flush()
+
+    bounds = None
+    if boxes:
+        boxes = np.array(boxes)
+        bounds = (*boxes[:, :2].min(axis=0), *boxes[:, 2:].max(axis=0))
+        bounds = tuple(float(v) for v in bounds)
+    return root, counts, bounds, path_length, ''.join(content) if include_content else None
+
+def bounding_box_dict(bounds):
+    """
+    Convert a (min_x, min_y, max_x, max_y) tuple to the bounding box dict,
+    with infinite values when there is nothing to bound.
+    """
+    if bounds is None:
+        bounds = (float('inf'), float('inf'), float('-inf'), float('-inf'))
+    min_x, min_y, max_x, max_y = bounds
+
+    return {
+        'min_x': min_x,
+        'min_y': min_y,
+        'max_x': max_x,
+        'max_y': max_y
+    }
+
 def calculate_bounding_box(root):
     """
-    Calculate the bounding box of all elements in the SVG.
+    Calculate the bounding box of all drawn shapes in the SVG, in the root's
+    user units. Paths are parsed completely (relative commands, curve and
+    arc extrema) and nested transforms are applied (see svg_path).
 
     Args:
         root (Element): The root element of the SVG.
@@ -100,45 +217,9 @@ def calculate_bounding_box(root):
             - 'max_x': Maximum x-coordinate
             - 'max_y': Maximum y-coordinate
     """
-    min_x, min_y = float('inf'), float('inf')
-    max_x, max_y = float('-inf'), float('-inf')
-
-    for elem in root.iter():
-        if 'x' in elem.attrib and 'y' in elem.attrib:
-            x = float(elem.attrib['x'])
-            y = float(elem.attrib['y'])
-            min_x = min(min_x, x)
-            min_y = min(min_y, y)
-            max_x = max(max_x, x)
-            max_y = max(max_y, y)
-        elif 'points' in elem.attrib:
-            points = elem.attrib['points'].split()
-            for point in points:
-                x, y = map(float, point.split(','))
-                min_x = min(min_x, x)
-                min_y = min(min_y, y)
-                max_x = max(max_x, x)
-                max_y = max(max_y, y)
-        elif 'd' in elem.attrib:
-            # For path elements, we'd need a more complex parsing of the 'd' attribute
-            # This is a simplified approach that may not be accurate for all paths
-            commands = re.findall(r'([MmLlHhVvCcSsQqTtAaZz])', elem.attrib['d'])
-            coords = re.findall(r'(-?\d+\.?\d*)', elem.attrib['d'])
-            coords = list(map(float, coords))
-            for i in range(0, len(coords), 2):
-                if i+1 < len(coords):
-                    x, y = coords[i], coords[i+1]
-                    min_x = min(min_x, x)
-                    min_y = min(min_y, y)
-                    max_x = max(max_x, x)
-                    max_y = max(max_y, y)
+    from .svg_path import geometry_bounds
 
-    return {
-        'min_x': min_x,
-        'min_y': min_y,
-        'max_x': max_x,
-        'max_y': max_y
-    }
+    return bounding_box_dict(geometry_bounds(root))
 
 # Example usage
 if __name__ == "__main__":
@@ -150,4 +231,5 @@ if __name__ == "__main__":
         print(f"Height: {svg_details['height']}")
         print(f"ViewBox: {svg_details['viewBox']}")
         print(f"Bounding Box: {svg_details['bounding_box']}")
-        print(f"Content length: {len(svg_details['content'])} characters")
\ No newline at end of file
+        print(f"Elements: {svg_details['element_counts']}")
+        print(f"Path length: {svg_details['path_length']:.2f}")
@@ -0,0 +1,358 @@
+import re
+import numpy as np
+import xml.etree.ElementTree as ET
+from .svg_path import (NUMBER_RE, UNITS_TO_MM, NON_RENDERED, FLATTEN_TOLERANCE, length_to_mm, document_transform,
+                       parse_transform, element_polylines)
+
+# Trailing zeros of formatted decimals, e.g. '.500' or '.000'
+TRAILING_ZEROS_RE = re.compile(r'\.?0+(?=[, \0]|$)')
+
+# stroke declaration inside a style attribute
+STYLE_STROKE_RE = re.compile(r'(?:^|;)\s*stroke\s*:\s*([^;]+)')
+
+
+def element_stroke(elem):
+    """
+    Get the stroke an element sets itself (style wins over the attribute),
+    or None if it inherits its parent's.
+    """
+    style = elem.get('style')
+    if style:
+        match = STYLE_STROKE_RE.search(style)
+        if match:
+            return match.group(1).strip()
+    return elem.get('stroke')
+
+
+def iter_styled_shapes(root):
+    """
+    Yield (element, matrix, stroke, layer) for every rendered element below
+    root. matrix combines the nested transforms, stroke is the inherited
+    stroke (None if never set) and layer is the 1-based index of the
+    top-level group the element is in, or 0 for elements outside any group.
+    """
+    layer_count = 0
+    stack = []
+    for child in reversed(root):
+        stack.append((child, np.identity(3), None, None))
+
+    while stack:
+        elem, matrix, stroke, layer = stack.pop()
+        tag = elem.tag.rsplit('}', 1)[-1] if isinstance(elem.tag, str) else ''
+        if tag in NON_RENDERED or elem.get('display') == 'none':
+            continue
+        if layer is None:
+            # Top-level element: groups start a new layer
+            if tag == 'g':
+                layer_count += 1
+                layer = layer_count
+            else:
+                layer = 0
+        transform = elem.get('transform')
+        matrix = matrix @ parse_transform(transform) if transform else matrix
+        stroke = element_stroke(elem) or stroke
+        yield elem, matrix, stroke, layer
+        for child in reversed(elem):
+            stack.append((child, matrix, stroke, layer))
+
+
+class Drawing:
+    """
+    Polylines in millimeters packed into flat NumPy arrays.
+
+    All points live in one (N, 2) float buffer; path i is
+    coords[offsets[i]:offsets[i + 1]]. layers and strokes hold one entry per
+    path, strokes indexing into palette (-1 for the default stroke). Every
+    operation works on the whole buffer at once instead of one small array
+    per path.
+
+    Example:
+        drawing = Drawing.from_svg('art.svg')
+        drawing.lengths().sum()
+        drawing.to_svg('copy.svg')
+    """
+
+    __slots__ = ('coords', 'offsets', 'layers', 'strokes', 'palette', 'width', 'height')
+
+    def __init__(self, coords, offsets, layers=None, strokes=None, palette=(), width=0.0, height=0.0):
+        self.coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        count = len(self.offsets) - 1
+        self.layers = np.zeros(count, dtype=np.int32) if layers is None else np.asarray(layers, dtype=np.int32)
+        self.strokes = np.full(count, -1, dtype=np.int32) if strokes is None else np.asarray(strokes, dtype=np.int32)
+        self.palette = list(palette)
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_polylines(cls, polylines, layers=None, strokes=None, palette=(), width=0.0, height=0.0):
+        """
+        Pack a list of (N, 2) arrays. Paths with fewer than two points are
+        dropped, along with their layer and stroke entries.
+        """
+        keep = [i for i, p in enumerate(polylines) if len(p) > 1]
+        polylines = [polylines[i] for i in keep]
+        if layers is not None:
+            layers = np.asarray(layers)[keep] if keep else np.empty(0)
+        if strokes is not None:
+            strokes = np.asarray(strokes)[keep] if keep else np.empty(0)
+        offsets = np.concatenate([[0], np.cumsum([len(p) for p in polylines], dtype=np.intp)])
+        coords = np.vstack(polylines) if polylines else np.empty((0, 2))
+        return cls(coords, offsets, layers, strokes, palette, width, height)
+
+    @classmethod
+    def from_svg(cls, svg_file_path, tolerance=FLATTEN_TOLERANCE):
+        """
+        Load every drawn shape of an SVG file, see from_root.
+        """
+        return cls.from_root(ET.parse(svg_file_path).getroot(), tolerance)
+
+    @classmethod
+    def from_root(cls, root, tolerance=FLATTEN_TOLERANCE):
+        """
+        Flatten the drawn shapes below an <svg> element into a Drawing in
+        millimeters, in document order.
+
+        Args:
+            root (Element): The <svg> element.
+            tolerance (float): Curve flattening tolerance in millimeters.
+        """
+        to_mm = document_transform(root)
+        user_tolerance = tolerance / to_mm[0, 0]
+
+        polylines, layers, strokes = [], [], []
+        palette = {}
+        # Consecutive paths sharing a matrix object, as (matrix, path count)
+        runs = []
+        for elem, matrix, stroke, layer in iter_styled_shapes(root):
+            elem_polylines = [p for p in element_polylines(elem, user_tolerance) if len(p) > 1]
+            if not elem_polylines:
+                continue
+            polylines.extend(elem_polylines)
+            layers.extend([layer] * len(elem_polylines))
+            stroke_index = palette.setdefault(stroke, len(palette)) if stroke is not None else -1
+            strokes.extend([stroke_index] * len(elem_polylines))
+            if runs and runs[-1][0] is matrix:
+                runs[-1][1] += len(elem_polylines)
+            else:
+                runs.append([matrix, len(elem_polylines)])
+
+        width, height = page_size(root)
+        drawing = cls.from_polylines(polylines, layers, strokes, list(palette), width, height)
+
+        # Transform each run of paths into millimeters in one go
+        path_start = 0
+        for matrix, count in runs:
+            start, end = drawing.offsets[path_start], drawing.offsets[path_start + count]
+            combined = to_mm @ matrix
+            drawing.coords[start:end] = drawing.coords[start:end] @ combined[:2, :2].T + combined[:2, 2]
+            path_start += count
+        return drawing
+
+    @classmethod
+    def from_document(cls, document, width=None, height=None):
+        """
+        Pack the lines of a vpype Document (in px) into a Drawing in
+        millimeters, the inverse of to_document.
+        """
+        px = UNITS_TO_MM['px']
+        polylines, layers = [], []
+        for layer_id in sorted(document.layers):
+            lines = [line for line in document.layers[layer_id] if len(line) > 1]
+            polylines.extend(np.column_stack([line.real, line.imag]) * px for line in lines)
+            layers.extend([layer_id - 1] * len(lines))
+        if width is None or height is None:
+            width, height = (size * px for size in document.page_size or (0, 0))
+        return cls.from_polylines(polylines, layers, width=width, height=height)
+
+    def to_document(self):
+        """
+        Convert to a vpype Document in px, vpype's unit, with one vpype layer
+        per layer (vpype layer ids start at 1). Strokes are not kept.
+        """
+        import vpype
+
+        scale = 1 / UNITS_TO_MM['px']
+        document = vpype.Document(page_size=(self.width * scale, self.height * scale))
+        points = (self.coords[:, 0] + 1j * self.coords[:, 1]) * scale
+        lines = np.split(points, self.offsets[1:-1]) if len(self) else []
+        for layer in np.unique(self.layers).tolist():
+            document.add(vpype.LineCollection([lines[i] for i in np.flatnonzero(self.layers == layer).tolist()]), layer + 1)
+        return document
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        return iter(self.paths())
+
+    def path(self, index):
+        return self.coords[self.offsets[index]:self.offsets[index + 1]]
+
+    def paths(self):
+        """
+        Every path as a view into the coordinate buffer.
+        """
+        return np.split(self.coords, self.offsets[1:-1]) if len(self) else []
+
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    def starts(self):
+        return self.coords[self.offsets[:-1]]
+
+    def ends(self):
+        return self.coords[self.offsets[1:] - 1]
+
+    def segments(self):
+        """
+        Get every segment of every path, without the jumps between paths.
+
+        Returns:
+            tuple: (p0, p1, path_index) where p0 and p1 are (M, 2) segment
+            start and end points and path_index the path of each segment.
+        """
+        keep = np.ones(max(len(self.coords) - 1, 0), dtype=bool)
+        keep[self.offsets[1:-1] - 1] = False
+        index = np.flatnonzero(keep)
+        path_index = np.searchsorted(self.offsets, index, side='right') - 1
+        return self.coords[index], self.coords[index + 1], path_index
+
+    def lengths(self):
+        """
+        Length of every path in millimeters.
+        """
+        if not len(self):
+            return np.empty(0)
+        steps = np.hypot(*np.diff(self.coords, axis=0).T)
+        steps = np.append(steps, 0)
+        # Sum the steps within each path; the last step of a path is the jump to the next
+        steps[self.offsets[1:] - 1] = 0
+        return np.add.reduceat(steps, self.offsets[:-1])
+
+    def bounds(self):
+        """
+        Get (min_x, min_y, max_x, max_y) of all points, or None if empty.
+        """
+        if not len(self.coords):
+            return None
+        return (*self.coords.min(axis=0).tolist(), *self.coords.max(axis=0).tolist())
+
+    def subset(self, indices):
+        """
+        Get a new Drawing with the given paths, in the given order.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        sizes = self.sizes()[indices]
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        # Point indices of all selected paths, concatenated
+        points = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - self.offsets[indices], sizes)
+        return Drawing(self.coords[points], offsets, self.layers[indices], self.strokes[indices],
+                       self.palette, self.width, self.height)
+
+    def path_data(self, precision=3):
+        """
+        Format every path as compact SVG path data, all at once: the first
+        point absolute and the rest as relative steps ('l'). Points are
+        rounded to precision decimal places before the steps are taken, so
+        rounding errors don't add up along a path.
+        """
+        scale = 10 ** precision
+        units = np.rint(self.coords * scale).astype(np.int64)
+        steps = units.copy()
+        steps[1:] -= units[:-1]
+        starts = self.offsets[:-1]
+        steps[starts] = units[starts]
+
+        point = '%d,%d' if precision == 0 else f'%.{precision}f,%.{precision}f'
+        templates = ['M' + point + (' l' + ' '.join([point] * (size - 1)) if size > 1 else '')
+                     for size in self.sizes().tolist()]
+        if not templates:
+            return []
+        values = steps.ravel().tolist() if precision == 0 else (steps / scale).ravel().tolist()
+        # NUL can't occur in path data, so it safely separates the paths
+        text = '\0'.join(templates) % tuple(values)
+        if precision > 0:
+            text = TRAILING_ZEROS_RE.sub('', text)
+        return text.split('\0')
+
+    def to_svg(self, output, viewBox=None, precision=3):
+        """
+        Write the drawing as an SVG in millimeters, one group per layer.
+
+        Args:
+            output (str or file): Path or text stream to write to.
+            viewBox (tuple): (min_x, min_y, width, height) of the page in
+                millimeters (default: the whole page from the origin).
+            precision (int): Decimal places of the coordinates.
+        """
+        from .svg_writer import SVGWriter
+
+        if isinstance(output, str):
+            with open(output, 'w') as f:
+                return self.to_svg(f, viewBox, precision)
+
+        min_x, min_y, width, height = viewBox or (0, 0, self.width, self.height)
+        svg = SVGWriter(output)
+        path_data = self.path_data(precision)
+        with svg.document(width=f"{width:.{precision}f}mm", height=f"{height:.{precision}f}mm",
+                          viewBox=f"{min_x:.{precision}f} {min_y:.{precision}f} {width:.{precision}f} {height:.{precision}f}"):
+            order = np.argsort(self.layers, kind='stable')
+            layers = self.layers[order]
+            for layer in np.unique(layers).tolist():
+                with svg.group(id=f"layer{layer}", fill='none', stroke='black'):
+                    for i in order[layers == layer].tolist():
+                        stroke = self.strokes[i]
+                        svg.path(path_data[i], stroke=self.palette[stroke] if stroke >= 0 else None)
+
+
+def page_size(root):
+    """
+    Get the page size of an <svg> element in millimeters, falling back to
+    the viewBox size in px when width or height are missing.
+    """
+    viewbox = [float(v) for v in NUMBER_RE.findall(root.get('viewBox', ''))]
+    width, height = length_to_mm(root.get('width')), length_to_mm(root.get('height'))
+    if width is None:
+        width = viewbox[2] * UNITS_TO_MM['px'] if len(viewbox) == 4 else 0.0
+    if height is None:
+        height = viewbox[3] * UNITS_TO_MM['px'] if len(viewbox) == 4 else 0.0
+    return width, height
+
+
+def load_drawing(svg_file_path, tolerance=FLATTEN_TOLERANCE):
+    """
+    Load an SVG file as a Drawing through the geometry cache.
+
+    The first load parses and flattens the file and stores the arrays as
+    raw .npy files in the cache, keyed by the file's content hash and the
+    tolerance. Later loads of the same content map those files straight
+    into memory instead of parsing any XML, so the returned arrays are
+    read-only. Without a usable cache (--no-cache) this is
+    Drawing.from_svg.
+    """
+    from .cache import shared_cache
+
+    cache = shared_cache()
+    if cache is None:
+        return Drawing.from_svg(svg_file_path, tolerance)
+
+    key = cache.geometry_key(svg_file_path, tolerance)
+    stored = cache.get_arrays(key)
+    if stored is not None:
+        arrays, info = stored
+        return Drawing(arrays['coords'], arrays['offsets'], arrays['layers'], arrays['strokes'],
+                       info['palette'], info['width'], info['height'])
+
+    drawing = Drawing.from_svg(svg_file_path, tolerance)
+    try:
+        cache.put_arrays(key, {
+            'coords': drawing.coords,
+            'offsets': drawing.offsets,
+            'layers': drawing.layers,
+            'strokes': drawing.strokes,
+        }, {'palette': drawing.palette, 'width': drawing.width, 'height': drawing.height})
+    except OSError:
+        # The cache is best effort
+        pass
+    return drawing
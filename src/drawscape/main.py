@@ -1,124 +1,275 @@
 #!/usr/bin/env python3
 
 import os
-import requests
-from PIL import Image
-from dotenv import load_dotenv
 import argparse
 
-from .svg_utils import svglines
-from .blueprint import blueprint
-from .blueprint_label import blueprint_label
-from .optimize import optimize_svg
-from .optimize_tabloid import optimize_tabloid
-from .details import parse_svg_file
-from .convert import convert_svg
-from .shipping import create_shipping_label
-from .split import split_svg
+# Heavy dependencies (cv2, numpy, PIL, requests, HersheyFonts,
+# nextdraw) are imported inside the action handlers below so that running a
+# single action only pays for the modules that action actually needs.
 
-load_dotenv()
 
 # not needed right now since the removebg had an api option for thi
-def trim(image_path):
-    img = Image.open(image_path)
-    img = img.convert("RGBA")
-    # Get the bounding box of the non-transparent area using the alpha channel
-    bbox = img.getbbox()
-    if (bbox):
-        trimmed_img = img.crop(bbox)
-        output_path = os.path.splitext(image_path)[0] + "_trimmed.png"
-        trimmed_img.save(output_path)
-        print(f"Image saved to {output_path}")
-    else:
-        print("No non-transparent area found.")
-
-
-def remove_background(image_path):
-    output_path = os.path.splitext(image_path)[0] + "_removebg.png"
-    response = requests.post(
-        'https://api.remove.bg/v1.0/removebg',
-        files={'image_file': open(image_path, 'rb')},
-        data={'size': 'auto', 'crop': 'true'},
-        headers={'X-Api-Key': os.getenv('REMOVEBG_KEY')},
-    )
-    if response.status_code == requests.codes.ok:
-        with open(output_path, 'wb') as out:
-            out.write(response.content)
-        print(f"Image saved to {output_path}")
+def trim(image_path, output_path=None):
+    from .trim import trim
+    return trim(image_path, output_path)
+
+
+def remove_background(image_path, output_path=None):
+    from .removebg import remove_background
+    return remove_background(image_path, output_path)
+
+
+def _removebg(args):
+    import glob
+    from .removebg import remove_background, remove_backgrounds
+    # A glob removes the background of every matching image concurrently
+    if any(char in args.image for char in '*?['):
+        return remove_backgrounds(sorted(glob.glob(args.image)), args.output, args.workers, args.rate,
+                                  args.retries, args.overwrite)
+    return remove_background(args.image, args.output, retries=args.retries)
+
+
+def _trim(args):
+    from .trim import trim, trim_images, image_files
+    # A directory or glob trims every image in it on a thread pool
+    if os.path.isdir(args.image) or any(char in args.image for char in '*?['):
+        return trim_images(image_files(args.image), args.output, args.threshold, args.padding,
+                           args.compress_level, args.workers)
+    return trim(args.image, args.output, args.threshold, args.padding, args.compress_level)
+
+
+def _svglines(args):
+    from .svg_utils import svglines
+    return svglines(args.image, args.output, args.min_length, args.min_area, args.tolerance, args.contours, args.max_depth,
+                    args.tile_size, args.tile_overlap, args.workers)
+
+
+def _blueprint(args):
+    from .blueprint import blueprint, blueprint_variants, parse_variants
+    # Several sizes or orientations (or "all") render every combination
+    variants = parse_variants(args.size, args.orientation)
+    if len(variants) > 1:
+        return blueprint_variants(args.json, variants, args.output, args.precision, args.workers)
+    size, orientation = variants[0]
+    return blueprint(args.json, size, orientation, args.output, args.precision)
+
+
+def _blueprint_label(args):
+    from .blueprint_label import blueprint_label
+    return blueprint_label(args.json, args.svg, args.output, args.estimate, args.precision)
+
+
+def _optimize(args):
+    from .optimize import optimize_svg
+    return optimize_svg(args.image, args.output, args.pipeline, sort=args.sort, sort_time=args.sort_time)
+
+
+def _optimize_tabloid(args):
+    from .optimize_tabloid import optimize_tabloid
+    return optimize_tabloid(args.image, args.output, args.pipeline)
+
+
+def _svgdetails(args):
+    from .details import parse_svg_file
+    details = parse_svg_file(args.image)
+    if details:
+        print("SVG Details:")
+        print(f"Width: {details['width']}")
+        print(f"Height: {details['height']}")
+        print(f"ViewBox: {details['viewBox']}")
+        print(f"Bounding Box: {details['bounding_box']}")
+        print(f"Elements: {', '.join(f'{tag}: {count}' for tag, count in sorted(details['element_counts'].items()))}")
+        print(f"Path length: {details['path_length']:.2f}")
     else:
-        print("Error:", response.status_code, response.text)
-    return output_path
+        print("Failed to parse SVG file.")
+    return details
 
-def main():
+
+def _convert(args):
+    from .convert import convert_svg
+    return convert_svg(args.image, args.output, args.convert_mode)
+
+
+def _shipping(args):
+    from .shipping import create_shipping_label, create_shipping_labels, parse_sheet
+    # A CSV/JSONL of recipients (or any recipients file with --sheet) renders
+    # a label for each of them
+    if args.json.endswith(('.csv', '.jsonl')) or args.sheet:
+        return create_shipping_labels(args.json, args.output, parse_sheet(args.sheet) if args.sheet else (1, 1),
+                                      args.precision)
+    output_path = args.output if args.output else 'shipping_label.svg'
+    return create_shipping_label(args.json, output_path, args.precision)
+
+
+def _split(args):
+    from .split import split_svg
+    return split_svg(args.image, args.output, args.rows, args.cols, args.overlap, args.marks, args.precision)
+
+
+def _pipeline(args):
+    from .pipeline import run_pipeline, parse_stages
+    options = {
+        'removebg': {'retries': args.retries},
+        'trim': {'threshold': args.threshold, 'padding': args.padding},
+        'svglines': {'min_length': args.min_length, 'min_area': args.min_area, 'tolerance': args.tolerance,
+                     'mode': args.contours, 'max_depth': args.max_depth, 'tile_size': args.tile_size,
+                     'tile_overlap': args.tile_overlap, 'workers': args.workers},
+        'optimize': {'pipeline': args.pipeline, 'sort': args.sort, 'sort_time': args.sort_time},
+        'blueprint-label': {'estimate': args.estimate, 'precision': args.precision},
+    }
+    return run_pipeline(args.image, parse_stages(args.stages or ''), args.output, parse_stages(args.keep or ''),
+                        args.json, options, args.compress_level, args.precision)
+
+
+def _cache(args):
+    from .cache import ResultCache
+    cache = ResultCache.from_args(args)
+    stats = cache.stats()
+    print("Cache Details:")
+    print(f"Directory: {cache.directory}")
+    print(f"Entries: {stats['entries']}")
+    print(f"Size: {stats['size'] / 1024 / 1024:.1f} MB of {stats['max_size'] / 1024 / 1024:.0f} MB")
+    print(f"Hits: {stats['hits']}, Misses: {stats['misses']} ({stats['hit_rate']:.0%} hit rate)")
+    print(f"Geometry hits: {stats['geometry_hits']}, Misses: {stats['geometry_misses']}")
+    return stats
+
+
+def _batch(args):
+    from .batch import run_batch
+    cache_options = {'no_cache': args.no_cache, 'cache_dir': args.cache_dir, 'cache_size': args.cache_size,
+                     'quiet': args.quiet}
+    return run_batch(args.manifest, args.batch_action, args.workers, args.output, args.report, cache_options)
+
+
+def _serve(args):
+    from .serve import serve, DEFAULT_HOST, DEFAULT_PORT
+    # Workers keep quiet, the server logs one line per request
+    job_defaults = {'no_cache': args.no_cache, 'cache_dir': args.cache_dir, 'cache_size': args.cache_size,
+                    'quiet': True}
+    return serve(args.host or DEFAULT_HOST, DEFAULT_PORT if args.port is None else args.port, args.socket,
+                 args.workers, job_defaults)
+
+
+# Subcommand registry: action name -> (required argument, handler).
+ACTIONS = {
+    'removebg': ('image', _removebg),
+    'trim': ('image', _trim),
+    'svglines': ('image', _svglines),
+    'blueprint': ('json', _blueprint),
+    'blueprint-label': ('json', _blueprint_label),
+    'optimize': ('image', _optimize),
+    'optimize-tabloid': ('image', _optimize_tabloid),
+    'svgdetails': ('image', _svgdetails),
+    'convert': ('image', _convert),
+    'shipping': ('json', _shipping),
+    'split': ('image', _split),
+    'pipeline': ('image', _pipeline),
+    'batch': ('manifest', _batch),
+    'serve': (None, _serve),
+    'cache': (None, _cache),
+}
+
+# Actions that run other actions or manage the cache, which can't be run as
+# a batch job or a server request
+UNSERVED_ACTIONS = ('batch', 'cache', 'serve')
+
+# Actions whose output files are stored in the result cache
+CACHED_ACTIONS = {'trim', 'svglines', 'blueprint', 'blueprint-label', 'optimize', 'optimize-tabloid', 'convert', 'split', 'pipeline'}
+
+
+def run_action(action, args):
+    """
+    Validate the required argument for an action and dispatch to its handler.
+    Results of CACHED_ACTIONS are restored from the result cache when the
+    same inputs and options were processed before, unless args.no_cache.
+    The cache options also apply to the geometry cache used inside actions.
+
+    Args:
+        action (str): Name of the action, a key of ACTIONS.
+        args (Namespace): Parsed command line arguments.
+    """
+    from .cache import ResultCache, configure
+    from .profiling import log
+
+    required, handler = ACTIONS[action]
+    if required and not getattr(args, required):
+        raise ValueError(f"--{required} argument is required for {action} action")
+    configure(args)
+    if action not in CACHED_ACTIONS or getattr(args, 'no_cache', False):
+        return handler(args)
+
+    cache = ResultCache.from_args(args)
+    key = cache.key(action, args)
+    result = cache.get(key, getattr(args, required), args)
+    if result is not None:
+        log(f"Restored {action} result from cache: {result}")
+        return result
+    result = handler(args)
+    if result is not None:
+        cache.put(key, result, getattr(args, required), args)
+    return result
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Image processing tool')
-    parser.add_argument('action', choices=['removebg', 'trim', 'svglines', 'blueprint', 'blueprint-label', 'optimize', 'optimize-tabloid', 'svgdetails', 'convert', 'shipping', 'vase', 'split'], help='Action to perform')
-    parser.add_argument('--image', help='Path to the image file')
-    parser.add_argument('--json', help='Path to the JSON file for blueprint or shipping action')
+    parser.add_argument('action', choices=list(ACTIONS), help='Action to perform')
+    parser.add_argument('--image', help='Path to the image file, or a quoted glob of images for removebg and trim (or a directory for trim)')
+    parser.add_argument('--json', help='Path to the JSON file for blueprint or shipping action, or the blueprint-label pipeline stage')
     parser.add_argument('--svg', help='Path to the SVG file for blueprint-label action')
-    parser.add_argument('--output', help='Output path for shipping label')
-    parser.add_argument('--size', choices=['a4', 'a3', 'letter', 'tabloid'], help='Size for blueprint action (optional)')
-    parser.add_argument('--orientation', choices=['portrait', 'landscape'], default='portrait', help='Orientation for blueprint action (optional)')
+    parser.add_argument('--output', help='Output path (optional). For batch, a template such as "out/{stem}_{action}.svg"; for removebg and trim on several images, a directory')
+    parser.add_argument('--size', help='Paper size for blueprint action: a4, a3, letter or tabloid, several separated by commas, or "all" (default: tabloid)')
+    parser.add_argument('--orientation', default='portrait', help='Orientation for blueprint action: portrait, landscape, both separated by commas, or "all" (default: portrait)')
+    parser.add_argument('--manifest', help='JSONL/CSV manifest or glob of input files for batch action')
+    parser.add_argument('--batch-action', choices=[a for a in ACTIONS if a not in UNSERVED_ACTIONS], help='Action to run on every file matched by a glob manifest')
+    parser.add_argument('--workers', type=int, help='Number of worker processes for batch and serve actions, threads for tiled svglines, trim on several images and blueprint variants (default: CPU count), or concurrent requests for removebg on a glob (default: 4)')
+    parser.add_argument('--report', help='Path to write a JSON report of batch job status and timings (optional)')
+    parser.add_argument('--threshold', type=int, default=0, help='Alpha value (0-255) at or below which pixels are trimmed for trim action (optional)')
+    parser.add_argument('--padding', type=int, default=0, help='Pixels of margin kept around the content for trim action (optional)')
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=6, metavar='{0-9}', help='PNG compression level for trim action, 0 fastest to 9 smallest (optional)')
+    parser.add_argument('--host', help='Interface for serve action to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, help='TCP port for serve action (default: 8617)')
+    parser.add_argument('--socket', help='Unix socket for serve action to listen on instead of TCP (optional)')
+    parser.add_argument('--rate', type=float, help='Maximum remove.bg requests per second for removebg on a glob (optional)')
+    parser.add_argument('--retries', type=int, default=5, help='Retries of rate limited or failed remove.bg requests (optional)')
+    parser.add_argument('--overwrite', action='store_true', help='Process images even if their _removebg.png output exists for removebg on a glob (optional)')
+    parser.add_argument('--min-length', type=float, default=0, help='Drop contours shorter than this many pixels for svglines action (optional)')
+    parser.add_argument('--min-area', type=float, default=0, help='Drop contours enclosing fewer square pixels for svglines action (optional)')
+    parser.add_argument('--tolerance', type=float, default=0, help='Contour simplification tolerance in pixels for svglines action (optional)')
+    parser.add_argument('--contours', choices=['list', 'external', 'ccomp', 'tree'], default='list', help='Contour retrieval mode for svglines action (optional)')
+    parser.add_argument('--max-depth', type=int, help='Maximum contour nesting depth for svglines action with ccomp/tree contours (optional)')
+    parser.add_argument('--tile-size', type=int, help='Trace edges in tiles of this many pixels for svglines action on very large images (optional)')
+    parser.add_argument('--tile-overlap', type=int, default=16, help='Pixels of context around each tile for tiled svglines (optional)')
+    parser.add_argument('--pipeline', help='vpype commands to run for optimize/optimize-tabloid actions, e.g. "linemerge linesort" (optional)')
+    parser.add_argument('--sort', choices=['vpype', 'native'], default='vpype', help="Path ordering for optimize action: vpype's linesort or drawscape's travel optimizer (optional)")
+    parser.add_argument('--sort-time', type=float, help='Time budget in seconds for native 2-opt refinement (optional)')
+    parser.add_argument('--estimate', choices=['exact', 'native'], default='exact', help='Plot time estimate for blueprint-label action: an exact NextDraw preview run, or the faster analytical estimate, which is experimental and not yet calibrated against NextDraw (optional)')
+    parser.add_argument('--precision', type=int, default=3, help='Decimal places of coordinates in generated SVGs for blueprint, blueprint-label, shipping, split and pipeline actions (default: 3)')
+    parser.add_argument('--sheet', help='Labels per sheet as ROWSxCOLS for shipping action on many recipients, e.g. "2x1" (default: one file per label)')
+    parser.add_argument('--rows', type=int, default=2, help='Number of tile rows for split action (optional)')
+    parser.add_argument('--cols', type=int, default=1, help='Number of tile columns for split action (optional)')
+    parser.add_argument('--overlap', type=float, default=0, help='Overlap in mm between neighbouring tiles for split action (optional)')
+    parser.add_argument('--marks', action='store_true', help='Draw registration marks at the tile corners for split action (optional)')
+    parser.add_argument('--convert-mode', choices=['rewrite', 'viewbox'], default='rewrite', help='convert action: scale every coordinate to mm, or only rewrite the root size and viewBox (optional)')
+    parser.add_argument('--stages', help='Comma separated actions for pipeline action, e.g. "removebg,trim,svglines,optimize,convert,blueprint-label"')
+    parser.add_argument('--keep', help='Comma separated pipeline stages (or "all") whose intermediate result is written too (optional)')
+    parser.add_argument('--profile', help='Write the time and peak memory of every stage (parse, compute, serialize, io) as JSON to this file (optional)')
+    parser.add_argument('--profile-stats', help='Write a cProfile dump of the whole run to this file, for pstats or snakeviz (optional)')
+    parser.add_argument('--quiet', action='store_true', help='Only print errors and warnings, no status messages (optional)')
+    parser.add_argument('--no-cache', action='store_true', help='Always recompute instead of restoring results from the cache (optional)')
+    parser.add_argument('--cache-dir', help='Result cache directory (default: $DRAWSCAPE_CACHE_DIR or ~/.cache/drawscape)')
+    parser.add_argument('--cache-size', type=float, help='Result cache size limit in MB before least recently used results are evicted (default: 1024)')
+    return parser
+
+
+def main():
+    from .profiling import set_quiet, profiled
 
-    args = parser.parse_args()
+    args = build_parser().parse_args()
+    set_quiet(args.quiet)
 
     try:
-        if args.action == 'removebg':
-            if not args.image:
-                raise ValueError("--image argument is required for removebg action")
-            remove_background(args.image)
-        elif args.action == 'trim':
-            if not args.image:
-                raise ValueError("--image argument is required for trim action")
-            trim(args.image)
-        elif args.action == 'svglines':
-            if not args.image:
-                raise ValueError("--image argument is required for svglines action")
-            svglines(args.image)
-        elif args.action == 'blueprint':
-            if not args.json:
-                raise ValueError("--json argument is required for blueprint action")
-            blueprint(args.json, args.size, args.orientation)
-        elif args.action == 'blueprint-label':
-            if not args.json:
-                raise ValueError("--json argument is required for blueprint-label action")
-            blueprint_label(args.json, args.svg)
-        elif args.action == 'optimize':
-            if not args.image:
-                raise ValueError("--image argument is required for optimize action")
-            optimize_svg(args.image)
-        elif args.action == 'optimize-tabloid':
-            if not args.image:
-                raise ValueError("--image argument is required for optimize-tabloid action")
-            optimize_tabloid(args.image)
-        elif args.action == 'svgdetails':
-            if not args.image:
-                raise ValueError("--image argument is required for svgdetails action")
-            details = parse_svg_file(args.image)
-            if details:
-                print("SVG Details:")
-                print(f"Width: {details['width']}")
-                print(f"Height: {details['height']}")
-                print(f"ViewBox: {details['viewBox']}")
-                print(f"Bounding Box: {details['bounding_box']}")
-                print(f"Content length: {len(details['content'])} characters")
-            else:
-                print("Failed to parse SVG file.")
-        elif args.action == 'convert':
-            if not args.image:
-                raise ValueError("--image argument is required for convert action")
-            convert_svg(args.image)
-        elif args.action == 'shipping':
-            if not args.json:
-                raise ValueError("--json argument is required for shipping action")
-            output_path = args.output if args.output else 'shipping_label.svg'
-            create_shipping_label(args.json, output_path)
-        elif args.action == 'vase':
-            print_vase()
-        elif args.action == 'split':
-            if not args.image:
-                raise ValueError("--image argument is required for split action")
-            split_svg(args.image)
-            
+        with profiled(args.action, args.profile, args.profile_stats):
+            run_action(args.action, args)
     except TypeError as e:
         print(f"Error: {e}. Please provide a valid input file path.")
     except ValueError as e:
@@ -127,4 +278,4 @@ def main():
         print(f"An unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,36 +1,156 @@
 import os
+import shlex
 import subprocess
 import xml.etree.ElementTree as ET
+from .profiling import log, span
 
-def optimize_svg(input_svg_path):
-    print(f"Optimizing SVG file: {input_svg_path}")
+# Default vpype pipeline for the optimize action
+OPTIMIZE_PIPELINE = "linemerge linesort linesimplify"
 
-    # Generate output file path
-    output_dir = os.path.dirname(input_svg_path)
-    output_filename = os.path.splitext(os.path.basename(input_svg_path))[0] + "_optimized.svg"
-    output_path = os.path.join(output_dir, output_filename)
-
-    # Construct the vpype command
-    vpype_command = [
-        "vpype",
-        "read",
-        input_svg_path,
-        "linemerge",
-        "linesort",
-        "linesimplify",
-        "write",
-        output_path
-    ]
-
-    print(vpype_command)
-
-    # Execute the vpype command
+# Default pipeline when paths are ordered by drawscape's own travel optimizer
+NATIVE_SORT_PIPELINE = "linemerge linesimplify"
+
+
+def vpype_available():
+    """
+    Check whether vpype can be imported to run pipelines in-process.
+    """
     try:
-        subprocess.run(vpype_command, check=True, capture_output=True, text=True)
-        print(f"Optimized SVG saved to {output_path}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error optimizing SVG: {e}")
-        print(f"Command output: {e.output}")
-        return None
-
-    return output_path
\ No newline at end of file
+        import vpype_cli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_vpype(input_svg_path, output_path, pipeline, write_options='', in_process=None, document_hook=None):
+    """
+    Run a vpype pipeline on an SVG file.
+
+    The pipeline runs through vpype's Python API in the current process, so
+    optimizing many files reuses one warm interpreter and vpype's plugin
+    registry. If vpype can't be imported (or in_process is False) the
+    `vpype` executable is run instead.
+
+    Args:
+        input_svg_path (str): Path to the input SVG file.
+        output_path (str): Path to write the result to.
+        pipeline (str): vpype commands to run between read and write, as they
+            would be typed on the vpype command line.
+        write_options (str): Extra options for vpype's write command.
+        in_process (bool): Force (True) or disable (False) the in-process
+            engine. Defaults to in-process whenever vpype is importable.
+        document_hook (callable): Called with the vpype Document after the
+            pipeline and before writing. Requires the in-process engine.
+
+    Returns:
+        str: Path to the output file, or None if vpype failed.
+    """
+    if in_process is None:
+        in_process = vpype_available()
+
+    if document_hook and not in_process:
+        raise ValueError("vpype must be installed to post-process documents in-process")
+
+    read_args = ['read', input_svg_path]
+    pipeline_args = shlex.split(pipeline)
+    write_args = ['write', *shlex.split(write_options), output_path]
+    args = read_args + pipeline_args + write_args
+
+    if in_process:
+        import vpype_cli
+
+        log(f"vpype {shlex.join(args)}")
+        try:
+            # Run as separate steps so reading, processing and writing can
+            # be told apart when profiling
+            with span('parse'):
+                document = vpype_cli.execute(shlex.join(read_args))
+            with span('compute'):
+                if pipeline_args:
+                    document = vpype_cli.execute(shlex.join(pipeline_args), document)
+                if document_hook:
+                    document_hook(document)
+            with span('serialize'):
+                vpype_cli.execute(shlex.join(write_args), document)
+        except (Exception, SystemExit) as e:
+            # Click reports bad commands/options by exiting
+            print(f"Error optimizing SVG: {e}")
+            return None
+    else:
+        vpype_command = ['vpype', *args]
+        log(vpype_command)
+        try:
+            with span('compute'):
+                subprocess.run(vpype_command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            print(f"Error optimizing SVG: {e}")
+            print(f"Command output: {e.output}")
+            return None
+
+    log(f"Optimized SVG saved to {output_path}")
+    return output_path
+
+
+def native_sort(document, sort_time=None):
+    """
+    Order the paths of a vpype Document with drawscape's travel optimizer
+    and report the pen-up travel saved.
+    """
+    from .travel import sort_document, TWO_OPT_TIME_LIMIT
+
+    stats = sort_document(document, time_limit=TWO_OPT_TIME_LIMIT if sort_time is None else sort_time)
+    saved = stats['pen_up_before'] - stats['pen_up_after']
+    log(f"Pen-up travel: {stats['pen_up_before'] / 1000:.2f} m -> {stats['pen_up_after'] / 1000:.2f} m (saved {saved / 1000:.2f} m)")
+
+
+def optimize_svg(input_svg_path, output_path=None, pipeline=None, in_process=None, sort='vpype', sort_time=None):
+    """
+    Optimize an SVG file for plotting with a vpype pipeline.
+
+    Args:
+        input_svg_path (str): Path to the input SVG file
+        output_path (str): Path to write the optimized SVG to (optional)
+        pipeline (str): vpype commands to run (optional)
+        in_process (bool): Run vpype in-process or as a subprocess (see run_vpype)
+        sort (str): 'vpype' to order paths with the pipeline's linesort, or
+            'native' to order them with drawscape's travel optimizer after
+            the pipeline (see travel.optimize_travel)
+        sort_time (float): Time budget in seconds for native 2-opt refinement
+
+    Returns:
+        str: Path to the optimized SVG file, or None if vpype failed
+    """
+    log(f"Optimizing SVG file: {input_svg_path}")
+
+    # Generate output file path
+    if not output_path:
+        output_dir = os.path.dirname(input_svg_path)
+        output_filename = os.path.splitext(os.path.basename(input_svg_path))[0] + "_optimized.svg"
+        output_path = os.path.join(output_dir, output_filename)
+
+    if sort == 'native':
+        return run_vpype(input_svg_path, output_path, pipeline or NATIVE_SORT_PIPELINE, in_process=in_process,
+                         document_hook=lambda document: native_sort(document, sort_time))
+
+    return run_vpype(input_svg_path, output_path, pipeline or OPTIMIZE_PIPELINE, in_process=in_process)
+
+
+def optimize_drawing(drawing, pipeline=None, sort='vpype', sort_time=None):
+    """
+    Optimize a Drawing for plotting in memory, like optimize_svg without
+    reading or writing any file. Requires vpype.
+
+    Returns:
+        Drawing: The optimized drawing, on the same page.
+    """
+    import vpype_cli
+    from .geometry import Drawing
+
+    document = drawing.to_document()
+    with span('compute'):
+        if sort == 'native':
+            document = vpype_cli.execute(pipeline or NATIVE_SORT_PIPELINE, document)
+            native_sort(document, sort_time)
+        else:
+            document = vpype_cli.execute(pipeline or OPTIMIZE_PIPELINE, document)
+    return Drawing.from_document(document, drawing.width, drawing.height)
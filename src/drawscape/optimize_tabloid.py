@@ -1,59 +1,45 @@
 import os
-import subprocess
 import xml.etree.ElementTree as ET
 from .blueprint import PAPER_SIZES
+from .optimize import run_vpype
+from .profiling import log
 
-def optimize_tabloid(input_svg_path):
+# Default vpype pipeline for the optimize-tabloid action:
+#   linemerge     merge lines that are close to each other
+#   linesimplify  simplify complex paths
+#   linesort      sort lines to minimize pen travel
+#   scaleto       scale to fit within tabloid dimensions
+#   layout        center the drawing on tabloid with 2cm margins
+TABLOID_PIPELINE = "linemerge linesimplify linesort scaleto {width}mm {height}mm layout --fit-to-margins 2cm tabloid"
+
+def optimize_tabloid(input_svg_path, output_path=None, pipeline=None, in_process=None):
     """
     Optimize an SVG file specifically for tabloid paper size.
     
     Args:
         input_svg_path (str): Path to the input SVG file
+        output_path (str): Path to write the optimized SVG to (optional)
+        pipeline (str): vpype commands to run instead of TABLOID_PIPELINE (optional)
+        in_process (bool): Run vpype in-process (default when importable) or
+            as a subprocess (see run_vpype)
         
     Returns:
-        str: Path to the optimized SVG file
+        str: Path to the optimized SVG file, or None if vpype failed
     """
-    print(f"Optimizing SVG file for tabloid size: {input_svg_path}")
+    log(f"Optimizing SVG file for tabloid size: {input_svg_path}")
 
     # Get tabloid dimensions
     DOCUMENT_WIDTH, DOCUMENT_HEIGHT = PAPER_SIZES['tabloid']
     
     # Generate output file path
-    output_dir = os.path.dirname(input_svg_path)
-    output_filename = os.path.splitext(os.path.basename(input_svg_path))[0] + "_tabloid_optimized.svg"
-    output_path = os.path.join(output_dir, output_filename)
-
-    # Construct the vpype command with tabloid-specific optimizations
-    vpype_command = [
-        "vpype",
-        "read",
-        input_svg_path,
-        "linemerge",  # Merge lines that are close to each other
-        "linesimplify",  # Simplify complex paths
-        "linesort",   # Sort lines to minimize pen travel
-        "scaleto",   # Scale to fit within tabloid dimensions
-        f"{DOCUMENT_WIDTH}mm",
-        f"{DOCUMENT_HEIGHT}mm",
-        "layout",    # Center the drawing
-        "--fit-to-margins",
-        "2cm",      # Add 2cm margins
-        "tabloid",  # Specify tabloid layout
-        "write",    # Write the output
-        "--page-size",
-        "tabloid",  # Specify tabloid page size
-        "--center", # Center the drawing
-        output_path
-    ]
-
-    print(vpype_command)
+    if not output_path:
+        output_dir = os.path.dirname(input_svg_path)
+        output_filename = os.path.splitext(os.path.basename(input_svg_path))[0] + "_tabloid_optimized.svg"
+        output_path = os.path.join(output_dir, output_filename)
 
-    # Execute the vpype command
-    try:
-        subprocess.run(vpype_command, check=True, capture_output=True, text=True)
-        print(f"Optimized SVG saved to {output_path}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error optimizing SVG: {e}")
-        print(f"Command output: {e.output}")
-        return None
+    # Construct the vpype pipeline with tabloid-specific optimizations
+    if not pipeline:
+        pipeline = TABLOID_PIPELINE.format(width=DOCUMENT_WIDTH, height=DOCUMENT_HEIGHT)
 
-    return output_path 
\ No newline at end of file
+    # Write the output centered on a tabloid page
+    return run_vpype(input_svg_path, output_path, pipeline, "--page-size tabloid --center", in_process)
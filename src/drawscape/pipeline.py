@@ -0,0 +1,218 @@
+import os
+import time
+from .profiling import log, span
+
+# What each stage takes and produces: a raster 'image' (a PIL image), a
+# 'drawing' (geometry.Drawing in millimeters) or the finished 'label' file
+STAGES = {
+    'removebg': ('image', 'image'),
+    'trim': ('image', 'image'),
+    'svglines': ('image', 'drawing'),
+    'optimize': ('drawing', 'drawing'),
+    'convert': ('drawing', 'drawing'),
+    'blueprint-label': ('drawing', 'label'),
+}
+
+# Suffix of each stage's artifact, as the stand-alone actions name them
+ARTIFACT_SUFFIXES = {
+    'removebg': '_removebg.png',
+    'trim': '_trimmed.png',
+    'svglines': '_svg.svg',
+    'optimize': '_optimized.svg',
+    'convert': '_converted.svg',
+}
+
+
+def parse_stages(text):
+    """
+    Split a comma separated stage list such as "trim,svglines,optimize".
+    'all' (for --keep) stands for every stage.
+    """
+    if text.strip() == 'all':
+        return list(STAGES)
+    return [stage.strip() for stage in text.split(',') if stage.strip()]
+
+
+def check_stages(stages, input_path, json_path=None):
+    """
+    Check that every stage exists and takes what the previous one produces.
+
+    Raises:
+        ValueError: If the stages can't be chained.
+    """
+    if not stages:
+        raise ValueError("--stages argument is required for pipeline action")
+    kind = 'drawing' if input_path.lower().endswith('.svg') else 'image'
+    for stage in stages:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown pipeline stage {stage!r}, expected one of {', '.join(STAGES)}")
+        takes, produces = STAGES[stage]
+        if kind != takes:
+            raise ValueError(f"Pipeline stage {stage} works on {takes}s, but is given {kind}s")
+        kind = produces
+    if 'blueprint-label' in stages and not json_path:
+        raise ValueError("--json argument is required for the blueprint-label stage")
+
+
+def open_image(value):
+    """
+    The stage input as a PIL image, reading it if it's still the input path.
+    """
+    from PIL import Image
+
+    if not isinstance(value, str):
+        return value
+    img = Image.open(value)
+    img.load()
+    return img
+
+
+def open_drawing(value):
+    """
+    The stage input as a Drawing, loading it if it's still the input path.
+    """
+    from .geometry import load_drawing
+
+    return load_drawing(value) if isinstance(value, str) else value
+
+
+def run_removebg(value, retries=None):
+    import io
+    from PIL import Image
+    from .removebg import remove_background, DEFAULT_RETRIES
+
+    if isinstance(value, str):
+        # The input file is uploaded as it is
+        upload = value
+    else:
+        upload = io.BytesIO()
+        value.save(upload, format='PNG', compress_level=1)
+    result = io.BytesIO()
+    if remove_background(upload, result, retries=DEFAULT_RETRIES if retries is None else retries) is None:
+        return None
+    result.seek(0)
+    img = Image.open(result)
+    img.load()
+    return img
+
+
+def run_trim(value, threshold=0, padding=0):
+    from .trim import trim_image
+
+    trimmed_img = trim_image(open_image(value), threshold, padding)
+    if trimmed_img is None:
+        print("No non-transparent area found.")
+    return trimmed_img
+
+
+def run_svglines(value, min_length=0, min_area=0, tolerance=0, mode='list', max_depth=None, tile_size=None,
+                 tile_overlap=None, workers=None):
+    import cv2
+    import numpy as np
+    from .svg_utils import TILE_OVERLAP, trace_contours, filter_contours, contour_drawing
+
+    if isinstance(value, str):
+        img = cv2.imread(value, cv2.IMREAD_GRAYSCALE)
+    else:
+        # Alpha is ignored as when reading the saved image in grayscale.
+        # libpng rounds that luma differently, by at most one level.
+        img = cv2.cvtColor(np.asarray(value.convert('RGB')), cv2.COLOR_RGB2GRAY)
+    contours = trace_contours(img, mode, max_depth, tile_size, TILE_OVERLAP if tile_overlap is None else tile_overlap, workers)
+    height, width = img.shape
+    return contour_drawing(filter_contours(contours, min_length, min_area, tolerance), width, height)
+
+
+def run_optimize(value, pipeline=None, sort='vpype', sort_time=None):
+    from .optimize import optimize_drawing
+
+    try:
+        return optimize_drawing(open_drawing(value), pipeline, sort, sort_time)
+    except (Exception, SystemExit) as e:
+        # Click reports bad commands/options by exiting
+        print(f"Error optimizing SVG: {e}")
+        return None
+
+
+def run_convert(value):
+    # Drawings are always held in millimeters, so there is nothing to scale
+    return open_drawing(value)
+
+
+STAGE_FUNCTIONS = {
+    'removebg': run_removebg,
+    'trim': run_trim,
+    'svglines': run_svglines,
+    'optimize': run_optimize,
+    'convert': run_convert,
+}
+
+
+def save_artifact(value, path, compress_level, precision=3):
+    if hasattr(value, 'to_svg'):
+        value.to_svg(path, precision=precision)
+    else:
+        value.save(path, format='PNG', compress_level=compress_level)
+
+
+def run_pipeline(input_path, stages, output_path=None, keep=(), json_path=None, options=None, compress_level=6,
+                 precision=3):
+    """
+    Run a chain of actions on one input, passing images and geometry from
+    stage to stage in memory.
+
+    Each stage works like the action of the same name, but takes the
+    previous stage's result as a decoded image or as a Drawing instead of
+    re-reading a file. Only the last stage's result and the stages listed
+    in keep are written. Drawings are held in millimeters, so their
+    artifacts match the action's output after convert. The convert stage
+    therefore only names an artifact.
+
+    Args:
+        input_path (str): Image, or SVG if the first stage takes a drawing.
+        stages (list): Stage names in order, see STAGES.
+        output_path (str): Path of the last stage's result (default: the
+            input's name with the stage's usual suffix).
+        keep (list): Stages whose intermediate result to write too, next to
+            the input with their usual suffix.
+        json_path (str): Label data for the blueprint-label stage.
+        options (dict): Keyword arguments per stage, e.g.
+            {'trim': {'threshold': 8}, 'optimize': {'sort': 'native'}}.
+        compress_level (int): PNG compression level of image artifacts.
+        precision (int): Decimal places of coordinates in SVG artifacts.
+
+    Returns:
+        tuple: Paths of the written files in stage order, or None if a
+        stage failed.
+    """
+    check_stages(stages, input_path, json_path)
+    options = options or {}
+    base_name = os.path.splitext(input_path)[0]
+
+    written = []
+    value = input_path
+    start = time.perf_counter()
+    for i, stage in enumerate(stages):
+        last = i == len(stages) - 1
+        stage_start = time.perf_counter()
+        with span(stage):
+            if stage == 'blueprint-label':
+                from .blueprint_label import blueprint_label
+                value = blueprint_label(json_path, open_drawing(value), output_path, **options.get(stage, {}))
+            else:
+                with span('compute'):
+                    value = STAGE_FUNCTIONS[stage](value, **options.get(stage, {}))
+            if value is None:
+                print(f"Error: pipeline stopped at the {stage} stage")
+                return None
+
+            if stage == 'blueprint-label':
+                written.append(value)
+            elif last or stage in keep:
+                path = output_path if last and output_path else base_name + ARTIFACT_SUFFIXES[stage]
+                with span('serialize'):
+                    save_artifact(value, path, compress_level, precision)
+                written.append(path)
+        log(f"{stage}: {time.perf_counter() - stage_start:.2f}s")
+
+    log(f"Pipeline finished in {time.perf_counter() - start:.2f}s, saved {', '.join(written)}")
+    return tuple(written)
@@ -0,0 +1,173 @@
+import os
+import numpy as np
+from .geometry import Drawing, load_drawing
+from .profiling import span
+
+# NextDraw options used for blueprint labels (https://bantam.tools/nd_py/)
+PLOT_OPTIONS = {
+    'model': 9,
+    'pen_rate_lower': 10,
+    'pen_rate_upper': 10,
+    'speed_pendown': 30,
+    'speed_penup': 50,
+}
+
+# NextDraw's defaults for the motion options not set above
+MOTION_DEFAULTS = {
+    'accel': 75,
+    'pen_pos_up': 60,
+    'pen_pos_down': 30,
+}
+
+# Motion limits of the plotter firmware, matching NextDraw's configuration
+# defaults. Speeds and accelerations are scaled by the percentage options.
+# Not yet calibrated against recorded NextDraw plot times (see
+# tests/fixtures/plot_time), so the estimate is experimental.
+MAX_SPEED_MM_S = 8.6979 * 25.4         # XY speed limit in high resolution mode
+ACCEL_PENDOWN_MM_S2 = 40.0 * 25.4      # Acceleration at accel=100, pen down
+ACCEL_PENUP_MM_S2 = 60.0 * 25.4        # Acceleration at accel=100, pen up
+CORNERING_MM = 0.05                    # Junction deviation used to slow down at corners
+SERVO_SWEEP_TIME = 0.2                 # Seconds for the servo to sweep 0-100% at rate 100
+
+
+def segment_times(lengths, v_entry, v_exit, v_max, accel):
+    """
+    Time to travel straight segments with a trapezoidal velocity profile,
+    for arrays of segment lengths and entry/exit speed limits.
+    """
+    # Entry and exit speeds must be reachable from each other over the segment
+    v_exit = np.minimum(v_exit, np.sqrt(v_entry ** 2 + 2 * accel * lengths))
+    v_entry = np.minimum(v_entry, np.sqrt(v_exit ** 2 + 2 * accel * lengths))
+    peak = np.minimum(v_max, np.sqrt((2 * accel * lengths + v_entry ** 2 + v_exit ** 2) / 2))
+    ramp_distance = (2 * peak ** 2 - v_entry ** 2 - v_exit ** 2) / (2 * accel)
+    cruise = np.maximum(lengths - ramp_distance, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cruise_time = np.where(peak > 0, cruise / peak, 0)
+    return (2 * peak - v_entry - v_exit) / accel + cruise_time
+
+
+def junction_speeds(directions, v_max, accel):
+    """
+    Maximum speed through the vertex between consecutive segment directions
+    (unit vectors), using a junction deviation model.
+    """
+    cos_theta = -np.einsum('ij,ij->i', directions[:-1], directions[1:])
+    sin_half = np.sqrt(np.clip(0.5 * (1 - cos_theta), 0, 1))
+    with np.errstate(divide='ignore'):
+        speed = np.sqrt(accel * CORNERING_MM * sin_half / np.maximum(1 - sin_half, 1e-12))
+    return np.minimum(speed, v_max)
+
+
+def estimate_polylines(polylines, options=None, origin=(0, 0)):
+    """
+    Estimate plot time and pen travel for polylines in millimeters, drawn in
+    order starting and ending at origin.
+
+    Args:
+        polylines (Drawing or list): Pen-down paths in millimeters, as a
+            Drawing or a list of (N, 2) arrays.
+        options (dict): NextDraw style options overriding PLOT_OPTIONS and
+            MOTION_DEFAULTS.
+        origin (tuple): Home position of the pen.
+
+    Returns:
+        dict: A dictionary containing the estimate:
+            - 'time_estimate': Plot time in seconds
+            - 'distance_pendown': Pen-down travel in meters
+            - 'distance_penup': Pen-up travel in meters
+    """
+    options = dict(MOTION_DEFAULTS, **PLOT_OPTIONS, **(options or {}))
+    v_down = MAX_SPEED_MM_S * options['speed_pendown'] / 100
+    v_up = MAX_SPEED_MM_S * options['speed_penup'] / 100
+    a_down = ACCEL_PENDOWN_MM_S2 * options['accel'] / 100
+    a_up = ACCEL_PENUP_MM_S2 * options['accel'] / 100
+
+    drawing = polylines if isinstance(polylines, Drawing) else Drawing.from_polylines(polylines)
+    origin = np.asarray(origin, dtype=float).reshape(1, 2)
+    if not len(drawing):
+        return {'time_estimate': 0.0, 'distance_pendown': 0.0, 'distance_penup': 0.0}
+
+    # Pen-down: all segments of all polylines at once. Speed is zero at the
+    # start and end of every polyline, where the pen is raised or lowered.
+    p0, p1, segment_polyline = drawing.segments()
+    deltas = p1 - p0
+    lengths = np.hypot(*deltas.T)
+    # Drop zero length segments
+    keep = lengths > 1e-9
+    deltas, lengths, segment_polyline = deltas[keep], lengths[keep], segment_polyline[keep]
+
+    if len(lengths):
+        directions = deltas / lengths[:, None]
+        same_polyline = segment_polyline[1:] == segment_polyline[:-1]
+        junction = np.where(same_polyline, junction_speeds(directions, v_down, a_down), 0)
+        v_entry = np.concatenate([[0], junction])
+        v_exit = np.concatenate([junction, [0]])
+        down_time = segment_times(lengths, v_entry, v_exit, v_down, a_down).sum()
+    else:
+        down_time = 0.0
+    distance_down = lengths.sum()
+
+    # Pen-up: straight moves from home, between polylines and back home,
+    # each starting and ending at rest
+    starts, ends = drawing.starts(), drawing.ends()
+    moves = np.hypot(*(np.vstack([starts, origin]) - np.vstack([origin, ends])).T)
+    zeros = np.zeros(len(moves))
+    up_time = segment_times(moves, zeros, zeros, v_up, a_up).sum()
+
+    # Servo moves: lower and raise once per polyline
+    servo_travel = abs(options['pen_pos_up'] - options['pen_pos_down']) / 100
+    lower_time = SERVO_SWEEP_TIME * servo_travel / (options['pen_rate_lower'] / 100)
+    raise_time = SERVO_SWEEP_TIME * servo_travel / (options['pen_rate_upper'] / 100)
+    servo_time = len(drawing) * (lower_time + raise_time)
+
+    return {
+        'time_estimate': float(down_time + up_time + servo_time),
+        'distance_pendown': float(distance_down) / 1000,
+        'distance_penup': float(moves.sum()) / 1000,
+    }
+
+
+def estimate_plot(svg_file_path, options=None):
+    """
+    Estimate the plot time and pen travel of an SVG file (or an already
+    loaded Drawing) analytically.
+    """
+    if isinstance(svg_file_path, Drawing):
+        drawing = svg_file_path
+    else:
+        with span('parse'):
+            drawing = load_drawing(svg_file_path)
+    with span('compute'):
+        return estimate_polylines(drawing, options)
+
+
+def estimate_plot_nextdraw(svg_file_path, options=None):
+    """
+    Get the plot time and pen-down travel of an SVG file (or Drawing) from
+    a full NextDraw preview simulation. Exact but slow on dense artwork.
+    NextDraw doesn't report pen-up travel, so 'distance_penup' is None.
+    """
+    from nextdraw import NextDraw
+
+    if isinstance(svg_file_path, Drawing):
+        # NextDraw reads files only
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'drawing.svg')
+            svg_file_path.to_svg(path)
+            return estimate_plot_nextdraw(path, options)
+
+    options = dict(PLOT_OPTIONS, **(options or {}))
+    nd1 = NextDraw()
+    nd1.plot_setup(svg_file_path)
+    nd1.options.preview = True
+    nd1.options.report_time = True
+    for name, value in options.items():
+        setattr(nd1.options, name, value)
+    nd1.plot_run()
+
+    return {
+        'time_estimate': nd1.time_estimate,
+        'distance_pendown': nd1.distance_pendown,
+        'distance_penup': None,
+    }
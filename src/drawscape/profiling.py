@@ -0,0 +1,153 @@
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Process-wide settings: quiet drops status messages, profile collects spans
+_settings = {'quiet': False, 'profile': None}
+
+# Keeps messages of concurrent workers on separate lines
+_log_lock = threading.Lock()
+
+# Returned by span() when nothing is being profiled, so spans cost nothing
+_NO_SPAN = nullcontext()
+
+
+def set_quiet(quiet):
+    """
+    Turn status messages (see log) off or on. Errors and warnings are
+    still printed.
+    """
+    _settings['quiet'] = bool(quiet)
+
+
+def log(*args, error=False):
+    """
+    Print a status message, unless quiet mode is on. Errors (error=True)
+    are printed in quiet mode too.
+    """
+    if error or not _settings['quiet']:
+        with _log_lock:
+            print(*args)
+
+
+class Profile:
+    """
+    Wall time and peak traced memory (Python and NumPy allocations) of named
+    spans. Spans nest per thread, so a span is recorded under its path, e.g.
+    'pipeline/svglines/compute'. Repeated spans add up their time and keep
+    the highest peak.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.spans = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _fold_peak(self):
+        # Credit the traced peak so far to every open span before it is reset
+        import tracemalloc
+
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack():
+            frame['peak'] = max(frame['peak'], peak)
+
+    @contextmanager
+    def span(self, name):
+        import tracemalloc
+
+        stack = self._stack()
+        if stack:
+            name = f"{stack[-1]['name']}/{name}"
+        frame = {'name': name, 'peak': 0, 'base': 0}
+        if self.memory:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            frame['base'] = frame['peak'] = tracemalloc.get_traced_memory()[0]
+        with self._lock:
+            # Created on entry so spans are listed in the order they start
+            record = self.spans.setdefault(frame['name'], {'name': frame['name'], 'calls': 0, 'seconds': 0.0, 'peak_kb': 0.0})
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if self.memory:
+                self._fold_peak()
+            stack.pop()
+            with self._lock:
+                record['calls'] += 1
+                record['seconds'] += seconds
+                record['peak_kb'] = max(record['peak_kb'], (frame['peak'] - frame['base']) / 1024)
+
+    def report(self):
+        return list(self.spans.values())
+
+
+def span(name):
+    """
+    Time a stage of an action, such as 'parse', 'compute', 'serialize' or
+    'io', while profiling (see profiled). Otherwise this does nothing.
+
+    Example:
+        with span('parse'):
+            tree = ET.parse(path)
+    """
+    profile = _settings['profile']
+    return profile.span(name) if profile else _NO_SPAN
+
+
+@contextmanager
+def profiled(action, profile_path=None, stats_path=None):
+    """
+    Profile everything run inside: write the timings and peak memory of all
+    spans as JSON to profile_path and/or a cProfile dump (for pstats or
+    snakeviz) to stats_path. Does nothing if neither is given.
+
+    Memory is traced with tracemalloc, which slows down allocation-heavy
+    code, so only compare timings between runs profiled the same way.
+    """
+    if not profile_path and not stats_path:
+        yield
+        return
+
+    import json
+    import tracemalloc
+
+    profile = Profile(memory=bool(profile_path))
+    _settings['profile'] = profile
+    profiler = None
+    if stats_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    if profile.memory:
+        tracemalloc.start()
+    try:
+        if profiler:
+            profiler.enable()
+        with profile.span(action):
+            yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(stats_path)
+            log(f"cProfile stats saved to {stats_path}")
+        if profile.memory:
+            tracemalloc.stop()
+        _settings['profile'] = None
+        if profile_path:
+            spans = profile.report()
+            with open(profile_path, 'w') as f:
+                json.dump({
+                    'action': action,
+                    'seconds': spans[0]['seconds'] if spans else 0.0,
+                    'peak_kb': spans[0]['peak_kb'] if spans else 0.0,
+                    'spans': spans,
+                }, f, indent=2)
+            log(f"Profile saved to {profile_path}")
@@ -0,0 +1,269 @@
+import os
+import time
+import random
+import threading
+from .profiling import log, span
+
+# remove.bg API endpoint. $REMOVEBG_URL points the client elsewhere, such as
+# a local stub server for benchmarks.
+REMOVEBG_URL = 'https://api.remove.bg/v1.0/removebg'
+
+# Retry policy for rate limited (429) and failed (5xx, network) requests
+DEFAULT_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Concurrent requests of a batch when --workers isn't given
+DEFAULT_WORKERS = 4
+
+# Seconds to wait for the API to connect and to send data
+REQUEST_TIMEOUT = (10, 120)
+
+CHUNK_SIZE = 1 << 16
+
+
+class RateLimiter:
+    """
+    Request pacing shared by all workers of a batch: at most `rate` requests
+    start per second (no limit if None), and when the API answers 429 every
+    worker holds off until its retry time has passed.
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """
+        Block until the next request may start.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, seconds):
+        """
+        Hold off all requests for the given number of seconds.
+        """
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying. The API's Retry-After or
+    X-RateLimit-Reset header wins, otherwise exponential backoff with jitter.
+    """
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset:
+            try:
+                return max(float(reset) - time.time(), 0.0)
+            except ValueError:
+                pass
+    backoff = min(BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS)
+    return backoff * random.uniform(0.5, 1.0)
+
+
+def create_session(pool_size=DEFAULT_WORKERS):
+    """
+    Create a requests session that keeps up to pool_size connections open
+    for reuse across requests.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def output_path_for(image_path, output_dir=None):
+    """
+    Default output path of an image: <stem>_removebg.png next to it, or in
+    output_dir.
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(output_dir or os.path.dirname(image_path), f"{stem}_removebg.png")
+
+
+def remove_background(image_path, output_path=None, session=None, url=None, api_key=None,
+                      retries=DEFAULT_RETRIES, limiter=None):
+    """
+    Remove the background of an image with the remove.bg API.
+
+    The response is streamed to a temporary file next to the output and
+    renamed into place once complete, so an existing output is always a
+    whole image. Rate limited and failed requests are retried.
+
+    Args:
+        image_path (str or file): Path to the input image, or a binary file
+            object to upload from memory.
+        output_path (str or file): Path to write the PNG to (optional), or
+            a binary file object to write it to instead.
+        session (Session): requests session to send the request with
+            (default: a new one).
+        url (str): API endpoint (default: $REMOVEBG_URL or the remove.bg API).
+        api_key (str): API key (default: $REMOVEBG_KEY, also read from .env).
+        retries (int): Number of retries after the first attempt.
+        limiter (RateLimiter): Pacing shared with other workers (optional).
+
+    Returns:
+        str: Path to the output image (or the output file object), or None
+        if the request failed.
+    """
+    import contextlib
+    import requests
+
+    to_stream = hasattr(output_path, 'write')
+    if not output_path:
+        output_path = os.path.splitext(image_path)[0] + "_removebg.png"
+    url = url or os.getenv('REMOVEBG_URL') or REMOVEBG_URL
+    if api_key is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_key = os.getenv('REMOVEBG_KEY')
+
+    own_session = session is None
+    if own_session:
+        session = create_session(1)
+    partial_path = None if to_stream else f"{output_path}.part"
+
+    try:
+        for attempt in range(retries + 1):
+            if limiter:
+                limiter.wait()
+            response = None
+            try:
+                with span('io'):
+                    if hasattr(image_path, 'read'):
+                        image_path.seek(0)
+                    with open(image_path, 'rb') if isinstance(image_path, str) else contextlib.nullcontext(image_path) as image:
+                        response = session.post(
+                            url,
+                            files={'image_file': image},
+                            data={'size': 'auto', 'crop': 'true'},
+                            headers={'X-Api-Key': api_key},
+                            stream=True,
+                            timeout=REQUEST_TIMEOUT,
+                        )
+                    with response:
+                        if response.status_code == requests.codes.ok and to_stream:
+                            # Start over in case an earlier attempt broke off mid-stream
+                            output_path.seek(0)
+                            output_path.truncate()
+                            for chunk in response.iter_content(CHUNK_SIZE):
+                                output_path.write(chunk)
+                            return output_path
+                        if response.status_code == requests.codes.ok:
+                            with open(partial_path, 'wb') as out:
+                                for chunk in response.iter_content(CHUNK_SIZE):
+                                    out.write(chunk)
+                            os.replace(partial_path, output_path)
+                            log(f"Image saved to {output_path}")
+                            return output_path
+                        if response.status_code not in RETRY_STATUS or attempt == retries:
+                            log("Error:", response.status_code, response.text, error=True)
+                            return None
+                        # Read the error body so the connection can be reused
+                        response.content
+            except requests.RequestException as e:
+                if attempt == retries:
+                    log(f"Error: {e}", error=True)
+                    return None
+
+            delay = retry_delay(response, attempt)
+            if limiter and response is not None and response.status_code == 429:
+                # Slow down every worker, not just this one
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+    finally:
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+        if own_session:
+            session.close()
+
+
+def remove_backgrounds(image_paths, output_dir=None, workers=None, rate=None, retries=DEFAULT_RETRIES,
+                       overwrite=False, url=None, api_key=None):
+    """
+    Remove the background of many images concurrently.
+
+    Requests run on a thread pool and share one pooled session, so
+    connections are reused instead of opened per image, and one rate
+    limiter. Images whose output already exists are skipped unless
+    overwrite is set, so an interrupted batch can be re-run.
+
+    Args:
+        image_paths (list): Input images. Earlier *_removebg.png outputs
+            are ignored.
+        output_dir (str): Directory to write the outputs to (default: next
+            to each input).
+        workers (int): Number of concurrent requests.
+        rate (float): Maximum requests started per second (optional).
+        retries, url, api_key: See remove_background.
+        overwrite (bool): Process images even if their output exists.
+
+    Returns:
+        dict: A dictionary containing the batch results:
+            - 'saved': Output paths written
+            - 'skipped': Inputs whose output already existed
+            - 'failed': Inputs that failed after all retries
+            - 'seconds': Wall time of the batch
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    start = time.perf_counter()
+    workers = workers or DEFAULT_WORKERS
+    if api_key is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_key = os.getenv('REMOVEBG_KEY')
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs, skipped = [], []
+    for image_path in image_paths:
+        if image_path.endswith('_removebg.png'):
+            continue
+        output_path = output_path_for(image_path, output_dir)
+        if not overwrite and os.path.exists(output_path):
+            skipped.append(image_path)
+        else:
+            jobs.append((image_path, output_path))
+
+    saved, failed = [], []
+    limiter = RateLimiter(rate)
+    with create_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(remove_background, image_path, output_path, session, url, api_key, retries, limiter): image_path
+            for image_path, output_path in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                log(f"Error: {futures[future]}: {e}", error=True)
+                result = None
+            if result:
+                saved.append(result)
+            else:
+                failed.append(futures[future])
+
+    seconds = time.perf_counter() - start
+    log(f"Background removal: {len(saved)} saved, {len(skipped)} skipped, {len(failed)} failed in {seconds:.1f}s")
+    return {'saved': saved, 'skipped': skipped, 'failed': failed, 'seconds': seconds}
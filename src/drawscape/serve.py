@@ -0,0 +1,225 @@
+import os
+import json
+import socketserver
+import itertools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor, wait
+from .profiling import log
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8617
+
+# Imported by every worker before its first request, so requests don't pay
+# for them. Missing optional dependencies are skipped.
+WARM_MODULES = ['.shipping', '.blueprint', '.blueprint_label', '.svg_utils', '.trim', '.split',
+                '.optimize', '.pipeline', 'vpype_cli', 'nextdraw']
+
+# Extension of the temporary output of an inline request
+INLINE_EXTENSIONS = {'removebg': '.png', 'trim': '.png'}
+
+
+def warm_up():
+    """
+    Pool initializer: import the action modules and load the default font.
+    """
+    import importlib
+    from .text import get_font
+
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name, __package__)
+        except ImportError:
+            pass
+    get_font()
+
+
+def check_request(request):
+    """
+    Check that a decoded request names an action that can be served.
+
+    Raises:
+        ValueError: If the request can't be run.
+    """
+    from .main import ACTIONS, UNSERVED_ACTIONS
+
+    if not isinstance(request, dict):
+        raise ValueError("Request must be a JSON object")
+    action = request.get('action')
+    if action not in ACTIONS or action in UNSERVED_ACTIONS:
+        raise ValueError(f"Unknown action {action!r}")
+    required, _ = ACTIONS[action]
+    if required and not request.get(required):
+        raise ValueError(f"{required} is required for {action} action")
+
+
+def render(request, job_defaults=None):
+    """
+    Run one request in a pool worker.
+
+    The request is a job like a batch manifest row: an 'action' plus any CLI
+    arguments by attribute name. 'json' may also be the label data itself
+    instead of a file path. With 'inline' set, the output is written to a
+    temporary directory and its SVG text returned instead of a path.
+
+    Returns:
+        dict: The job report of batch.run_job, plus 'svg' (file name -> SVG
+        text of each written SVG) for inline requests.
+    """
+    import tempfile
+    from .batch import run_job
+
+    job = dict(job_defaults or {}, **request)
+    inline = job.pop('inline', False)
+    with tempfile.TemporaryDirectory(prefix='drawscape-') as tmp:
+        data = job.get('json')
+        if isinstance(data, dict):
+            job['json'] = os.path.join(tmp, 'data.json')
+            with open(job['json'], 'w') as f:
+                json.dump(data, f)
+        in_tmp = inline and not job.get('output')
+        if in_tmp:
+            job['output'] = os.path.join(tmp, job['action'] + INLINE_EXTENSIONS.get(job['action'], '.svg'))
+
+        report = run_job(job)
+        report['json'] = data
+        # Only echo what was requested
+        for name in job_defaults or {}:
+            if name not in request:
+                del report[name]
+
+        if inline and report['status'] == 'ok':
+            result = report['result']
+            paths = result if isinstance(result, (list, tuple)) else [result]
+            report['svg'] = {}
+            for path in paths:
+                if isinstance(path, str) and path.endswith('.svg') and os.path.exists(path):
+                    with open(path, 'r') as f:
+                        report['svg'][os.path.basename(path)] = f.read()
+        if in_tmp:
+            # The files are gone once the response is sent
+            report['output'] = report['result'] = None
+    return report
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """
+    POST / with a JSON request runs it (see render). GET /health reports
+    that the server is up.
+    """
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'workers': self.server.workers})
+        else:
+            self._send(404, {'error': f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ('/', '/render'):
+            self._send(404, {'error': f"Not found: {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            check_request(request)
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+
+        request['id'] = next(self.server.job_ids)
+        try:
+            report = self.server.pool.submit(render, request, self.server.job_defaults).result()
+        except Exception as e:
+            # E.g. a worker was killed, which breaks the pool
+            print(f"Error: [{request['id']}] {type(e).__name__}: {e}")
+            self._send(500, {'id': request['id'], 'action': request['action'], 'status': 'error',
+                             'error': f"{type(e).__name__}: {e}"})
+            return
+        message = f"[{report['id']}] {report['action']} {report['status']} in {report['seconds'] * 1000:.1f}ms"
+        if report['status'] == 'ok':
+            log(message)
+        else:
+            print(message + (f": {report['error']}" if report['error'] else ''))
+        # 'failed' actions reported their own error, 'error' ones raised
+        self._send({'ok': 200, 'failed': 422}.get(report['status'], 500), report)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Requests are logged by do_POST
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # Unix sockets have no client address, the handler expects one
+        request, _ = super().get_request()
+        return request, ('local', 0)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, workers=None, job_defaults=None):
+    """
+    Create a render server with a warmed-up worker pool. The caller runs it
+    with serve_forever() and must call server.pool.shutdown() when done.
+
+    Args:
+        host (str): Interface to listen on (localhost by default).
+        port (int): TCP port, 0 picks a free one.
+        socket_path (str): Listen on this unix socket instead of TCP.
+        workers (int): Number of worker processes (default: CPU count).
+        job_defaults (dict): Arguments applied to requests that don't set
+            them, e.g. the server's own cache and quiet options.
+
+    Returns:
+        socketserver.BaseServer: The server, with its pool attached.
+    """
+    workers = workers or os.cpu_count() or 1
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, RenderHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RenderHandler)
+        server.daemon_threads = True
+
+    server.workers = workers
+    server.job_defaults = job_defaults or {}
+    server.job_ids = itertools.count()
+    server.pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+    # Start every worker now rather than on the first requests
+    wait([server.pool.submit(os.getpid) for _ in range(workers)])
+    return server
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, workers=None, job_defaults=None):
+    """
+    Serve render requests until interrupted or terminated. See create_server.
+    """
+    import signal
+
+    server = create_server(host, port, socket_path, workers, job_defaults)
+    # Shut down cleanly when stopped by a service manager too
+    signal.signal(signal.SIGTERM, _stop)
+    address = socket_path or f"http://{server.server_address[0]}:{server.server_address[1]}"
+    log(f"Serving on {address} with {server.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+        log("Server stopped")
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+    return address
@@ -1,7 +1,11 @@
-import svgwrite
+import csv
 import json
-from HersheyFonts import HersheyFonts
 import os
+import re
+from functools import lru_cache
+from .svg_writer import SVGWriter, DEFAULT_PRECISION
+from .text import text_layout, text_path_data
+from .profiling import log, span
 
 # Constants for return shipping information
 RETURN_NAME = "Drawscape, Inc"
@@ -13,14 +17,17 @@ LABEL_WIDTH = 292.1  # 11.5 inches in mm
 LABEL_HEIGHT = 215.9  # 8.5 inches in mm
 PADDING = 10  # 10mm padding
 
-def create_shipping_label(json_file_path, output_path='shipping_label.svg'):
-    print(f"Starting to create shipping label...")
-    print(f"JSON file path: {json_file_path}")
-    print(f"Output path: {output_path}")
+# Recipient fields, one text line each
+RECIPIENT_FIELDS = ['to_name', 'to_address', 'to_city']
 
-    # Initialize Hershey Font
-    thefont = HersheyFonts()
-    thefont.load_default_font('futural')
+# Characters of recipient fields replaced in file names
+UNSAFE_FILENAME_RE = re.compile(r'[^\w.-]+')
+
+
+def create_shipping_label(json_file_path, output_path='shipping_label.svg', precision=DEFAULT_PRECISION):
+    log(f"Starting to create shipping label...")
+    log(f"JSON file path: {json_file_path}")
+    log(f"Output path: {output_path}")
 
     # Load shipping information from JSON file
     try:
@@ -33,22 +40,55 @@ def create_shipping_label(json_file_path, output_path='shipping_label.svg'):
         print(f"Error: Invalid JSON format in file {json_file_path}")
         return None
 
-    # Set variables for shipping information
-    to_name = shipping_info.get('to_name', 'N/A')
-    to_address = shipping_info.get('to_address', 'N/A')
-    to_city = shipping_info.get('to_city', 'N/A')
-    
+    # Create a new SVG drawing (landscape orientation) with padding,
+    # streamed straight to the output file
+    try:
+        with span('serialize'), open(output_path, 'w') as f:
+            svg = SVGWriter(f, precision=precision)
+            with svg.document(width=f'{LABEL_WIDTH}mm', height=f'{LABEL_HEIGHT}mm', viewBox=f'0 0 {LABEL_WIDTH} {LABEL_HEIGHT}'):
+                write_label(svg, shipping_info)
+        log(f"Successfully saved shipping label: {output_path}")
+    except Exception as e:
+        print(f"Error saving SVG file: {str(e)}")
+        return None
+
+    if os.path.exists(output_path):
+        log(f"Verified: File exists at {output_path}")
+        log(f"File size: {os.path.getsize(output_path)} bytes")
+    else:
+        print(f"Warning: File not found at {output_path}")
 
-    # Create a new SVG drawing (landscape orientation) with padding
-    dwg = svgwrite.Drawing(output_path, size=(f'{LABEL_WIDTH}mm', f'{LABEL_HEIGHT}mm'), viewBox=f'0 0 {LABEL_WIDTH} {LABEL_HEIGHT}')
+    return output_path
 
-    # Add return address in top left corner, with padding
+
+@lru_cache(maxsize=None)
+def return_block():
+    """
+    The return address lines as (x, y, scale, path data). They are the same
+    on every label, so they are laid out once per process.
+    """
+    # Top left corner, with padding
     scale_factor = .13
     line_spacing = 7 #millimieters
-    
-    for i, text in enumerate([RETURN_NAME, RETURN_ADDRESS, RETURN_CITY], start=1):
-        y_offset = line_spacing * i
-        add_hershey_text(dwg, thefont, text, PADDING, y_offset + PADDING, scale=scale_factor)
+
+    return tuple(
+        (PADDING, line_spacing * i + PADDING, scale_factor, text_path_data(text))
+        for i, text in enumerate([RETURN_NAME, RETURN_ADDRESS, RETURN_CITY], start=1)
+    )
+
+
+def write_label(svg, shipping_info):
+    """
+    Write the return and recipient addresses of one label to an open
+    SVGWriter, in label millimeters.
+
+    Args:
+        svg (SVGWriter): Writer inside an open document or group.
+        shipping_info (dict): The 'to_name', 'to_address' and 'to_city'
+            lines. Missing or empty lines are written as N/A.
+    """
+    for x, y, scale, path_data in return_block():
+        add_path_data(svg, path_data, x, y, scale)
 
     # Add recipient address in the center of the document
     center_x = LABEL_WIDTH / 2
@@ -56,72 +96,141 @@ def create_shipping_label(json_file_path, output_path='shipping_label.svg'):
     scale_factor = .25
     line_spacing = 10  # millimeters
 
-    for i, text in enumerate([to_name, to_address, to_city], start=1):
+    for i, field in enumerate(RECIPIENT_FIELDS, start=1):
+        value = shipping_info.get(field)
+        text = 'N/A' if value is None or str(value).strip() == '' else str(value)
         y_offset = line_spacing * i
-        text_bbox = get_text_bounding_box(text, thefont)
-        text_width = text_bbox['width'] * scale_factor
+        text_width = text_layout(text).width * scale_factor
         text_x = center_x - (text_width / 2)
-        add_hershey_text(dwg, thefont, text, text_x, center_y + y_offset, scale=scale_factor)
+        add_hershey_text(svg, text, text_x, center_y + y_offset, scale=scale_factor)
 
-    # Save the SVG file
-    try:
-        dwg.save()
-        print(f"Successfully saved shipping label: {output_path}")
-    except Exception as e:
-        print(f"Error saving SVG file: {str(e)}")
-        return None
 
-    if os.path.exists(output_path):
-        print(f"Verified: File exists at {output_path}")
-        print(f"File size: {os.path.getsize(output_path)} bytes")
-    else:
-        print(f"Warning: File not found at {output_path}")
+def load_recipients(path):
+    """
+    Load recipients from a CSV file (one row per label, with a column per
+    recipient field), a JSONL file (one object per line) or a JSON file
+    holding a list of objects.
 
-    return output_path
+    Returns:
+        list: Recipient dictionaries.
+    """
+    if path.endswith('.csv'):
+        with open(path, 'r', newline='') as f:
+            return list(csv.DictReader(f))
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        recipients = json.load(f)
+    return recipients if isinstance(recipients, list) else [recipients]
 
-# Function to add Hershey Text
-def add_hershey_text(dwg, thefont, text, x=0, y=0, scale=1):
-    group = svgwrite.container.Group(transform=f'translate({x}, {y}) scale({scale})')
-    for line in thefont.lines_for_text(text):
-        path_data = "M" + " L".join(f"{x},{y}" for x, y in line)
-        group.add(dwg.path(d=path_data, fill="none", stroke="black", stroke_width="1"))
-    dwg.add(group)
-
-def get_text_bounding_box(text, thefont):
+
+def parse_sheet(text):
+    """
+    Parse a "ROWSxCOLS" label grid such as "2x1".
+
+    Raises:
+        ValueError: If the grid isn't two positive numbers.
+    """
+    try:
+        rows, cols = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"Invalid sheet {text!r}, expected ROWSxCOLS such as 2x1")
+    if rows < 1 or cols < 1:
+        raise ValueError(f"Invalid sheet {text!r}, rows and columns must be at least 1")
+    return rows, cols
+
+
+def create_shipping_labels(recipients_path, output_template=None, sheet=(1, 1), precision=DEFAULT_PRECISION):
     """
-    Calculate the bounding box of a given text using the specified font.
+    Render a shipping label for every recipient of a CSV, JSONL or JSON list
+    file, as one file per label or imposed on multi-up sheets.
 
     Args:
-        text (str): The text to calculate the bounding box for.
-        thefont (Font): The font object used to render the text.
+        recipients_path (str): Recipients file, see load_recipients.
+        output_template (str): Path of each file. {index} is the label (or
+            sheet) number, and files of one label can also use recipient
+            fields such as {to_name}, made safe for file names. A path
+            without fields gets an _{index} suffix. Default:
+            shipping_label_{index}.svg, or shipping_sheet_{index}.svg for
+            sheets.
+        sheet (tuple): (rows, cols) labels per sheet. (1, 1) writes one
+            file per label.
+        precision (int): Decimal places of coordinates.
 
     Returns:
-        dict: A dictionary containing the bounding box information:
-            - 'min_x': Minimum x-coordinate
-            - 'max_x': Maximum x-coordinate
-            - 'min_y': Minimum y-coordinate
-            - 'max_y': Maximum y-coordinate
-            - 'width': Width of the bounding box
-            - 'height': Height of the bounding box
+        list: Paths of the written files, or None if the recipients can't
+        be read. Labels that can't be written are reported and skipped.
+    """
+    try:
+        with span('parse'):
+            recipients = load_recipients(recipients_path)
+    except FileNotFoundError:
+        print(f"Error: Recipients file not found at {recipients_path}")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON format in file {recipients_path}: {e}")
+        return None
+
+    rows, cols = sheet
+    per_sheet = rows * cols
+    if not output_template:
+        output_template = 'shipping_label_{index}.svg' if per_sheet == 1 else 'shipping_sheet_{index}.svg'
+    elif '{' not in output_template:
+        # Every file needs a name of its own
+        stem, ext = os.path.splitext(output_template)
+        output_template = f"{stem}_{{index}}{ext or '.svg'}"
+    width, height = round(LABEL_WIDTH * cols, 2), round(LABEL_HEIGHT * rows, 2)
+
+    written, labels_written = [], 0
+    for index, start in enumerate(range(0, len(recipients), per_sheet)):
+        labels = recipients[start:start + per_sheet]
+        fields = {name: filename_field(value) for name, value in labels[0].items()} if per_sheet == 1 else {}
+        try:
+            # {index} always is the label (or sheet) number
+            output_path = output_template.format_map({**fields, 'index': index})
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            with span('serialize'), open(output_path, 'w') as f:
+                svg = SVGWriter(f, precision=precision)
+                with svg.document(width=f'{width}mm', height=f'{height}mm', viewBox=f'0 0 {width} {height}'):
+                    if per_sheet == 1:
+                        write_label(svg, labels[0])
+                    else:
+                        # Row by row, left to right
+                        for i, shipping_info in enumerate(labels):
+                            row, col = divmod(i, cols)
+                            with svg.group(transform=f'translate({svg.number(col * LABEL_WIDTH)}, {svg.number(row * LABEL_HEIGHT)})'):
+                                write_label(svg, shipping_info)
+        except KeyError as e:
+            print(f"Error: Label {index}: unknown field {e} in output template {output_template}")
+            continue
+        except Exception as e:
+            print(f"Error: Label {index}: {type(e).__name__}: {e}")
+            continue
+        written.append(output_path)
+        labels_written += len(labels)
+
+    log(f"Saved {labels_written} of {len(recipients)} shipping labels to {len(written)} files")
+    return written
+
+
+def filename_field(value):
     """
-    min_x, max_x = float('inf'), float('-inf')
-    min_y, max_y = float('inf'), float('-inf')
-    
-    for line in thefont.lines_for_text(text):
-        for x, y in line:
-            min_x = min(min_x, x)
-            max_x = max(max_x, x)
-            min_y = min(min_y, y)
-            max_y = max(max_y, y)
-    
-    width = max_x - min_x
-    height = max_y - min_y
-    
-    return {
-        'min_x': min_x,
-        'max_x': max_x,
-        'min_y': min_y,
-        'max_y': max_y,
-        'width': width,
-        'height': height
-    }
\ No newline at end of file
+    Make a recipient field safe to use in a file name: runs of characters
+    other than letters, digits, '.', '-' and '_' become '_', and leading or
+    trailing dots are dropped, so a value can't name another directory.
+    """
+    name = UNSAFE_FILENAME_RE.sub('_', '' if value is None else str(value)).strip('._')
+    return name or 'unnamed'
+
+
+# Function to add Hershey Text
+def add_hershey_text(svg, text, x=0, y=0, scale=1):
+    add_path_data(svg, text_path_data(text), x, y, scale)
+
+
+def add_path_data(svg, path_data, x=0, y=0, scale=1):
+    with svg.group(transform=f'translate({svg.number(x)}, {svg.number(y)}) scale({scale})', fill="none", stroke="black", stroke_width="1"):
+        svg.path(path_data)
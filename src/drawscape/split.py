@@ -1,69 +1,209 @@
 import xml.etree.ElementTree as ET
-import re
-import copy
+from .profiling import log, span
+
+# Length of each arm of the registration crosshairs, in millimeters
+REGISTRATION_MARK_MM = 5
+
+
+def tile_rects(bounds, rows, cols, overlap=0):
+    """
+    Split a rectangle into a rows x cols grid of tiles.
+
+    Args:
+        bounds (tuple): (min_x, min_y, width, height) of the area to split.
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        overlap (float): Extra margin added around every tile.
+
+    Returns:
+        array: (rows * cols, 4) rectangles as min_x, min_y, max_x, max_y in
+        row-major order, including the overlap.
+    """
+    import numpy as np
+
+    min_x, min_y, width, height = bounds
+    cols_index, rows_index = np.meshgrid(np.arange(cols), np.arange(rows))
+    left = min_x + cols_index.ravel() * width / cols
+    top = min_y + rows_index.ravel() * height / rows
+    return np.column_stack([left - overlap, top - overlap, left + width / cols + overlap, top + height / rows + overlap])
+
+
+def clip_drawing(drawing, bounds, rows, cols, overlap=0):
+    """
+    Clip a Drawing to every tile of a grid in a single vectorized pass.
+
+    The grid itself is the spatial index: the tiles each segment can touch
+    follow from its bounding box, so every segment is only clipped against
+    those (Liang-Barsky) and nothing is copied into tiles it doesn't reach.
+
+    Args:
+        drawing (Drawing): The polylines to clip, in the units of bounds.
+        bounds, rows, cols, overlap: The grid, see tile_rects.
+
+    Returns:
+        list: A Drawing per tile in row-major order, keeping each clipped
+        path's layer and stroke.
+    """
+    import numpy as np
+    from .geometry import Drawing
+
+    min_x, min_y, width, height = bounds
+    tile_w, tile_h = width / cols, height / rows
+    rects = tile_rects(bounds, rows, cols, overlap)
+    p0, p1, segment_path = drawing.segments()
+    segment_index = np.arange(len(p0))
+
+    # Range of tiles each segment's bounding box can touch
+    low, high = np.minimum(p0, p1), np.maximum(p0, p1)
+    col_lo = np.clip(np.floor((low[:, 0] - min_x - overlap) / tile_w), 0, cols - 1).astype(int)
+    col_hi = np.clip(np.floor((high[:, 0] - min_x + overlap) / tile_w), 0, cols - 1).astype(int)
+    row_lo = np.clip(np.floor((low[:, 1] - min_y - overlap) / tile_h), 0, rows - 1).astype(int)
+    row_hi = np.clip(np.floor((high[:, 1] - min_y + overlap) / tile_h), 0, rows - 1).astype(int)
+    col_count, row_count = col_hi - col_lo + 1, row_hi - row_lo + 1
+
+    # One (segment, tile) pair per candidate tile
+    pair_count = col_count * row_count
+    pair_segment = np.repeat(segment_index, pair_count)
+    offset = np.arange(len(pair_segment)) - np.repeat(np.cumsum(pair_count) - pair_count, pair_count)
+    pair_row = row_lo[pair_segment] + offset // col_count[pair_segment]
+    pair_col = col_lo[pair_segment] + offset % col_count[pair_segment]
+    pair_tile = pair_row * cols + pair_col
+
+    # Liang-Barsky: clip every pair's segment to its tile
+    start, delta = p0[pair_segment], (p1 - p0)[pair_segment]
+    rect = rects[pair_tile]
+    t0, t1 = np.zeros(len(start)), np.ones(len(start))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for axis in range(2):
+            for p, q in [(-delta[:, axis], start[:, axis] - rect[:, axis]), (delta[:, axis], rect[:, axis + 2] - start[:, axis])]:
+                t = q / p
+                parallel = p == 0
+                t0 = np.where(~parallel & (p < 0), np.maximum(t0, t), t0)
+                t1 = np.where(~parallel & (p > 0), np.minimum(t1, t), t1)
+                t1 = np.where(parallel & (q < 0), -1, t1)
+    inside = t0 <= t1
+    # Drop single points where a segment merely touches a tile
+    inside &= (t0 < t1) | ((delta == 0).all(axis=1))
+    pair_segment, pair_tile, start, delta, t0, t1 = (a[inside] for a in (pair_segment, pair_tile, start, delta, t0, t1))
+    clipped_start = start + t0[:, None] * delta
+    clipped_end = start + t1[:, None] * delta
+
+    # Chain consecutive clipped segments of a path within a tile
+    order = np.lexsort([pair_segment, pair_tile])
+    pair_segment, pair_tile, t0, t1 = pair_segment[order], pair_tile[order], t0[order], t1[order]
+    clipped_start, clipped_end = clipped_start[order], clipped_end[order]
+    pair_path = segment_path[pair_segment]
+    continues = np.zeros(len(order), dtype=bool)
+    continues[1:] = ((pair_tile[1:] == pair_tile[:-1]) & (pair_path[1:] == pair_path[:-1])
+                     & (pair_segment[1:] == pair_segment[:-1] + 1) & (t1[:-1] == 1) & (t0[1:] == 0))
+    run_starts = np.flatnonzero(~continues)
+
+    # Every run is its first start point followed by all end points
+    end_position = np.arange(len(order)) + np.cumsum(~continues)
+    run_points = np.empty((len(order) + len(run_starts), 2))
+    run_points[end_position] = clipped_end
+    run_points[end_position[run_starts] - 1] = clipped_start[run_starts]
+    run_offsets = np.append(end_position[run_starts] - 1, len(run_points))
+    run_tile, run_path = pair_tile[run_starts], pair_path[run_starts]
+
+    # Runs are sorted by tile, so every tile is a contiguous slice
+    tile_bounds = np.searchsorted(run_tile, np.arange(rows * cols + 1))
+    tiles = []
+    for first, last in zip(tile_bounds[:-1].tolist(), tile_bounds[1:].tolist()):
+        offsets = run_offsets[first:last + 1]
+        tiles.append(Drawing(run_points[offsets[0]:offsets[-1]], offsets - offsets[0],
+                             drawing.layers[run_path[first:last]], drawing.strokes[run_path[first:last]],
+                             drawing.palette, drawing.width, drawing.height))
+    return tiles
+
+
+def registration_marks(rect, size):
+    """
+    Crosshairs centered on the corners of a tile's rectangle (without
+    overlap), as (x1, y1, x2, y2) line segments.
+    """
+    min_x, min_y, max_x, max_y = rect
+    marks = []
+    for x, y in [(min_x, min_y), (max_x, min_y), (min_x, max_y), (max_x, max_y)]:
+        marks.append((x - size, y, x + size, y))
+        marks.append((x, y - size, x, y + size))
+    return marks
+
+
+def tile_paths(base_name, rows, cols):
+    """
+    Output paths for every tile: the classic _upper/_lower names for a
+    vertical split in two, _r<row>c<col> otherwise.
+    """
+    if (rows, cols) == (2, 1):
+        return [f"{base_name}_upper.svg", f"{base_name}_lower.svg"]
+    return [f"{base_name}_r{row + 1}c{col + 1}.svg" for row in range(rows) for col in range(cols)]
+
+
+def split_svg(svg_file_path, output_path=None, rows=2, cols=1, overlap=0, marks=False, precision=3):
+    """
+    Split an SVG into a grid of tiles, one SVG per sheet.
+
+    Every drawn shape is flattened to polylines (with nested transforms
+    applied, see geometry.Drawing) and clipped exactly at the tile edges, so
+    no line is drawn twice except within the optional overlap. Paths keep
+    their layer and stroke.
+
+    Args:
+        svg_file_path (str): Path to the SVG file.
+        output_path (str): Base name for the tile files (optional).
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        overlap (float): Margin in millimeters that each tile extends
+            into its neighbours.
+        marks (bool): Draw registration crosshairs at the tile corners.
+        precision (int): Decimal places of the coordinates.
+
+    Returns:
+        tuple: Paths of the tile files in row-major order.
+    """
+    import numpy as np
+    from .geometry import Drawing, load_drawing
 
-def split_svg(svg_file_path):
     try:
-        # Parse the SVG file
-        tree = ET.parse(svg_file_path)
-        root = tree.getroot()
-
-        # Get viewBox and calculate middle point
-        viewBox = root.get('viewBox')
-        if not viewBox:
-            raise ValueError("ViewBox is required for this operation")
-        min_x, min_y, width, height = map(float, viewBox.split())
-        mid_y = min_y + height / 2
-
-        print(f"ViewBox: {viewBox}")
-        print(f"Middle Y: {mid_y}")
-
-        # Create new SVG roots for upper and lower halves
-        upper_root = ET.Element('svg', root.attrib)
-        lower_root = ET.Element('svg', root.attrib)
-
-        # Function to extract y-coordinate from path data
-        def extract_y_from_path(d):
-            match = re.search(r'[Mm]\s*[-+]?[0-9]*\.?[0-9]+\s+([-+]?[0-9]*\.?[0-9]+)', d)
-            return float(match.group(1)) if match else None
-
-        # Function to determine y-coordinate of an element
-        def get_y_coordinate(elem):
-            if 'y' in elem.attrib:
-                return float(elem.attrib['y'])
-            elif elem.tag.endswith('path'):
-                return extract_y_from_path(elem.get('d', ''))
-            elif 'transform' in elem.attrib:
-                transform = elem.get('transform')
-                if 'translate' in transform:
-                    match = re.search(r'translate\([^,]+,\s*([-+]?[0-9]*\.?[0-9]+)', transform)
-                    if match:
-                        return float(match.group(1))
-            return None
-
-        # Iterate through all elements and add to appropriate SVG
-        for elem in root:
-            y = get_y_coordinate(elem)
-            if y is not None:
-                if y < mid_y:
-                    upper_root.append(copy.deepcopy(elem))
-                else:
-                    lower_root.append(copy.deepcopy(elem))
-            else:
-                # If y-coordinate can't be determined, add to both
-                upper_root.append(copy.deepcopy(elem))
-                lower_root.append(copy.deepcopy(elem))
-
-        # Write the new SVG files
-        base_name = svg_file_path.rsplit('.', 1)[0]
-        upper_path = f"{base_name}_upper.svg"
-        lower_path = f"{base_name}_lower.svg"
-
-        ET.ElementTree(upper_root).write(upper_path, encoding="unicode", xml_declaration=True)
-        ET.ElementTree(lower_root).write(lower_path, encoding="unicode", xml_declaration=True)
-
-        print(f"Upper half saved to: {upper_path}")
-        print(f"Lower half saved to: {lower_path}")
+        if rows < 1 or cols < 1:
+            raise ValueError("Rows and columns must be at least 1")
+
+        # Flatten every drawn shape into millimeters on the page
+        with span('parse'):
+            drawing = load_drawing(svg_file_path)
+        if drawing.width <= 0 or drawing.height <= 0:
+            raise ValueError("ViewBox or width and height are required for this operation")
+        page = (0, 0, drawing.width, drawing.height)
+
+        log(f"Page: {drawing.width:.2f} x {drawing.height:.2f} mm")
+        log(f"Tiles: {rows} x {cols}, overlap {overlap} mm")
+
+        with span('compute'):
+            tiles = clip_drawing(drawing, page, rows, cols, overlap)
+        rects = tile_rects(page, rows, cols, overlap)
+        nominal = tile_rects(page, rows, cols)
+
+        # output_path, if given, is used as the base name for all tiles
+        base_name = (output_path or svg_file_path).rsplit('.', 1)[0]
+        paths = tile_paths(base_name, rows, cols)
+
+        for path, tile, rect, nominal_rect in zip(paths, tiles, rects, nominal):
+            path_count = len(tile)
+            if marks:
+                # Registration marks go on a layer of their own
+                crosshairs = [np.reshape(mark, (2, 2)) for mark in registration_marks(nominal_rect, REGISTRATION_MARK_MM)]
+                mark_layer = int(drawing.layers.max(initial=0)) + 1
+                tile = Drawing.from_polylines(tile.paths() + crosshairs,
+                                              np.append(tile.layers, [mark_layer] * len(crosshairs)),
+                                              np.append(tile.strokes, [-1] * len(crosshairs)),
+                                              tile.palette, tile.width, tile.height)
+            min_x, min_y, max_x, max_y = rect
+            with span('serialize'):
+                tile.to_svg(path, viewBox=(min_x, min_y, max_x - min_x, max_y - min_y), precision=precision)
+            log(f"Tile saved to: {path} ({path_count} paths)")
+
+        return tuple(paths)
 
     except ET.ParseError:
         print(f"Error: Unable to parse the SVG file at {svg_file_path}")
@@ -72,4 +212,4 @@ def split_svg(svg_file_path):
     except ValueError as e:
         print(f"Error: {e}")
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
\ No newline at end of file
+        print(f"An unexpected error occurred: {e}")
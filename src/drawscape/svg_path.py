@@ -0,0 +1,666 @@
+import re
+import math
+import numpy as np
+import xml.etree.ElementTree as ET
+
+# Number in SVG path data, e.g. "10", "-.5", "1e-3"
+NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+NUMBER_RE = re.compile(NUMBER)
+COMMAND_RE = re.compile(r'([MmZzLlHhVvCcSsQqTtAa])')
+# Arc flags are single digits that may be packed without separators ("a5 5 0 015 5")
+ARC_RE = re.compile(rf'({NUMBER})[\s,]*({NUMBER})[\s,]*({NUMBER})[\s,]*([01])[\s,]*([01])[\s,]*({NUMBER})[\s,]*({NUMBER})')
+# Path data made of absolute moves and lines only, as plotter tools write it
+LINES_ONLY_RE = re.compile(r'\s*M[ML\d\s,.eE+-]*')
+TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+
+# Default flattening tolerance for curves, in user units
+FLATTEN_TOLERANCE = 0.1
+
+# Elements whose content is never drawn directly
+NON_RENDERED = {'defs', 'clipPath', 'mask', 'marker', 'pattern', 'symbol', 'metadata', 'title', 'desc', 'style', 'script'}
+
+# Units to millimeters, at 96 DPI for px
+UNITS_TO_MM = {
+    '': 25.4 / 96,
+    'px': 25.4 / 96,
+    'pt': 25.4 / 72,
+    'pc': 25.4 / 6,
+    'mm': 1.0,
+    'cm': 10.0,
+    'in': 25.4,
+}
+
+
+def parse_length(value, default=None):
+    """
+    Split an SVG length such as "210mm" into (number, unit).
+    """
+    if value is None:
+        return default
+    match = re.match(rf'\s*({NUMBER})\s*([a-z%]*)', value)
+    if not match:
+        return default
+    return float(match.group(1)), match.group(2)
+
+
+def length_to_mm(value):
+    """
+    Convert an SVG length such as "8.5in" to millimeters. Returns None for
+    missing, unparsable or percentage lengths.
+    """
+    length = parse_length(value)
+    if length is None or length[1] not in UNITS_TO_MM:
+        return None
+    return length[0] * UNITS_TO_MM[length[1]]
+
+
+def path_commands(d):
+    """
+    Split path data into (command, arguments) pairs. Arguments are float
+    arrays; for arcs every row holds the 7 parameters of one segment.
+    """
+    parts = COMMAND_RE.split(d)
+    for command, args in zip(parts[1::2], parts[2::2]):
+        if command in 'Aa':
+            values = np.array(ARC_RE.findall(args), dtype=float).reshape(-1, 7)
+        else:
+            values = np.array(NUMBER_RE.findall(args), dtype=float)
+        yield command, values
+
+
+def _flatten_cubic(p0, c1, c2, p1, tolerance):
+    # Sample all segments of a run with a common step count derived from the
+    # longest control polygon
+    hull = (np.hypot(*(c1 - p0).T) + np.hypot(*(c2 - c1).T) + np.hypot(*(p1 - c2).T)).max()
+    steps = int(min(max(math.ceil(math.sqrt(hull / tolerance)), 1), 256))
+    t = np.linspace(0, 1, steps + 1)[1:, None, None]
+    mt = 1 - t
+    points = mt ** 3 * p0 + 3 * mt ** 2 * t * c1 + 3 * mt * t ** 2 * c2 + t ** 3 * p1
+    return points.transpose(1, 0, 2).reshape(-1, 2)
+
+
+def _flatten_quadratic(p0, c, p1, tolerance):
+    return _flatten_cubic(p0, p0 + 2 / 3 * (c - p0), p1 + 2 / 3 * (c - p1), p1, tolerance)
+
+
+def arc_to_center(x0, y0, rx, ry, angle, large_arc, sweep, x1, y1):
+    """
+    Convert an SVG endpoint arc to center parameterization (SVG spec F.6.5).
+
+    Returns:
+        tuple: (cx, cy, rx, ry, phi, theta1, dtheta), or None when the arc is
+        a straight line (zero radius) or empty (same endpoints).
+    """
+    if (x0, y0) == (x1, y1):
+        return None
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return None
+    phi = math.radians(angle % 360)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (x0 - x1) / 2, (y0 - y1) / 2
+    x1p = cos_phi * dx + sin_phi * dy
+    y1p = -sin_phi * dx + cos_phi * dy
+    # Scale radii up if they can't span the endpoints
+    scale = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if scale > 1:
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    numerator = rx ** 2 * ry ** 2 - rx ** 2 * y1p ** 2 - ry ** 2 * x1p ** 2
+    denominator = rx ** 2 * y1p ** 2 + ry ** 2 * x1p ** 2
+    factor = math.sqrt(max(numerator, 0) / denominator)
+    if large_arc == sweep:
+        factor = -factor
+    cxp, cyp = factor * rx * y1p / ry, -factor * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x0 + x1) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y0 + y1) / 2
+    theta1 = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    theta2 = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+    dtheta = theta2 - theta1
+    if sweep and dtheta < 0:
+        dtheta += 2 * math.pi
+    elif not sweep and dtheta > 0:
+        dtheta -= 2 * math.pi
+    return cx, cy, rx, ry, phi, theta1, dtheta
+
+
+def _flatten_arc(x0, y0, params, tolerance):
+    rx, ry, angle, large_arc, sweep, x1, y1 = params
+    center = arc_to_center(x0, y0, rx, ry, angle, large_arc, sweep, x1, y1)
+    if center is None:
+        return np.array([[x1, y1]])
+    cx, cy, rx, ry, phi, theta1, dtheta = center
+    # Angular step keeping the chord's sagitta within tolerance
+    radius = max(rx, ry)
+    step = 2 * math.acos(max(1 - tolerance / radius, -1)) if radius > tolerance else math.pi / 2
+    steps = int(min(max(math.ceil(abs(dtheta) / max(step, 1e-3)), 1), 1024))
+    theta = theta1 + dtheta * np.linspace(0, 1, steps + 1)[1:]
+    ex, ey = rx * np.cos(theta), ry * np.sin(theta)
+    points = np.column_stack([
+        math.cos(phi) * ex - math.sin(phi) * ey + cx,
+        math.sin(phi) * ex + math.cos(phi) * ey + cy,
+    ])
+    points[-1] = (x1, y1)
+    return points
+
+
+def path_subpaths(d):
+    """
+    Parse SVG path data into subpaths of absolute segments, without
+    flattening. Each subpath is a list of (kind, array) runs:
+        - ('L', (N, 2)): points joined by straight lines; the first run of
+          every subpath starts with the subpath's first point
+        - ('C', (N, 4, 2)): cubic Béziers as control polygons, with
+          quadratics elevated to cubics
+        - ('A', (N, 9)): elliptical arcs as their start point followed by
+          the 7 arc parameters, with an absolute end point
+    Runs of line and curve segments are converted with NumPy.
+
+    Args:
+        d (str): Path data.
+
+    Returns:
+        list: Subpaths as lists of runs.
+    """
+    if LINES_ONLY_RE.fullmatch(d):
+        subpaths = _line_subpaths(d)
+        if subpaths is not None:
+            return subpaths
+
+    subpaths = []
+    runs = None
+    current = np.zeros(2)
+    start = np.zeros(2)
+    # Last control point of the previous cubic/quadratic segment for S/T
+    last_cubic = last_quadratic = None
+
+    for command, args in path_commands(d):
+        upper = command.upper()
+        relative = command.islower()
+        cubic = quadratic = None
+
+        if upper == 'Z':
+            if runs is not None:
+                runs.append(('L', start[None, :]))
+            runs = None
+            current = start.copy()
+        elif upper == 'M':
+            points = args[:len(args) // 2 * 2].reshape(-1, 2)
+            if not len(points):
+                continue
+            if relative:
+                points = current + np.cumsum(points, axis=0)
+            runs = [('L', points)]
+            subpaths.append(runs)
+            start, current = points[0].copy(), points[-1].copy()
+        else:
+            if upper == 'L':
+                run = args[:len(args) // 2 * 2].reshape(-1, 2)
+                if relative:
+                    run = current + np.cumsum(run, axis=0)
+                kind = 'L'
+            elif upper == 'H':
+                xs = current[0] + np.cumsum(args) if relative else args
+                run, kind = np.column_stack([xs, np.full(len(xs), current[1])]), 'L'
+            elif upper == 'V':
+                ys = current[1] + np.cumsum(args) if relative else args
+                run, kind = np.column_stack([np.full(len(ys), current[0]), ys]), 'L'
+            elif upper in 'CSQT':
+                width = {'C': 6, 'S': 4, 'Q': 4, 'T': 2}[upper]
+                segments = args[:len(args) // width * width].reshape(-1, width // 2, 2)
+                if not len(segments):
+                    continue
+                if relative:
+                    # Each segment is relative to the end point of the previous one
+                    ends = np.cumsum(segments[:, -1], axis=0)
+                    origins = current + np.vstack([np.zeros((1, 2)), ends[:-1]])
+                    segments = segments + origins[:, None, :]
+                else:
+                    origins = np.vstack([current[None, :], segments[:-1, -1]])
+                p1 = segments[:, -1]
+                if upper == 'C':
+                    c1, c2 = segments[:, 0], segments[:, 1]
+                    cubic = c2[-1]
+                elif upper == 'S':
+                    c2 = segments[:, 0]
+                    # First control point reflects the previous second control point
+                    previous = np.vstack([(last_cubic if last_cubic is not None else current)[None, :], c2[:-1]])
+                    c1 = 2 * origins - previous
+                    cubic = c2[-1]
+                else:
+                    if upper == 'Q':
+                        c = segments[:, 0]
+                    else:
+                        c = np.empty_like(origins)
+                        previous = last_quadratic if last_quadratic is not None else current
+                        for i, origin in enumerate(origins):
+                            previous = c[i] = 2 * origin - previous
+                    quadratic = c[-1]
+                    c1, c2 = origins + 2 / 3 * (c - origins), p1 + 2 / 3 * (c - p1)
+                run, kind = np.stack([origins, c1, c2, p1], axis=1), 'C'
+            else:
+                arcs = args.copy()
+                origins = np.empty((len(arcs), 2))
+                point = current
+                for i, params in enumerate(arcs):
+                    origins[i] = point
+                    if relative:
+                        params[5:7] += point
+                    point = params[5:7]
+                run, kind = np.column_stack([origins, arcs]), 'A'
+            if not len(run):
+                continue
+            if runs is None:
+                # Drawing without a preceding moveto continues from the current point
+                runs = [('L', current[None, :].copy())]
+                subpaths.append(runs)
+            runs.append((kind, run))
+            current = (run[-1] if kind == 'L' else run[-1, -1] if kind == 'C' else run[-1, 7:9]).copy()
+
+        last_cubic, last_quadratic = cubic, quadratic
+
+    return subpaths
+
+
+def _line_subpaths(d):
+    # Fast path for absolute M/L path data: every point of a subpath is in a
+    # single run, converted with one NumPy call for the whole path. Returns
+    # None for an odd or missing coordinate in any command, which the
+    # general parser handles.
+    commands = [part.split('L') for part in d.split('M')[1:]]
+    try:
+        # Separated numbers convert as they are
+        tokens = [[command.replace(',', ' ').split() for command in part] for part in commands]
+        values = np.array([value for part in tokens for command in part for value in command], dtype=float)
+    except ValueError:
+        # Packed numbers ("1-2", ".5.5") need the tokenizer
+        tokens = [[NUMBER_RE.findall(command) for command in part] for part in commands]
+        values = np.array([value for part in tokens for command in part for value in command], dtype=float)
+    counts = []
+    for part in tokens:
+        if not part[0] or any(len(command) % 2 for command in part):
+            return None
+        counts.append(sum(len(command) for command in part))
+    points = values.reshape(-1, 2)
+    if len(counts) == 1:
+        return [[('L', points)]]
+    return [[('L', run)] for run in np.split(points, np.cumsum(counts[:-1]) // 2)]
+
+
+def flatten_subpaths(subpaths, tolerance=FLATTEN_TOLERANCE):
+    """
+    Flatten subpaths (see path_subpaths) into polylines so no point deviates
+    more than about `tolerance` from the true curve.
+    """
+    polylines = []
+    for runs in subpaths:
+        if len(runs) == 1 and runs[0][0] == 'L':
+            # Plain polyline, nothing to flatten or join
+            if len(runs[0][1]) > 1:
+                polylines.append(runs[0][1])
+            continue
+        chunks = []
+        for kind, run in runs:
+            if kind == 'L':
+                chunks.append(run)
+            elif kind == 'C':
+                chunks.append(_flatten_cubic(run[:, 0], run[:, 1], run[:, 2], run[:, 3], tolerance))
+            else:
+                chunks.extend(_flatten_arc(row[0], row[1], row[2:], tolerance) for row in run)
+        points = np.vstack(chunks)
+        if len(points) > 1:
+            polylines.append(points)
+    return polylines
+
+
+def parse_path(d, tolerance=FLATTEN_TOLERANCE):
+    """
+    Parse SVG path data into polylines, one per subpath. Curves and arcs are
+    flattened so no point deviates more than about `tolerance` from the true
+    curve.
+
+    Args:
+        d (str): Path data.
+        tolerance (float): Flattening tolerance in user units.
+
+    Returns:
+        list: Polylines as (N, 2) float arrays.
+    """
+    return flatten_subpaths(path_subpaths(d), tolerance)
+
+
+def arc_ellipses(arcs):
+    """
+    Convert arcs (rows of start point and arc parameters, see path_subpaths)
+    to ellipse segments c + u cos(theta) + v sin(theta) for theta from
+    theta1 to theta1 + dtheta. Unlike flattened arcs these stay exact under
+    any affine transform, which maps c, u and v like points and vectors.
+
+    Returns:
+        tuple: (ellipses (N, 8) as rows of cx, cy, ux, uy, vx, vy, theta1,
+        dtheta, points (M, 2)) where points are the end points of arcs that
+        degenerate to straight lines.
+    """
+    ellipses, points = [], []
+    for x0, y0, rx, ry, angle, large_arc, sweep, x1, y1 in arcs:
+        center = arc_to_center(x0, y0, rx, ry, angle, large_arc, sweep, x1, y1)
+        if center is None:
+            points.append((x1, y1))
+            continue
+        cx, cy, rx, ry, phi, theta1, dtheta = center
+        cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+        ellipses.append((cx, cy, rx * cos_phi, rx * sin_phi, -ry * sin_phi, ry * cos_phi, theta1, dtheta))
+    return np.array(ellipses, dtype=float).reshape(-1, 8), np.array(points, dtype=float).reshape(-1, 2)
+
+
+def ellipse_extrema(ellipses):
+    """
+    Get the end points of ellipse segments (see arc_ellipses) and the points
+    where they reach a horizontal or vertical extreme, for all segments at
+    once.
+
+    Returns:
+        array: (M, 2) points.
+    """
+    center, u, v = ellipses[:, 0:2], ellipses[:, 2:4], ellipses[:, 4:6]
+    theta1, dtheta = ellipses[:, 6:7], ellipses[:, 7:8]
+    # x (or y) = c + u cos(theta) + v sin(theta) is extreme where tan(theta) = v / u
+    extreme = np.arctan2(v, u)
+    candidates = np.concatenate([extreme, extreme + math.pi], axis=1)
+    # Keep the angles inside the sweep, in either direction
+    offset = np.mod((candidates - theta1) * np.sign(dtheta), 2 * math.pi)
+    inside = offset <= np.abs(dtheta)
+    theta = np.concatenate([theta1, theta1 + dtheta, candidates], axis=1)
+    inside = np.concatenate([np.ones((len(ellipses), 2), dtype=bool), inside], axis=1)
+    rows, columns = np.nonzero(inside)
+    theta = theta[rows, columns][:, None]
+    return center[rows] + u[rows] * np.cos(theta) + v[rows] * np.sin(theta)
+
+
+def cubic_extrema(cubics):
+    """
+    Get the points where cubic Béziers reach a horizontal or vertical
+    extreme inside the segment, by solving the derivative for all segments
+    at once.
+
+    Args:
+        cubics (array): (N, 4, 2) control polygons.
+
+    Returns:
+        array: (M, 2) extreme points, excluding segment end points.
+    """
+    p0, p1, p2, p3 = cubics[:, 0], cubics[:, 1], cubics[:, 2], cubics[:, 3]
+    # Derivative / 3 = a t^2 + b t + c, per axis
+    a = -p0 + 3 * p1 - 3 * p2 + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = np.sqrt(b * b - 4 * a * c)
+        quadratic = np.abs(a) > 1e-12
+        t = np.concatenate([
+            np.where(quadratic, (-b + root) / (2 * a), -c / b),
+            np.where(quadratic, (-b - root) / (2 * a), np.nan),
+        ], axis=1)
+    rows, columns = np.nonzero((t > 0) & (t < 1))
+    t = t[rows, columns][:, None]
+    mt = 1 - t
+    segments = cubics[rows]
+    return (mt ** 3 * segments[:, 0] + 3 * mt ** 2 * t * segments[:, 1]
+            + 3 * mt * t ** 2 * segments[:, 2] + t ** 3 * segments[:, 3])
+
+
+def subpath_geometry(subpaths, matrix=None):
+    """
+    Collect the vertices, curve segments and arc segments of subpaths,
+    optionally transformed by a 3x3 affine matrix. Béziers are transformed
+    through their control points and arcs through their ellipse vectors,
+    both exactly.
+
+    Returns:
+        tuple: (points (N, 2), cubics (M, 4, 2), ellipses (K, 8)).
+    """
+    points, cubics, ellipses = [], [], []
+    for runs in subpaths:
+        for kind, run in runs:
+            if kind == 'L':
+                points.append(run)
+            elif kind == 'C':
+                cubics.append(run)
+            else:
+                arc_ellipse, arc_points = arc_ellipses(run)
+                ellipses.append(arc_ellipse)
+                points.append(arc_points)
+    points = np.concatenate(points) if points else np.empty((0, 2))
+    cubics = np.concatenate(cubics) if cubics else np.empty((0, 4, 2))
+    ellipses = np.concatenate(ellipses) if ellipses else np.empty((0, 8))
+    if matrix is not None:
+        points = apply_transform(points, matrix)
+        cubics = apply_transform(cubics.reshape(-1, 2), matrix).reshape(-1, 4, 2)
+        linear = matrix[:2, :2].T
+        ellipses = np.column_stack([
+            apply_transform(ellipses[:, 0:2], matrix),
+            ellipses[:, 2:4] @ linear,
+            ellipses[:, 4:6] @ linear,
+            ellipses[:, 6:8],
+        ])
+    return points, cubics, ellipses
+
+
+def parse_transform(transform):
+    """
+    Parse an SVG transform attribute into a 3x3 affine matrix.
+    """
+    matrix = np.identity(3)
+    if not transform:
+        return matrix
+    for name, args in TRANSFORM_RE.findall(transform):
+        values = [float(v) for v in NUMBER_RE.findall(args)]
+        if name == 'matrix' and len(values) == 6:
+            a, b, c, d, e, f = values
+            step = np.array([[a, c, e], [b, d, f], [0, 0, 1]])
+        elif name == 'translate' and values:
+            tx, ty = values[0], values[1] if len(values) > 1 else 0
+            step = np.array([[1, 0, tx], [0, 1, ty], [0, 0, 1]])
+        elif name == 'scale' and values:
+            sx, sy = values[0], values[1] if len(values) > 1 else values[0]
+            step = np.array([[sx, 0, 0], [0, sy, 0], [0, 0, 1]])
+        elif name == 'rotate' and values:
+            angle = math.radians(values[0])
+            cos_a, sin_a = math.cos(angle), math.sin(angle)
+            step = np.array([[cos_a, -sin_a, 0], [sin_a, cos_a, 0], [0, 0, 1]])
+            if len(values) == 3:
+                cx, cy = values[1], values[2]
+                step = (np.array([[1, 0, cx], [0, 1, cy], [0, 0, 1]]) @ step
+                        @ np.array([[1, 0, -cx], [0, 1, -cy], [0, 0, 1]]))
+        elif name == 'skewX' and values:
+            step = np.array([[1, math.tan(math.radians(values[0])), 0], [0, 1, 0], [0, 0, 1]])
+        elif name == 'skewY' and values:
+            step = np.array([[1, 0, 0], [math.tan(math.radians(values[0])), 1, 0], [0, 0, 1]])
+        else:
+            continue
+        matrix = matrix @ step
+    return matrix
+
+
+def apply_transform(points, matrix):
+    """
+    Apply a 3x3 affine matrix to an (N, 2) array of points.
+    """
+    return points @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def _float(elem, name, default=0.0):
+    length = parse_length(elem.get(name))
+    return length[0] if length else default
+
+
+def element_subpaths(elem):
+    """
+    Get the subpaths (see path_subpaths) of a single shape element, in its
+    own user units. Non-shape elements return an empty list.
+    """
+    tag = elem.tag.rsplit('}', 1)[-1]
+    if tag == 'path':
+        return path_subpaths(elem.get('d', ''))
+    if tag == 'line':
+        return [[('L', np.array([[_float(elem, 'x1'), _float(elem, 'y1')], [_float(elem, 'x2'), _float(elem, 'y2')]]))]]
+    if tag in ('polyline', 'polygon'):
+        values = np.array(NUMBER_RE.findall(elem.get('points', '')), dtype=float)
+        points = values[:len(values) // 2 * 2].reshape(-1, 2)
+        if tag == 'polygon' and len(points):
+            points = np.vstack([points, points[:1]])
+        return [[('L', points)]] if len(points) > 1 else []
+    if tag == 'rect':
+        x, y = _float(elem, 'x'), _float(elem, 'y')
+        w, h = _float(elem, 'width'), _float(elem, 'height')
+        if w <= 0 or h <= 0:
+            return []
+        return [[('L', np.array([[x, y], [x + w, y], [x + w, y + h], [x, y + h], [x, y]]))]]
+    if tag in ('circle', 'ellipse'):
+        cx, cy = _float(elem, 'cx'), _float(elem, 'cy')
+        if tag == 'circle':
+            rx = ry = _float(elem, 'r')
+        else:
+            rx, ry = _float(elem, 'rx'), _float(elem, 'ry')
+        if rx <= 0 or ry <= 0:
+            return []
+        return path_subpaths(f'M{cx + rx},{cy} A{rx},{ry} 0 1 1 {cx - rx},{cy} A{rx},{ry} 0 1 1 {cx + rx},{cy}')
+    return []
+
+
+def element_polylines(elem, tolerance=FLATTEN_TOLERANCE):
+    """
+    Get the polylines of a single shape element, in its own user units.
+    Non-shape elements return an empty list.
+    """
+    return flatten_subpaths(element_subpaths(elem), tolerance)
+
+
+def document_transform(root):
+    """
+    Get the matrix mapping the root's user units (viewBox) to millimeters,
+    honouring the default preserveAspectRatio of "xMidYMid meet".
+    """
+    width_mm, height_mm = length_to_mm(root.get('width')), length_to_mm(root.get('height'))
+    viewbox = [float(v) for v in NUMBER_RE.findall(root.get('viewBox', ''))]
+
+    if len(viewbox) == 4 and viewbox[2] > 0 and viewbox[3] > 0:
+        min_x, min_y, vb_width, vb_height = viewbox
+        width_mm = width_mm if width_mm is not None else vb_width * UNITS_TO_MM['px']
+        height_mm = height_mm if height_mm is not None else vb_height * UNITS_TO_MM['px']
+        scale = min(width_mm / vb_width, height_mm / vb_height)
+        tx = (width_mm - vb_width * scale) / 2 - min_x * scale
+        ty = (height_mm - vb_height * scale) / 2 - min_y * scale
+        return np.array([[scale, 0, tx], [0, scale, ty], [0, 0, 1]])
+
+    # Without a viewBox user units are px
+    scale = UNITS_TO_MM['px']
+    return np.array([[scale, 0, 0], [0, scale, 0], [0, 0, 1]])
+
+
+def iter_shapes(root, matrix=None):
+    """
+    Yield (element, matrix) for every rendered element below root, where
+    matrix combines all nested transforms down to the element.
+    """
+    if matrix is None:
+        matrix = np.identity(3)
+    for child in root:
+        tag = child.tag.rsplit('}', 1)[-1] if isinstance(child.tag, str) else ''
+        if tag in NON_RENDERED or child.get('display') == 'none':
+            continue
+        child_matrix = matrix @ parse_transform(child.get('transform')) if child.get('transform') else matrix
+        yield child, child_matrix
+        if len(child):
+            yield from iter_shapes(child, child_matrix)
+
+
+def iter_polylines(root, tolerance=FLATTEN_TOLERANCE, matrix=None):
+    """
+    Yield every drawn polyline below an element with all nested transforms
+    applied. `tolerance` is in the root's user units.
+    """
+    for elem, elem_matrix in iter_shapes(root, matrix):
+        for polyline in element_polylines(elem, tolerance):
+            yield apply_transform(polyline, elem_matrix)
+
+
+def group_bounds(groups):
+    """
+    Get the exact bounding box of grouped subpaths, including curve and arc
+    extrema.
+
+    Args:
+        groups (iterable): (matrix, subpaths) pairs; each group's geometry
+            is transformed by its matrix in one go.
+
+    Returns:
+        tuple: (min_x, min_y, max_x, max_y), or None if there is no geometry.
+    """
+    points, cubics, ellipses = [], [np.empty((0, 4, 2))], [np.empty((0, 8))]
+    for matrix, subpaths in groups:
+        group_points, group_cubics, group_ellipses = subpath_geometry(subpaths, matrix)
+        points.append(group_points)
+        cubics.append(group_cubics)
+        ellipses.append(group_ellipses)
+
+    cubics, ellipses = np.concatenate(cubics), np.concatenate(ellipses)
+    points = np.concatenate(points + [cubics[:, 0], cubics[:, 3], cubic_extrema(cubics), ellipse_extrema(ellipses)])
+    if not len(points):
+        return None
+    min_x, min_y = points.min(axis=0)
+    max_x, max_y = points.max(axis=0)
+    return float(min_x), float(min_y), float(max_x), float(max_y)
+
+
+def group_length(groups, tolerance=FLATTEN_TOLERANCE):
+    """
+    Get the total drawn length of grouped subpaths (see group_bounds),
+    measured on polylines flattened to `tolerance` after transforming.
+    """
+    total = 0.0
+    for matrix, subpaths in groups:
+        polylines = flatten_subpaths(subpaths, tolerance)
+        if not polylines:
+            continue
+        points = apply_transform(np.vstack(polylines), matrix)
+        lengths = np.hypot(*np.diff(points, axis=0).T)
+        # Skip the jumps between consecutive polylines
+        lengths[np.cumsum([len(p) for p in polylines[:-1]], dtype=np.intp) - 1] = 0
+        total += float(lengths.sum())
+    return total
+
+
+def geometry_bounds(root, matrix=None):
+    """
+    Get the exact bounding box of every drawn shape below an element, with
+    nested transforms applied, including curve and arc extrema.
+
+    Returns:
+        tuple: (min_x, min_y, max_x, max_y) in the root's user units (or
+        after matrix), or None if nothing is drawn.
+    """
+    # Elements without their own transform share their parent's matrix
+    # object, so their geometry is transformed in one go
+    groups = {}
+    for elem, elem_matrix in iter_shapes(root, matrix):
+        subpaths = element_subpaths(elem)
+        if subpaths:
+            groups.setdefault(id(elem_matrix), (elem_matrix, []))[1].extend(subpaths)
+    return group_bounds(groups.values())
+
+
+def load_polylines(svg_file_path, tolerance=FLATTEN_TOLERANCE):
+    """
+    Load every drawn shape of an SVG file as polylines in millimeters.
+
+    Args:
+        svg_file_path (str): Path to the SVG file.
+        tolerance (float): Curve flattening tolerance in millimeters.
+
+    Returns:
+        list: Polylines as (N, 2) float arrays, in document order.
+    """
+    root = ET.parse(svg_file_path).getroot()
+    to_mm = document_transform(root)
+    user_tolerance = tolerance / to_mm[0, 0]
+    return list(iter_polylines(root, user_tolerance, to_mm))
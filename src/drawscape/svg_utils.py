@@ -2,45 +2,291 @@ import cv2
 import numpy as np
 from PIL import Image
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .svg_writer import SVGWriter
+from .profiling import log, span
 
-def svglines(image_path):
+# Contour retrieval modes for svglines
+RETRIEVAL_MODES = {
+    'list': cv2.RETR_LIST,
+    'external': cv2.RETR_EXTERNAL,
+    'ccomp': cv2.RETR_CCOMP,
+    'tree': cv2.RETR_TREE,
+}
+
+# Canny thresholds used by svglines
+CANNY_LOW = 100
+CANNY_HIGH = 200
+
+# Pixels of context added around each tile for edge detection in tiled mode
+TILE_OVERLAP = 16
+
+
+def svglines(image_path, output_path=None, min_length=0, min_area=0, tolerance=0, mode='list', max_depth=None,
+             tile_size=None, tile_overlap=TILE_OVERLAP, workers=None):
+    """
+    Trace the edges of an image and save them as SVG paths.
+
+    Args:
+        image_path (str): Path to the image file.
+        output_path (str): Path to write the SVG to (optional).
+        min_length (float): Drop contours shorter than this, in pixels.
+        min_area (float): Drop contours enclosing less than this, in square pixels.
+        tolerance (float): Simplify contours with approxPolyDP, allowing this
+            much deviation in pixels (the SVG's user units). 0 disables it.
+        mode (str): Contour retrieval mode, a key of RETRIEVAL_MODES.
+        max_depth (int): Only keep contours nested at most this deep in the
+            contour hierarchy (0 = outermost). Only meaningful for 'ccomp'
+            and 'tree' modes.
+        tile_size (int): Trace edges in tiles of this many pixels square on a
+            thread pool instead of over the whole frame (see trace_tiled).
+            Only supported with the 'list' mode.
+        tile_overlap (int): Pixels of context around each tile for edge detection.
+        workers (int): Threads used in tiled mode (default: CPU count).
+
+    Returns:
+        str: Path to the SVG file.
+    """
     # Read the image
-    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    
-    # Apply edge detection
-    edges = cv2.Canny(img, 100, 200)
-    
-    # Find contours
-    contours, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-    
+    with span('parse'):
+        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    # Tiled contours are traced while they are written
+    with span('compute'):
+        contours = trace_contours(img, mode, max_depth, tile_size, tile_overlap, workers)
+
     # Get image dimensions
     height, width = img.shape
-    
-    # Start SVG content
-    svg_content = f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">\n'
-    
-    # Add paths for each contour
-    for contour in contours:
-        if len(contour) > 1:
-            svg_content += '  <path d="M'
-            for point in contour:
-                print(point)
-                x, y = point[0]
-                svg_content += f'{x},{y} '
-            svg_content += 'Z" fill="none" stroke="black" />\n'
-    
-    # Close SVG content
-    svg_content += '</svg>'
-    
+
     # Generate output file path
-    output_dir = os.path.dirname(image_path)
-    output_filename = os.path.splitext(os.path.basename(image_path))[0] + "_svg.svg"
-    output_path = os.path.join(output_dir, output_filename)
-    
-    # Save SVG content to file
-    with open(output_path, 'w') as f:
-        f.write(svg_content)
+    if not output_path:
+        output_dir = os.path.dirname(image_path)
+        output_filename = os.path.splitext(os.path.basename(image_path))[0] + "_svg.svg"
+        output_path = os.path.join(output_dir, output_filename)
+
+    # Stream SVG content to file, one path per contour so each shape stays
+    # a separate element, sharing the group's style
+    with span('serialize'), open(output_path, 'w') as f:
+        svg = SVGWriter(f)
+        with svg.document(declaration=False, width=width, height=height), svg.group(fill="none", stroke="black"):
+            for contour in filter_contours(contours, min_length, min_area, tolerance):
+                svg.path(contour_path_data(contour))
     
-    print(f"SVG saved to {output_path}")
+    log(f"SVG saved to {output_path}")
     
-    return output_path
\ No newline at end of file
+    return output_path
+
+
+def trace_contours(img, mode='list', max_depth=None, tile_size=None, tile_overlap=TILE_OVERLAP, workers=None):
+    """
+    Find the contours of the edges of a grayscale image, see svglines for
+    the options.
+
+    Returns:
+        iterable: Contour arrays of shape (N, 1, 2) in pixels.
+    """
+    if tile_size:
+        if mode != 'list' or max_depth is not None:
+            raise ValueError("Tiled svglines only supports the 'list' contour mode")
+        return trace_tiled(img, tile_size, tile_overlap, workers)
+
+    # Apply edge detection
+    edges = cv2.Canny(img, CANNY_LOW, CANNY_HIGH)
+
+    # Find contours
+    contours, hierarchy = cv2.findContours(edges, RETRIEVAL_MODES[mode], cv2.CHAIN_APPROX_SIMPLE)
+
+    if max_depth is not None and hierarchy is not None:
+        depth = contour_depths(hierarchy)
+        contours = [contour for contour, d in zip(contours, depth) if d <= max_depth]
+    return contours
+
+
+def trace_tiled(img, tile_size, overlap=TILE_OVERLAP, workers=None):
+    """
+    Trace the edges of a grayscale image tile by tile, yielding contours as
+    they complete.
+
+    Each tile runs Canny with `overlap` pixels of surrounding context, so
+    edges match the full-frame result closely, and traces contours in its
+    own region on a thread pool. Contours of edges fully inside a tile are
+    yielded right away. Edge components touching a tile seam are kept as
+    pixel lists, grouped with the components they connect to in neighbouring
+    tiles, and traced on a mask covering just that group. Working memory is
+    therefore bounded by the tile size and the seam-crossing edges, not by
+    the image area.
+    """
+    height, width = img.shape
+    tiles = [
+        (y, x, min(y + tile_size, height), min(x + tile_size, width))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+    def trace_tile(tile):
+        y0, x0, y1, x1 = tile
+        my0, mx0 = max(y0 - overlap, 0), max(x0 - overlap, 0)
+        my1, mx1 = min(y1 + overlap, height), min(x1 + overlap, width)
+        edges = cv2.Canny(img[my0:my1, mx0:mx1], CANNY_LOW, CANNY_HIGH)
+        core = edges[y0 - my0:y1 - my0, x0 - mx0:x1 - mx0].copy()
+
+        # Edge components touching a seam continue in a neighbouring tile
+        # and are handed back as pixel lists for stitching
+        _, labels = cv2.connectedComponents(core, connectivity=8)
+        seams = []
+        if x0 > 0:
+            seams.append(labels[:, 0])
+        if x1 < width:
+            seams.append(labels[:, -1])
+        if y0 > 0:
+            seams.append(labels[0, :])
+        if y1 < height:
+            seams.append(labels[-1, :])
+        seam_labels = np.unique(np.concatenate(seams)) if seams else np.empty(0, labels.dtype)
+        seam_labels = seam_labels[seam_labels > 0]
+
+        fragments = []
+        if len(seam_labels):
+            on_seam = np.isin(labels, seam_labels)
+            ys, xs = np.nonzero(on_seam)
+            order = np.argsort(labels[ys, xs], kind='stable')
+            pixels = np.column_stack([xs[order] + x0, ys[order] + y0])
+            splits = np.flatnonzero(np.diff(labels[ys, xs][order])) + 1
+            fragments = np.split(pixels, splits)
+            core[on_seam] = 0
+
+        complete, _ = cv2.findContours(core, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0))
+        return complete, fragments
+
+    fragments = []
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of tiles in flight so finished contours are
+        # streamed out instead of piling up
+        pending = deque()
+        for tile in tiles:
+            pending.append(pool.submit(trace_tile, tile))
+            if len(pending) >= 2 * workers:
+                complete, tile_fragments = pending.popleft().result()
+                fragments.extend(tile_fragments)
+                yield from complete
+        while pending:
+            complete, tile_fragments = pending.popleft().result()
+            fragments.extend(tile_fragments)
+            yield from complete
+
+    yield from stitch_fragments(fragments, tile_size)
+
+
+def stitch_fragments(fragments, tile_size):
+    """
+    Join edge components cut at tile seams. Components with 8-connected
+    pixels across a seam are grouped, drawn onto a mask covering the group
+    and traced, giving the contours a full-frame trace would have found.
+    """
+    # Union-find over fragments sharing adjacent pixels
+    parent = list(range(len(fragments)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Components can only meet on the first or last row/column of a tile
+    def seam_pixels(pixels):
+        edge = (pixels % tile_size == 0) | (pixels % tile_size == tile_size - 1)
+        return pixels[edge.any(axis=1)].tolist()
+
+    owner = {}
+    for i, pixels in enumerate(fragments):
+        for x, y in seam_pixels(pixels):
+            owner[(x, y)] = i
+    for i, pixels in enumerate(fragments):
+        for x, y in seam_pixels(pixels):
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    j = owner.get((x + dx, y + dy))
+                    if j is not None and find(j) != find(i):
+                        parent[find(j)] = find(i)
+
+    groups = {}
+    for i in range(len(fragments)):
+        groups.setdefault(find(i), []).append(fragments[i])
+
+    for group in groups.values():
+        pixels = np.vstack(group)
+        (min_x, min_y), (max_x, max_y) = pixels.min(axis=0), pixels.max(axis=0)
+        mask = np.zeros((max_y - min_y + 1, max_x - min_x + 1), dtype=np.uint8)
+        mask[pixels[:, 1] - min_y, pixels[:, 0] - min_x] = 255
+        contours, _ = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(int(min_x), int(min_y)))
+        yield from contours
+
+
+def contour_depths(hierarchy):
+    """
+    Compute the nesting depth of every contour from a findContours hierarchy.
+
+    Returns:
+        ndarray: Depth per contour, 0 for contours without a parent.
+    """
+    parents = hierarchy.reshape(-1, 4)[:, 3]
+    depth = np.zeros(len(parents), dtype=np.int32)
+    current = parents.copy()
+    # Walk every contour up one level per iteration until all reach the root
+    while True:
+        nested = current >= 0
+        if not nested.any():
+            return depth
+        depth[nested] += 1
+        current[nested] = parents[current[nested]]
+
+
+def filter_contours(contours, min_length=0, min_area=0, tolerance=0):
+    """
+    Yield the contours worth drawing, optionally simplified.
+
+    Contours with fewer than two points, shorter than min_length or enclosing
+    less than min_area are dropped. With a tolerance, contours are simplified
+    with approxPolyDP.
+    """
+    for contour in contours:
+        if len(contour) < 2:
+            continue
+        if min_length and cv2.arcLength(contour, True) < min_length:
+            continue
+        if min_area and cv2.contourArea(contour) < min_area:
+            continue
+        if tolerance:
+            contour = cv2.approxPolyDP(contour, tolerance, True)
+            if len(contour) < 2:
+                continue
+        yield contour
+
+
+def contour_path_data(contour):
+    """
+    Serialize a contour array of shape (N, 1, 2) into closed path data, the
+    first point absolute and the rest as relative steps, formatting all
+    points in a single operation.
+    """
+    points = contour.reshape(-1, 2)
+    steps = np.diff(points, axis=0).ravel()
+    path_data = 'M%d,%d ' % (points[0, 0], points[0, 1])
+    if len(steps):
+        path_data += 'l' + ('%d,%d ' * (len(steps) // 2)) % tuple(steps.tolist())
+    return path_data + 'z'
+
+
+def contour_drawing(contours, width, height):
+    """
+    Pack contours into a Drawing in millimeters, the geometry svglines would
+    write for an image of width x height pixels. Each contour is closed by
+    repeating its first point, as the SVG's Z does.
+    """
+    from .geometry import Drawing
+    from .svg_path import UNITS_TO_MM
+
+    px = UNITS_TO_MM['px']
+    polylines = [np.vstack([points, points[:1]]) * px for points in (contour.reshape(-1, 2) for contour in contours)]
+    return Drawing.from_polylines(polylines, width=width * px, height=height * px)
@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+
+# Decimal places of generated coordinates: 0.001 mm is well below any
+# plotter's resolution
+DEFAULT_PRECISION = 3
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+
+_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+
+
+def _attrs(attrs, precision=DEFAULT_PRECISION):
+    # Keyword names map to SVG attribute names the same way svgwrite does:
+    # stroke_width -> stroke-width, class_ -> class.
+    return ''.join(
+        f' {name.rstrip("_").replace("_", "-")}="'
+        f'{format_number(value, precision) if isinstance(value, float) else str(value).translate(_ESCAPES)}"'
+        for name, value in attrs.items()
+        if value is not None
+    )
+
+
+def format_number(value, precision=DEFAULT_PRECISION):
+    """
+    Format a number rounded to precision decimal places, without trailing
+    zeros: 12.5 rather than 12.500000000000002.
+    """
+    text = f"{value:.{precision}f}"
+    if precision > 0:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def relative_path_data(polylines, closed=False, precision=DEFAULT_PRECISION):
+    """
+    Encode polylines as compact path data for a single <path>: one subpath
+    per polyline, each point relative to the one before ('m' and 'l'), and
+    only the first point absolute.
+
+    Points are rounded to precision decimal places before the steps between
+    them are taken, so rounding errors never add up along a path. Closed
+    subpaths end in 'z', which returns to their first point.
+    """
+    scale = 10 ** precision
+    parts = []
+    x0 = y0 = 0
+    for polyline in polylines:
+        points = [(round(x * scale), round(y * scale)) for x, y in polyline]
+        if not points:
+            continue
+        steps = [f"{format_number((x - px) / scale, precision)},{format_number((y - py) / scale, precision)}"
+                 for (px, py), (x, y) in zip([(x0, y0)] + points, points)]
+        parts.append(('M' if not parts else 'm') + steps[0])
+        if len(steps) > 1:
+            parts.append('l' + ' '.join(steps[1:]))
+        if closed:
+            parts.append('z')
+        # The next move is relative to where this subpath ends
+        x0, y0 = points[0] if closed else points[-1]
+    return ' '.join(parts)
+
+
+class SVGWriter:
+    """
+    Minimal streaming SVG writer.
+
+    Every element is written to the underlying stream (an open text file or
+    io.StringIO) as soon as it is emitted, one element per line and indented
+    by nesting depth, so documents of any size are produced in linear time
+    without holding them in memory.
+
+    Example:
+        with open(path, 'w') as f:
+            svg = SVGWriter(f)
+            with svg.document(width='100mm', height='100mm', viewBox='0 0 100 100'):
+                with svg.group(id='lines', stroke='black'):
+                    svg.path('M0,0 L10,10', fill='none')
+    """
+
+    def __init__(self, stream, indent='  ', precision=DEFAULT_PRECISION):
+        self.stream = stream
+        self.indent = indent
+        # Float attributes are rounded to this many decimal places
+        self.precision = precision
+        self._write = stream.write
+        self._open = []
+
+    def number(self, value):
+        """Format a number at the writer's precision, e.g. for transforms."""
+        return format_number(value, self.precision)
+
+    def _line(self, text):
+        self._write(f'{self.indent * len(self._open)}{text}\n')
+
+    def declaration(self):
+        self._write(XML_DECLARATION)
+
+    def start(self, tag, **attrs):
+        """Open an element; every element emitted until end() is its child."""
+        self._line(f'<{tag}{_attrs(attrs, self.precision)}>')
+        self._open.append(tag)
+
+    def end(self):
+        """Close the most recently opened element."""
+        tag = self._open.pop()
+        self._line(f'</{tag}>')
+
+    def element(self, tag, **attrs):
+        """Write a self-closing element."""
+        self._line(f'<{tag}{_attrs(attrs, self.precision)} />')
+
+    @contextmanager
+    def document(self, declaration=True, **attrs):
+        """Write the XML declaration and the root <svg> element."""
+        if declaration:
+            self.declaration()
+        attrs.setdefault('xmlns', SVG_NAMESPACE)
+        self.start('svg', **attrs)
+        yield self
+        self.end()
+
+    @contextmanager
+    def group(self, **attrs):
+        self.start('g', **attrs)
+        yield self
+        self.end()
+
+    def title(self, text):
+        self._line(f'<title>{str(text).translate(_ESCAPES)}</title>')
+
+    def path(self, d, **attrs):
+        self.element('path', d=d, **attrs)
+
+    def rect(self, **attrs):
+        self.element('rect', **attrs)
+
+    def line(self, **attrs):
+        self.element('line', **attrs)
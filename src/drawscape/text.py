@@ -0,0 +1,128 @@
+from collections import namedtuple
+from functools import lru_cache
+from HersheyFonts import HersheyFonts
+from .svg_writer import relative_path_data
+
+DEFAULT_FONT = 'futural'
+
+# Maximum number of distinct strings kept laid out per process
+LAYOUT_CACHE_SIZE = 4096
+
+# A laid out string. `strokes` are continuous polylines and `lines` the
+# individual ((x0, y0), (x1, y1)) segments, matching HersheyFonts'
+# strokes_for_text() and lines_for_text(). The remaining fields are the
+# bounding box of all points.
+TextLayout = namedtuple('TextLayout', ['strokes', 'lines', 'min_x', 'max_x', 'min_y', 'max_y', 'width', 'height'])
+
+
+@lru_cache(maxsize=None)
+def get_font(font_name=DEFAULT_FONT):
+    """
+    Load a built-in Hershey font. Each font is only loaded once per process.
+    """
+    thefont = HersheyFonts()
+    thefont.load_default_font(font_name)
+    return thefont
+
+
+@lru_cache(maxsize=None)
+def get_glyph(char, font_name=DEFAULT_FONT):
+    """
+    Get the strokes of a single character, already shifted by the glyph's
+    left offset, and its advance width.
+
+    Returns:
+        tuple: (strokes, char_width), or None if the font has no glyph for char.
+    """
+    for glyph in get_font(font_name).glyphs_for_text(char):
+        strokes = tuple(
+            tuple((x - glyph.left_offset, y) for x, y in stroke)
+            for stroke in glyph.strokes
+        )
+        return strokes, glyph.char_width
+    return None
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def text_layout(text, font_name=DEFAULT_FONT):
+    """
+    Lay out a string and compute its bounding box in a single pass.
+
+    Args:
+        text (str): The text to lay out.
+        font_name (str): Name of a built-in Hershey font.
+
+    Returns:
+        TextLayout: Strokes, line segments and bounding box of the text in
+        font units. An empty text has an infinite (empty) bounding box.
+    """
+    min_x, max_x = float('inf'), float('-inf')
+    min_y, max_y = float('inf'), float('-inf')
+    strokes = []
+    xofs = 0
+
+    for char in text:
+        glyph = get_glyph(char, font_name)
+        if glyph is None:
+            continue
+        glyph_strokes, char_width = glyph
+        for stroke in glyph_strokes:
+            points = tuple((xofs + x, y) for x, y in stroke)
+            strokes.append(points)
+            # Single point strokes produce no line segments and are not drawn
+            if len(points) < 2:
+                continue
+            for x, y in points:
+                if x < min_x:
+                    min_x = x
+                if x > max_x:
+                    max_x = x
+                if y < min_y:
+                    min_y = y
+                if y > max_y:
+                    max_y = y
+        xofs += char_width
+
+    lines = tuple(segment for stroke in strokes for segment in zip(stroke, stroke[1:]))
+
+    return TextLayout(tuple(strokes), lines, min_x, max_x, min_y, max_y, max_x - min_x, max_y - min_y)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def text_path_data(text, font_name=DEFAULT_FONT):
+    """
+    SVG path data drawing a string in font units, one relative subpath per
+    stroke. Draws the same segments as TextLayout.lines in a single path
+    element.
+    """
+    # Font units are whole numbers
+    return relative_path_data([stroke for stroke in text_layout(text, font_name).strokes if len(stroke) > 1],
+                              precision=0)
+
+
+def get_text_bounding_box(text, font_name=DEFAULT_FONT):
+    """
+    Calculate the bounding box of a given text using the specified font.
+
+    Args:
+        text (str): The text to calculate the bounding box for.
+        font_name (str): Name of a built-in Hershey font.
+
+    Returns:
+        dict: A dictionary containing the bounding box information:
+            - 'min_x': Minimum x-coordinate
+            - 'max_x': Maximum x-coordinate
+            - 'min_y': Minimum y-coordinate
+            - 'max_y': Maximum y-coordinate
+            - 'width': Width of the bounding box
+            - 'height': Height of the bounding box
+    """
+    layout = text_layout(text, font_name)
+    return {
+        'min_x': layout.min_x,
+        'max_x': layout.max_x,
+        'min_y': layout.min_y,
+        'max_y': layout.max_y,
+        'width': layout.width,
+        'height': layout.height
+    }
@@ -0,0 +1,224 @@
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from .geometry import Drawing
+
+# Default time budget for 2-opt refinement, in seconds
+TWO_OPT_TIME_LIMIT = 10
+
+
+def path_endpoints(paths):
+    """
+    Get the first and last point of every path.
+
+    Args:
+        paths (Drawing or list): Paths as a Drawing or (N, 2) coordinate arrays.
+
+    Returns:
+        tuple: (starts, ends) as (len(paths), 2) arrays.
+    """
+    if isinstance(paths, Drawing):
+        return paths.starts(), paths.ends()
+    starts = np.array([path[0] for path in paths], dtype=float).reshape(-1, 2)
+    ends = np.array([path[-1] for path in paths], dtype=float).reshape(-1, 2)
+    return starts, ends
+
+
+def pen_up_distance(paths, order=None, flipped=None, origin=(0, 0)):
+    """
+    Total pen-up travel to draw paths in the given order, starting at origin.
+
+    Args:
+        paths (Drawing or list): Paths, see path_endpoints.
+        order (array): Drawing order as path indices (default: as given).
+        flipped (array): Per position in order, whether the path is drawn
+            from its last point to its first (default: none).
+        origin (tuple): Where the pen starts.
+
+    Returns:
+        float: Pen-up distance in the paths' units.
+    """
+    if not len(paths):
+        return 0.0
+    starts, ends = path_endpoints(paths)
+    if order is None:
+        order = np.arange(len(paths))
+    entry, exit = starts[order], ends[order]
+    if flipped is not None:
+        entry, exit = np.where(flipped[:, None], exit, entry), np.where(flipped[:, None], entry, exit)
+    previous = np.vstack([np.asarray(origin, dtype=float).reshape(1, 2), exit[:-1]])
+    return float(np.hypot(*(entry - previous).T).sum())
+
+
+def greedy_order(paths, origin=(0, 0), reverse=True):
+    """
+    Order paths by repeatedly drawing the path whose nearest endpoint is
+    closest to the pen, using a KD-tree over all path endpoints.
+
+    Args:
+        paths (Drawing or list): Paths, see path_endpoints.
+        origin (tuple): Where the pen starts.
+        reverse (bool): Allow drawing a path backwards when its last point is
+            the closer one.
+
+    Returns:
+        tuple: (order, flipped) arrays, see pen_up_distance.
+    """
+    count = len(paths)
+    starts, ends = path_endpoints(paths)
+    # Endpoint k belongs to path k // 2; odd endpoints are path ends
+    points = np.empty((2 * count, 2))
+    points[0::2], points[1::2] = starts, ends
+    candidates = np.arange(2 * count) if reverse else np.arange(0, 2 * count, 2)
+
+    used = np.zeros(count, dtype=bool)
+    order = np.empty(count, dtype=np.intp)
+    flipped = np.zeros(count, dtype=bool)
+    position = np.asarray(origin, dtype=float)
+
+    tree = cKDTree(points[candidates])
+    remaining = len(candidates)
+    for n in range(count):
+        # Rebuild the tree once half of its endpoints belong to drawn paths
+        if remaining < tree.n // 2:
+            candidates = candidates[~used[candidates // 2]]
+            tree = cKDTree(points[candidates])
+            remaining = len(candidates)
+        k = 8
+        while True:
+            k = min(k, tree.n)
+            _, found = tree.query(position, k=k)
+            found = np.atleast_1d(found)
+            free = found[~used[candidates[found] // 2]]
+            if len(free) or k == tree.n:
+                break
+            k *= 4
+        endpoint = candidates[free[0]]
+        path = endpoint // 2
+        used[path] = True
+        remaining -= 2 if reverse else 1
+        order[n] = path
+        flipped[n] = endpoint % 2 == 1
+        position = starts[path] if flipped[n] else ends[path]
+
+    return order, flipped
+
+
+def two_opt(paths, order, flipped, origin=(0, 0), time_limit=TWO_OPT_TIME_LIMIT):
+    """
+    Improve a path order with 2-opt moves until no move helps or the time
+    limit is reached. Reversing a run of the route also reverses the
+    drawing direction of every path in it.
+
+    Returns:
+        tuple: Improved (order, flipped) arrays.
+    """
+    deadline = time.monotonic() + time_limit
+    starts, ends = path_endpoints(paths)
+    order, flipped = order.copy(), flipped.copy()
+    count = len(order)
+
+    def endpoints():
+        entry = np.where(flipped[:, None], ends[order], starts[order])
+        exit = np.where(flipped[:, None], starts[order], ends[order])
+        return entry, exit
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        entry, exit = endpoints()
+        origin_point = np.asarray(origin, dtype=float)
+        for i in range(count):
+            if time.monotonic() >= deadline:
+                break
+            # Reverse positions i..j for every j >= i at once: the pen goes
+            # from before[i] to exit[j], and from entry[i] to entry[j + 1]
+            before = exit[i - 1] if i > 0 else origin_point
+            j = np.arange(i, count)
+            has_next = j + 1 < count
+            following = entry[np.minimum(j + 1, count - 1)]
+            old = np.hypot(*(entry[i] - before)) + np.where(has_next, np.hypot(*(following - exit[j]).T), 0)
+            new = np.hypot(*(exit[j] - before).T) + np.where(has_next, np.hypot(*(following - entry[i]).T), 0)
+            delta = new - old
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = i + best
+                order[i:j + 1] = order[i:j + 1][::-1]
+                flipped[i:j + 1] = ~flipped[i:j + 1][::-1]
+                entry, exit = endpoints()
+                improved = True
+
+    return order, flipped
+
+
+def optimize_travel(paths, origin=(0, 0), reverse=True, refine=True, time_limit=TWO_OPT_TIME_LIMIT):
+    """
+    Find a drawing order for paths that minimizes pen-up travel: a greedy
+    nearest-neighbour tour followed by time-boxed 2-opt refinement.
+
+    Args:
+        paths (Drawing or list): Paths, see path_endpoints.
+        origin (tuple): Where the pen starts.
+        reverse (bool): Allow drawing paths backwards.
+        refine (bool): Run 2-opt refinement after the greedy tour.
+        time_limit (float): Time budget for refinement in seconds.
+
+    Returns:
+        dict: A dictionary containing the result:
+            - 'order': Path indices in drawing order
+            - 'flipped': Whether each path in order is drawn backwards
+            - 'pen_up_before': Pen-up distance in the original order
+            - 'pen_up_after': Pen-up distance in the new order
+    """
+    before = pen_up_distance(paths, origin=origin)
+    if not len(paths):
+        return {'order': np.empty(0, dtype=np.intp), 'flipped': np.empty(0, dtype=bool),
+                'pen_up_before': before, 'pen_up_after': before}
+
+    order, flipped = greedy_order(paths, origin, reverse)
+    if refine and reverse:
+        order, flipped = two_opt(paths, order, flipped, origin, time_limit)
+    after = pen_up_distance(paths, order, flipped, origin)
+
+    # Never make things worse than the original order
+    if after > before:
+        order, flipped, after = np.arange(len(paths)), np.zeros(len(paths), dtype=bool), before
+
+    return {
+        'order': order,
+        'flipped': flipped,
+        'pen_up_before': before,
+        'pen_up_after': after,
+    }
+
+
+def sort_document(document, refine=True, time_limit=TWO_OPT_TIME_LIMIT):
+    """
+    Reorder the lines of every layer of a vpype Document in place to
+    minimize pen-up travel, and report the distance saved.
+
+    Returns:
+        dict: Total 'pen_up_before' and 'pen_up_after' in millimeters.
+    """
+    px_per_mm = 96 / 25.4
+    total_before = total_after = 0.0
+    for layer_id in list(document.layers):
+        lines = list(document.layers[layer_id])
+        if not lines:
+            continue
+        # Pack the layer's lines into one coordinate buffer
+        points = np.concatenate(lines)
+        offsets = np.concatenate([[0], np.cumsum([len(line) for line in lines])])
+        paths = Drawing(np.column_stack([points.real, points.imag]), offsets)
+        result = optimize_travel(paths, refine=refine, time_limit=time_limit)
+        document.replace(
+            [lines[i][::-1] if flip else lines[i] for i, flip in zip(result['order'], result['flipped'])],
+            layer_id,
+        )
+        total_before += result['pen_up_before']
+        total_after += result['pen_up_after']
+
+    return {
+        'pen_up_before': total_before / px_per_mm,
+        'pen_up_after': total_after / px_per_mm,
+    }
@@ -0,0 +1,184 @@
+import os
+import time
+from .profiling import log, span
+
+# zlib level for trimmed PNGs, Pillow's default
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Images picked up when trimming a directory
+IMAGE_EXTENSIONS = {'.png', '.webp', '.tif', '.tiff', '.gif'}
+
+
+def alpha_bbox(alpha, threshold=0, padding=0):
+    """
+    Get the bounding box of the pixels more opaque than threshold.
+
+    Args:
+        alpha (array): 2D alpha band.
+        threshold (int): Alpha value (0-255) a pixel must exceed to be kept.
+        padding (int): Pixels added around the box, clamped to the image.
+
+    Returns:
+        tuple: (left, upper, right, lower) as for Image.crop, or None if no
+        pixel is opaque enough.
+    """
+    import numpy as np
+
+    mask = alpha > threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not len(rows):
+        return None
+    top, bottom = rows[0], rows[-1] + 1
+    # Columns only need checking within the rows that have content
+    cols = np.flatnonzero(mask[top:bottom].any(axis=0))
+    left, right = cols[0], cols[-1] + 1
+
+    height, width = alpha.shape
+    return (
+        int(max(left - padding, 0)),
+        int(max(top - padding, 0)),
+        int(min(right + padding, width)),
+        int(min(bottom + padding, height)),
+    )
+
+
+def alpha_band(img):
+    """
+    Get an image's alpha band as a NumPy array without converting the whole
+    image to RGBA, or None if the image is fully opaque.
+    """
+    import numpy as np
+
+    if img.mode in ('RGBA', 'LA', 'PA', 'RGBa', 'La'):
+        return np.asarray(img.getchannel('A'))
+    if 'transparency' in img.info:
+        # Palette or single-color transparency only exists after conversion
+        return np.asarray(img.convert('RGBA').getchannel('A'))
+    return None
+
+
+def trim(image_path, output_path=None, threshold=0, padding=0, compress_level=DEFAULT_COMPRESS_LEVEL):
+    """
+    Crop an image to the bounding box of its non-transparent pixels.
+
+    The box is computed on the alpha band alone and the image is cropped in
+    its own mode, so no RGBA copy is made for images that already have an
+    alpha channel. Fully opaque images are saved uncropped.
+
+    Args:
+        image_path (str): Path to the input image.
+        output_path (str): Path to write the PNG to (optional).
+        threshold (int): Alpha value (0-255) at or below which pixels count
+            as transparent.
+        padding (int): Pixels of margin kept around the content.
+        compress_level (int): PNG zlib compression level, 0 (fastest) to 9
+            (smallest).
+
+    Returns:
+        str: Path to the trimmed image, or None if nothing is left.
+    """
+    result = _trim_image(image_path, output_path, threshold, padding, compress_level)
+    if result:
+        log(f"Image saved to {result}")
+    else:
+        print("No non-transparent area found.")
+    return result
+
+
+def trim_image(img, threshold=0, padding=0):
+    """
+    Crop an open image to its non-transparent pixels, see trim.
+
+    Returns:
+        Image: The cropped image (img itself if nothing is cropped), or
+        None if nothing is left.
+    """
+    alpha = alpha_band(img)
+    if alpha is None:
+        return img
+    bbox = alpha_bbox(alpha, threshold, padding)
+    if not bbox:
+        return None
+    return img.crop(bbox) if bbox != (0, 0, *img.size) else img
+
+
+def _trim_image(image_path, output_path, threshold, padding, compress_level):
+    # trim without printing, for use from worker threads
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        with span('parse'):
+            img.load()
+        with span('compute'):
+            trimmed_img = trim_image(img, threshold, padding)
+        if trimmed_img is None:
+            return None
+        if not output_path:
+            output_path = os.path.splitext(image_path)[0] + "_trimmed.png"
+        with span('serialize'):
+            trimmed_img.save(output_path, format='PNG', compress_level=compress_level)
+    return output_path
+
+
+def image_files(source):
+    """
+    List the images to trim: the files of a directory or a glob's matches,
+    without earlier *_trimmed.png outputs.
+    """
+    import glob
+
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in sorted(os.listdir(source))
+                 if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+    else:
+        paths = sorted(glob.glob(source))
+    return [path for path in paths if not path.endswith('_trimmed.png') and os.path.isfile(path)]
+
+
+def trim_images(image_paths, output_dir=None, threshold=0, padding=0, compress_level=DEFAULT_COMPRESS_LEVEL, workers=None):
+    """
+    Trim many images on a thread pool. Decoding, cropping and PNG encoding
+    release the GIL in Pillow, so threads run them in parallel.
+
+    Args:
+        image_paths (list): Input images.
+        output_dir (str): Directory to write the outputs to (default: next
+            to each input).
+        threshold, padding, compress_level: See trim.
+        workers (int): Number of threads (default: CPU count).
+
+    Returns:
+        dict: A dictionary containing the batch results:
+            - 'saved': Output paths written
+            - 'failed': Inputs that couldn't be trimmed
+            - 'seconds': Wall time of the batch
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = time.perf_counter()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def trim_one(image_path):
+        output_path = None
+        if output_dir:
+            stem = os.path.splitext(os.path.basename(image_path))[0]
+            output_path = os.path.join(output_dir, f"{stem}_trimmed.png")
+        try:
+            return _trim_image(image_path, output_path, threshold, padding, compress_level), None
+        except Exception as e:
+            return None, e
+
+    saved, failed = [], []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for image_path, (result, error) in zip(image_paths, pool.map(trim_one, image_paths)):
+            if result:
+                log(f"Image saved to {result}")
+                saved.append(result)
+            else:
+                print(f"Error: {image_path}: {error or 'no non-transparent area found'}")
+                failed.append(image_path)
+
+    seconds = time.perf_counter() - start
+    log(f"Trim: {len(saved)} saved, {len(failed)} failed in {seconds:.1f}s")
+    return {'saved': saved, 'failed': failed, 'seconds': seconds}
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from drawscape import batch
+from drawscape.batch import job_arguments, load_manifest, run_job
+from drawscape.main import build_parser
+
+
+def test_csv_values_are_converted(tmp_path):
+    manifest = tmp_path / 'jobs.csv'
+    manifest.write_text('action,image,threshold,marks,overwrite,compress_level\n'
+                        'trim,a.png,8,true,false,1\n'
+                        'trim,b.png,,no,YES,\n')
+    first, second = (job_arguments(job) for job in load_manifest(str(manifest)))
+    assert (first.threshold, first.marks, first.overwrite, first.compress_level) == (8, True, False, 1)
+    # Empty cells keep the defaults
+    assert (second.threshold, second.marks, second.overwrite, second.compress_level) == (0, False, True, 6)
+
+
+def test_empty_strings_are_missing():
+    args = job_arguments({'action': 'trim', 'image': 'a.png', 'threshold': ' ', 'no_cache': ''})
+    assert args.threshold == 0
+    assert args.no_cache is False
+
+
+@pytest.mark.parametrize('field, value', [
+    ('threshold', 'abc'),
+    ('marks', 'maybe'),
+    ('contours', 'spiral'),
+    ('compress_level', '12'),
+])
+def test_invalid_values(field, value):
+    with pytest.raises(ValueError):
+        job_arguments({'action': 'trim', 'image': 'a.png', field: value})
+
+
+@pytest.mark.parametrize('job', [
+    {'action': 'trim', 'image': 'a.png', 'threshold': 'abc'},
+    {'action': 'trim', 'image': 'a.png', 'output': 'out/{nope}.png'},
+])
+def test_bad_job_is_an_error_report(job):
+    report = run_job(dict(job, id=0))
+    assert report['status'] == 'error'
+    assert report['error']
+    assert report['seconds'] >= 0
+
+
+@pytest.mark.parametrize('action', ['batch', 'cache', 'serve'])
+def test_nested_actions_are_rejected(tmp_path, action):
+    manifest = tmp_path / 'jobs.jsonl'
+    manifest.write_text(f'{{"action": "{action}"}}\n')
+    with pytest.raises(ValueError):
+        load_manifest(str(manifest))
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(['batch', '--manifest', '*.svg', '--batch-action', action])
+
+
+def crash_on_marked_job(job, output_template=None):
+    # Stands in for run_job in the pool: kills its worker on the marked job
+    if job.get('svg') == 'crash':
+        os._exit(1)
+    return dict(job, output=None, result='done', error=None, status='ok', seconds=0.0)
+
+
+def test_dead_worker_still_writes_the_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, 'run_job', crash_on_marked_job)
+    manifest = tmp_path / 'jobs.jsonl'
+    manifest.write_text('{"action": "svgdetails", "image": "a.svg"}\n'
+                        '{"action": "svgdetails", "image": "b.svg", "svg": "crash"}\n')
+    report_path = tmp_path / 'report.json'
+    reports = batch.run_batch(str(manifest), workers=1, report_path=str(report_path))
+
+    assert [r['id'] for r in reports] == [0, 1]
+    assert reports[1]['status'] == 'error'
+    assert 'BrokenProcessPool' in reports[1]['error']
+    assert [r['id'] for r in json.loads(report_path.read_text())['jobs']] == [0, 1]
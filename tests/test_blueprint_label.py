@@ -0,0 +1,29 @@
+import json
+import os
+
+import pytest
+
+from drawscape import blueprint_label as module
+from drawscape.blueprint_label import blueprint_label
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'plot_time')
+
+
+def test_failed_estimate_leaves_no_file(tmp_path, monkeypatch):
+    def fail(svg_file_path, options=None):
+        raise RuntimeError("NextDraw preview failed")
+
+    monkeypatch.setattr(module, 'estimate_plot_nextdraw', fail)
+    data = tmp_path / 'label.json'
+    data.write_text(json.dumps({'title': 'Test'}))
+    output = tmp_path / 'label.svg'
+    with pytest.raises(RuntimeError):
+        blueprint_label(str(data), os.path.join(FIXTURES, 'square.svg'), str(output))
+    assert not output.exists()
+
+
+def test_native_estimate(tmp_path):
+    data = tmp_path / 'label.json'
+    data.write_text(json.dumps({'title': 'Test'}))
+    output = blueprint_label(str(data), os.path.join(FIXTURES, 'square.svg'), str(tmp_path / 'label.svg'), estimate='native')
+    assert open(output).read().rstrip().endswith('</svg>')
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from drawscape import cache
+from drawscape.main import build_parser, run_action
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # run_action applies the cache options to the whole process
+    monkeypatch.setattr(cache, '_settings', dict(cache._settings))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'out').mkdir()
+    (tmp_path / 'a.svg').write_text('<svg xmlns="http://www.w3.org/2000/svg" width="10mm" height="20mm" '
+                                    'viewBox="0 0 10 20"><path d="M1 1 L9 19"/></svg>')
+    return tmp_path
+
+
+def run(*argv):
+    args = build_parser().parse_args(list(argv) + ['--cache-dir', os.path.abspath('cache'), '--quiet'])
+    return run_action(args.action, args)
+
+
+def test_hit_with_different_output(workdir):
+    first = run('split', '--image', 'a.svg', '--rows', '2', '--cols', '1')
+    assert [os.path.basename(p) for p in first] == ['a_upper.svg', 'a_lower.svg']
+
+    second = run('split', '--image', 'a.svg', '--rows', '2', '--cols', '1', '--output', 'out/x.svg')
+    assert [os.path.relpath(p, workdir) for p in second] == [os.path.join('out', 'x_upper.svg'), os.path.join('out', 'x_lower.svg')]
+    for first_path, second_path in zip(first, second):
+        assert (workdir / second_path).read_text() == (workdir / first_path).read_text()
+
+
+def test_hit_restores_to_current_output(workdir):
+    run('split', '--image', 'a.svg', '--output', 'out/x.svg')
+    # Restored into a directory that doesn't exist yet
+    restored = run('split', '--image', 'a.svg', '--output', 'other/y.svg')
+    assert [os.path.relpath(p, workdir) for p in restored] == [os.path.join('other', 'y_upper.svg'), os.path.join('other', 'y_lower.svg')]
+    assert all(os.path.isfile(p) for p in restored)
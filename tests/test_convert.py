@@ -0,0 +1,26 @@
+import pytest
+
+from drawscape.convert import RELATIVE_PLACEHOLDER, convert_svg, path_template
+from drawscape.svg_path import load_polylines
+
+PX_TO_MM = 25.4 / 96
+
+
+def test_path_template_keeps_arc_flags():
+    template, numbers = path_template('m1 2 a3 4 30 0 1 5 6 l7 8', RELATIVE_PLACEHOLDER)
+    assert template == 'm%.5f %.5f a%.5f %.5f 30 0 1 %.5f %.5fl%.5f %.5f'
+    assert numbers == ['1', '2', '3', '4', '5', '6', '7', '8']
+
+
+@pytest.mark.parametrize('arc', ['', 'a5 5 0 0 1 10 0'])
+def test_relative_paths_do_not_drift(tmp_path, arc):
+    # A thousand steps that round to nothing at 3 decimals once in mm
+    d = f"M0 0 {arc}" + ' l0.0013 0' * 1000
+    source = tmp_path / 'drawing.svg'
+    source.write_text('<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">'
+                      f'<path d="{d}" fill="none" stroke="black"/></svg>')
+    output = convert_svg(str(source), str(tmp_path / 'converted.svg'))
+
+    end_x = (10 if arc else 0) + 1.3
+    polylines = load_polylines(output)
+    assert polylines[-1][-1][0] == pytest.approx(end_x * PX_TO_MM, abs=0.01)
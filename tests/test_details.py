@@ -0,0 +1,26 @@
+import pytest
+
+from drawscape.details import parse_svg_file
+
+
+def write_svg(tmp_path, body):
+    path = tmp_path / 'drawing.svg'
+    path.write_text('<svg xmlns="http://www.w3.org/2000/svg" width="10mm" height="10mm" viewBox="0 0 10 10">'
+                    f'{body}</svg>')
+    return str(path)
+
+
+def test_single_path(tmp_path):
+    details = parse_svg_file(write_svg(tmp_path, '<path d="M0 0 L3 4"/>'))
+    assert details['path_length'] == pytest.approx(5)
+    assert details['bounding_box'] == {'min_x': 0.0, 'min_y': 0.0, 'max_x': 3.0, 'max_y': 4.0}
+
+
+def test_single_subpath(tmp_path):
+    details = parse_svg_file(write_svg(tmp_path, '<path d="M0 0 H3 V4 Z"/>'))
+    assert details['path_length'] == pytest.approx(12)
+
+
+def test_jumps_between_subpaths_are_not_counted(tmp_path):
+    details = parse_svg_file(write_svg(tmp_path, '<path d="M0 0 H3 M0 5 H4"/><line x1="0" y1="9" x2="0" y2="10"/>'))
+    assert details['path_length'] == pytest.approx(8)
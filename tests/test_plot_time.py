@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from drawscape.plot_time import estimate_plot
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'plot_time')
+
+# Plot time and pen-down distance of the fixtures, as recorded from NextDraw's
+# preview with `python -m drawscape.benchmarks plot-time --record`. Until they
+# are recorded, plot times are null and those tests skip, and pen-down
+# distances are the exact lengths of the drawn geometry: that only checks the
+# estimator's flattening, not its agreement with NextDraw.
+with open(os.path.join(FIXTURES, 'references.json'), 'r') as f:
+    REFERENCES = json.load(f)
+
+TOLERANCE = 0.1
+
+
+@pytest.mark.parametrize('name', sorted(REFERENCES))
+def test_distance_pendown(name):
+    estimate = estimate_plot(os.path.join(FIXTURES, name))
+    assert estimate['distance_pendown'] == pytest.approx(REFERENCES[name]['distance_pendown'], rel=TOLERANCE)
+
+
+@pytest.mark.parametrize('name', sorted(REFERENCES))
+def test_time_estimate(name):
+    reference = REFERENCES[name]['time_estimate']
+    if reference is None:
+        pytest.skip("No NextDraw plot time recorded, run: python -m drawscape.benchmarks plot-time "
+                    "tests/fixtures/plot_time/*.svg --record tests/fixtures/plot_time/references.json")
+    estimate = estimate_plot(os.path.join(FIXTURES, name))
+    assert estimate['time_estimate'] == pytest.approx(reference, rel=TOLERANCE)
@@ -0,0 +1,79 @@
+import os
+import re
+
+from drawscape.shipping import create_shipping_labels, filename_field
+
+
+def write_recipients(tmp_path, rows):
+    path = tmp_path / 'orders.csv'
+    path.write_text('\n'.join([','.join(rows[0])] + [','.join(row) for row in rows[1:]]) + '\n')
+    return str(path)
+
+
+def test_index_column_does_not_clash(tmp_path):
+    recipients = write_recipients(tmp_path, [('index', 'to_name', 'to_address', 'to_city'),
+                                             ('A7', 'Jane Doe', '1 Main St', 'Springfield'),
+                                             ('B2', 'John Roe', '2 Oak Ave', 'Reno')])
+    written = create_shipping_labels(recipients, str(tmp_path / 'out' / '{index}_{to_name}.svg'))
+    assert [os.path.basename(p) for p in written] == ['0_Jane_Doe.svg', '1_John_Roe.svg']
+
+
+def test_field_values_stay_in_the_output_directory(tmp_path):
+    recipients = write_recipients(tmp_path, [('to_name', 'to_address', 'to_city'),
+                                             ('../../etc/passwd', '1 Main St', 'Springfield'),
+                                             ('..', '2 Oak Ave', 'Reno'),
+                                             ('', '3 Pine Rd', 'Austin')])
+    out = tmp_path / 'out'
+    written = create_shipping_labels(recipients, str(out / '{to_name}_{index}.svg'))
+    assert len(written) == 3
+    for path in written:
+        assert os.path.dirname(path) == str(out)
+        assert os.path.isfile(path)
+
+
+def test_failed_label_does_not_stop_the_run(tmp_path):
+    recipients = write_recipients(tmp_path, [('to_name', 'to_address', 'to_city'),
+                                             ('Jane Doe', '1 Main St', 'Springfield'),
+                                             ('John Roe', '2 Oak Ave', 'Reno')])
+    (tmp_path / 'out').mkdir()
+    # The first label's path is taken by a directory
+    (tmp_path / 'out' / 'Jane_Doe.svg').mkdir()
+    written = create_shipping_labels(recipients, str(tmp_path / 'out' / '{to_name}.svg'))
+    assert written == [str(tmp_path / 'out' / 'John_Roe.svg')]
+
+
+def test_filename_field():
+    assert filename_field('Jane Doe') == 'Jane_Doe'
+    assert filename_field('a/b\\c') == 'a_b_c'
+    assert filename_field('..') == 'unnamed'
+    assert filename_field(None) == 'unnamed'
+
+
+def test_plain_output_gets_an_index_suffix(tmp_path):
+    recipients = write_recipients(tmp_path, [('to_name', 'to_address', 'to_city'),
+                                             ('Jane Doe', '1 Main St', 'Springfield'),
+                                             ('John Roe', '2 Oak Ave', 'Reno'),
+                                             ('Ann Poe', '3 Pine Rd', 'Austin')])
+    written = create_shipping_labels(recipients, str(tmp_path / 'out.svg'))
+    assert [os.path.basename(p) for p in written] == ['out_0.svg', 'out_1.svg', 'out_2.svg']
+
+
+def test_blank_and_missing_cells(tmp_path):
+    # A blank address and a short row without a city
+    path = tmp_path / 'orders.csv'
+    path.write_text('to_name,to_address,to_city\n'
+                    'Jane Doe,,Springfield\n'
+                    'John Roe,2 Oak Ave\n')
+    written = create_shipping_labels(str(path), str(tmp_path / '{index}.svg'))
+    assert len(written) == 2
+    for label in written:
+        svg = open(label).read()
+        assert 'inf' not in svg and 'nan' not in svg
+    # The blank address and the missing city are both centered as N/A
+    blank_address = translates(written[0])[-2]
+    missing_city = translates(written[1])[-1]
+    assert blank_address.split(',')[0] == missing_city.split(',')[0]
+
+
+def translates(path):
+    return re.findall(r'translate\(([^)]*)\)', open(path).read())